@@ -0,0 +1,248 @@
+"""Retrieval context for the AI assistant
+
+Builds a short, bounded block of shop facts for one customer: their purchase
+summary, recent transactions, chit memberships, offers open to their tier and
+FAQs relevant to the question. Per-customer summaries come from
+customer_aggregates; offers and FAQs are ranked with a small local TF-IDF index.
+
+The customer's own records are only included for questions about them (see
+is_personal_query). Other questions get the tier's offers and the FAQs, which
+are the same for every customer of a tier, so the response cache, keyed on
+the context, shares their answers across customers.
+"""
+import re
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from customer_aggregates import aggregate_versions, get_customer_aggregates
+from data_store import get_data_store, load_table
+from offer_index import OfferIndex
+
+MAX_CONTEXT_CHARS = 1500
+RECENT_TRANSACTIONS = 3
+TOP_OFFERS = 3
+TOP_FAQS = 2
+
+FAQS = [
+    ("How should I clean gold jewellery?",
+     "Soak gold in warm water with a drop of mild soap, brush gently with a soft brush, rinse and pat dry. Avoid chlorine and harsh chemicals."),
+    ("How do I stop silver from tarnishing?",
+     "Store silver in airtight pouches with anti-tarnish strips, wipe after wearing and polish with a silver cloth. Keep it away from perfume and humidity."),
+    ("How should diamond jewellery be cared for?",
+     "Clean diamonds with warm soapy water and a soft brush, store pieces separately to avoid scratches and get prongs checked every six months."),
+    ("Is your gold hallmarked?",
+     "All gold jewellery is BIS hallmarked with purity, assay centre and HUID marks."),
+    ("What is the exchange and buyback policy?",
+     "Gold and silver can be exchanged at the current day rate less making charges. Diamonds are bought back against the original certificate and invoice."),
+    ("How does the chit scheme work?",
+     "Members pay a fixed monthly instalment. At each draw one member receives the chit amount to spend on jewellery; instalments continue until the scheme ends."),
+    ("Can I pay my pending amount in instalments?",
+     "Pending amounts can be cleared at the counter or online in instalments before the due date shown on your invoice."),
+    ("How are making charges calculated?",
+     "Making charges are a percentage of the metal value and depend on design complexity; they are shown separately on every invoice."),
+]
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+# Words marking a question about the asking customer's own records
+PERSONAL_TERMS = frozenset(
+    "i me my mine myself balance pending due paid invoice bought purchase purchases order orders".split()
+)
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or our "
+    "should the this to what when with you your".split()
+)
+
+
+def _stem(token):
+    """Crude suffix stripping so 'hallmarked'/'hallmark' and 'offers'/'offer' match"""
+    for suffix in ('ing', 'ed', 's'):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    return [_stem(t) for t in _TOKEN.findall(str(text).lower()) if t not in _STOPWORDS]
+
+
+def is_personal_query(query):
+    """Whether a question is about the customer's own purchases, dues or chits"""
+    return not PERSONAL_TERMS.isdisjoint(_TOKEN.findall(str(query).lower()))
+
+
+class KeywordIndex:
+    """Dense TF-IDF index over a handful of short documents"""
+
+    def __init__(self, documents):
+        self.documents = list(documents)
+        tokens = [tokenize(doc) for doc in self.documents]
+        self.vocabulary = {term: i for i, term in enumerate(sorted({t for doc in tokens for t in doc}))}
+
+        counts = np.zeros((len(tokens), len(self.vocabulary)), dtype='float64')
+        for row, doc in enumerate(tokens):
+            for term in doc:
+                counts[row, self.vocabulary[term]] += 1
+        doc_freq = (counts > 0).sum(axis=0)
+        self.idf = np.log((1 + len(tokens)) / (1 + doc_freq)) + 1
+        weights = counts * self.idf
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        self.matrix = weights / np.where(norms == 0, 1, norms)
+
+    def scores(self, query):
+        vector = np.zeros(len(self.vocabulary))
+        for term in tokenize(query):
+            i = self.vocabulary.get(term)
+            if i is not None:
+                vector[i] += 1
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return np.zeros(len(self.documents))
+        return self.matrix @ (vector / norm)
+
+    def search(self, query, k, mask=None):
+        """Positions of the top-k documents, restricted to `mask` when given"""
+        scores = self.scores(query)
+        candidates = np.arange(len(self.documents)) if mask is None else np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return []
+        # Stable sort keeps document order among equal scores
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return order[:k].tolist()
+
+
+def _money(value):
+    return f"₹{float(value):,.0f}"
+
+
+class CustomerContextBuilder:
+    def __init__(self, aggregates, offers_df, faqs=FAQS):
+        self.aggregates = aggregates
+        self.offers = offers_df.reset_index(drop=True)
+        self.offer_dates = OfferIndex(self.offers)
+        self.faqs = list(faqs)
+
+        self.offer_index = KeywordIndex(
+            f"{o['name']} {o['description']} {o['applicable_to']}" for _, o in self.offers.iterrows()
+        )
+        self.faq_index = KeywordIndex(f"{q} {a}" for q, a in self.faqs)
+
+        self._cache = {}
+        self._lock = threading.Lock()
+        # Rows of customers and transactions whose contexts are already current
+        self.customers_seen = aggregates.customers_seen
+        self.transactions_seen = aggregates.transactions_seen
+
+    def _customer_block(self, customer_id):
+        """Profile, purchases and chits; cached until the customer's data changes"""
+        with self._lock:
+            cached = self._cache.get(customer_id)
+        if cached is not None:
+            return cached
+
+        aggregate = self.aggregates.get(customer_id)
+        lines = [f"Customer tier: {aggregate['profile']['tier']}"]
+        if aggregate['transactions']:
+            favourite = self.aggregates.favourite_category(aggregate)
+            lines.append(
+                f"Purchases: {aggregate['transactions']} transactions, {_money(aggregate['purchased'])} in sales, "
+                f"{_money(aggregate['pending'])} pending, last on {aggregate['last_date']:%Y-%m-%d}"
+                + (f", mostly {favourite}" if favourite else "")
+            )
+            for tx in aggregate['recent'][:RECENT_TRANSACTIONS]:
+                lines.append(
+                    f"- {tx['date']:%Y-%m-%d} {tx['type']} {tx['category']} {_money(tx['amount'])} ({tx['status']})"
+                )
+        for chit in aggregate['chits']:
+            lines.append(
+                f"Chit: {chit['name']} ({chit['status']}): paid {_money(chit['amount_paid'])}, "
+                f"remaining {_money(chit['amount_remaining'])}, draw #{chit['draw_number']}"
+            )
+
+        block = "\n".join(lines)
+        with self._lock:
+            self._cache[customer_id] = block
+        return block
+
+    def eligible_offers_mask(self, tier, today=None):
+        return self.offer_dates.active_mask(tier, today)
+
+    def build(self, customer, query, today=None, max_chars=MAX_CONTEXT_CHARS):
+        """Context text for one customer and question, at most `max_chars` long
+
+        The customer's own block is left out unless the question is personal.
+        """
+        sections = []
+        customer_id = self.aggregates.customer_id(customer)
+        tier = None
+        if customer_id is not None:
+            if is_personal_query(query):
+                sections.append(self._customer_block(customer_id))
+            tier = self.aggregates.get(customer_id)['profile']['tier']
+
+        if tier is not None:
+            picks = self.offer_index.search(query, TOP_OFFERS, mask=self.eligible_offers_mask(tier, today))
+            for i in picks:
+                offer = self.offers.iloc[i]
+                sections.append(
+                    f"Offer: {offer['name']} - {offer['description']} "
+                    f"(valid till {pd.Timestamp(offer['valid_to']):%Y-%m-%d})"
+                )
+
+        scores = self.faq_index.scores(query)
+        for i in self.faq_index.search(query, TOP_FAQS):
+            if scores[i] > 0:
+                question, answer = self.faqs[i]
+                sections.append(f"FAQ: {question} {answer}")
+
+        # Sections are in priority order; lines that would overflow are dropped
+        lines = []
+        used = 0
+        for line in "\n".join(sections).splitlines():
+            cost = len(line) + (1 if lines else 0)
+            if used + cost <= max_chars:
+                lines.append(line)
+                used += cost
+        return "\n".join(lines)
+
+    def catch_up(self, customers_df, transactions_df):
+        """Fold appended rows into the aggregates and drop the contexts of the customers they touch
+
+        The aggregates are shared with the customer dashboard, which may
+        have folded the rows already, so the builder keeps its own row
+        counts of what its cached contexts reflect.
+        """
+        self.aggregates.catch_up(customers_df, transactions_df)
+        with self._lock:
+            touched = set(customers_df['id'].iloc[self.customers_seen:].astype(int))
+            touched.update(transactions_df['customer_id'].iloc[self.transactions_seen:].astype(int))
+            self.customers_seen = max(self.customers_seen, len(customers_df))
+            self.transactions_seen = max(self.transactions_seen, len(transactions_df))
+            for customer_id in touched:
+                self._cache.pop(customer_id, None)
+        return self
+
+    def invalidate(self, customer_id=None):
+        with self._lock:
+            if customer_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(int(customer_id), None)
+
+
+@st.cache_resource
+def get_context_builder(_aggregates, customers_version, transactions_version, chit_members_version, offers_version):
+    """Shared CustomerContextBuilder, rebuilt together with the customer aggregates"""
+    return CustomerContextBuilder(_aggregates, load_table('offers'))
+
+
+def build_customer_context(customer, query, max_chars=MAX_CONTEXT_CHARS):
+    """Context text for the signed-in customer's question"""
+    store = get_data_store()
+    versions = aggregate_versions(store)
+    builder = get_context_builder(get_customer_aggregates(*versions), *versions)
+    builder.catch_up(store.get('customers'), store.get('transactions'))
+    return builder.build(customer, query, max_chars=max_chars)
@@ -0,0 +1,187 @@
+import threading
+import pandas as pd
+import streamlit as st
+
+from data_store import load_table
+
+STATUSES = ('present', 'absent', 'leave', 'half_day')
+
+
+def month_key(month, year=None):
+    """Normalize 'YYYY-MM', (year, month) or a date into an int YYYYMM key"""
+    if year is not None:
+        return int(year) * 100 + int(month)
+    if isinstance(month, str):
+        y, m = month.split('-')[:2]
+        return int(y) * 100 + int(m)
+    ts = pd.Timestamp(month)
+    return ts.year * 100 + ts.month
+
+
+class AttendanceIndex:
+    """Status counts per (staff_id, month) with incremental updates
+
+    Built once from the attendance table in a single groupby. Days recorded
+    later through `record` are kept as overrides on top of the base rows so
+    the shared attendance DataFrame is never copied or mutated.
+    """
+
+    def __init__(self, attendance_df=None):
+        self._counts = {}
+        self._months_by_staff = {}
+        self._positions = {}
+        self._overrides = {}
+        self._count_frame = pd.DataFrame(
+            columns=list(STATUSES),
+            index=pd.MultiIndex.from_arrays([[], []], names=['staff_id', 'ym']),
+        )
+        self._lock = threading.Lock()
+        # Bumped by every record, for consumers deriving data from the index
+        self.version = 0
+        self.attendance_df = attendance_df
+        if attendance_df is not None and not attendance_df.empty:
+            self._build(attendance_df)
+
+    def _build(self, df):
+        dates = pd.to_datetime(df['date'])
+        keys = pd.DataFrame({
+            'staff_id': df['staff_id'].to_numpy(),
+            'date': dates.to_numpy(),
+            'ym': (dates.dt.year * 100 + dates.dt.month).to_numpy(),
+            'status': df['status'].astype(str).to_numpy(),
+        })
+        self._dates = dates.to_numpy()
+        # A staff-day marked again is logged as a new row; the last mark wins
+        keys = keys.drop_duplicates(['staff_id', 'date'], keep='last')
+        self._live = keys.index.to_numpy()
+
+        counts = keys.groupby(['staff_id', 'ym', 'status']).size().unstack(fill_value=0)
+        counts = counts.reindex(columns=list(STATUSES), fill_value=0)
+        counts.columns.name = None
+        self._count_frame = counts
+        columns = [counts[status].to_numpy() for status in STATUSES]
+        for i, (staff_id, ym) in enumerate(counts.index):
+            self._counts[(int(staff_id), int(ym))] = {
+                status: int(col[i]) for status, col in zip(STATUSES, columns)
+            }
+            self._months_by_staff.setdefault(int(staff_id), set()).add(int(ym))
+
+        self._positions = {
+            (int(staff_id), int(ym)): self._live[rows]
+            for (staff_id, ym), rows in keys.groupby(['staff_id', 'ym']).indices.items()
+        }
+
+    def _base_status(self, staff_id, ym, date):
+        rows = self._positions.get((staff_id, ym))
+        if rows is None:
+            return None
+        hits = rows[self._dates[rows] == date.to_datetime64()]
+        if len(hits) == 0:
+            return None
+        return str(self.attendance_df['status'].iloc[hits[-1]])
+
+    def record(self, staff_id, date, status, remarks=''):
+        """Record (or overwrite) one staff-day and update the month counts"""
+        if status not in STATUSES:
+            raise ValueError(f"Unknown attendance status: {status}")
+
+        staff_id = int(staff_id)
+        date = pd.Timestamp(date).normalize()
+        ym = date.year * 100 + date.month
+
+        with self._lock:
+            marked = self._overrides.setdefault((staff_id, ym), {})
+            previous = marked.get(date)
+            previous_status = previous[0] if previous else self._base_status(staff_id, ym, date)
+
+            counts = self._counts.setdefault((staff_id, ym), dict.fromkeys(STATUSES, 0))
+            if previous_status in counts:
+                counts[previous_status] -= 1
+            counts[status] += 1
+            self._months_by_staff.setdefault(staff_id, set()).add(ym)
+            marked[date] = (status, remarks)
+            self.version += 1
+
+    def summary(self, staff_id, month=None):
+        """Status counts for one staff member in a month ('YYYY-MM'), or all months"""
+        staff_id = int(staff_id)
+        if month is not None:
+            return dict(self._counts.get((staff_id, month_key(month)), dict.fromkeys(STATUSES, 0)))
+
+        total = dict.fromkeys(STATUSES, 0)
+        for ym in self._months_by_staff.get(staff_id, ()):
+            for status, count in self._counts[(staff_id, ym)].items():
+                total[status] += count
+        return total
+
+    def month_counts(self, year, month):
+        """Status counts of every staff member for one month as a DataFrame"""
+        ym = month_key(month, year)
+        frame = self._count_frame
+        if ym in frame.index.get_level_values('ym'):
+            counts = frame.xs(ym, level='ym').copy()
+        else:
+            counts = pd.DataFrame(columns=list(STATUSES), index=pd.Index([], name='staff_id'))
+
+        # Days recorded after the build are only reflected in the dict counts
+        touched = [staff_id for staff_id, key_ym in list(self._overrides) if key_ym == ym]
+        for staff_id in touched:
+            counts.loc[staff_id] = [self._counts[(staff_id, ym)][status] for status in STATUSES]
+        return counts.astype('int64')
+
+    def day_statuses(self):
+        """Every recorded staff-day as staff_id, date and status columns, later marks winning"""
+        df = self.attendance_df
+        if df is not None and not df.empty:
+            days = pd.DataFrame({
+                'staff_id': df['staff_id'].to_numpy()[self._live],
+                'date': self._dates[self._live],
+                'status': df['status'].astype(str).to_numpy()[self._live],
+            })
+        else:
+            days = pd.DataFrame({'staff_id': pd.Series(dtype='int64'), 'date': pd.Series(dtype='datetime64[ns]'),
+                                 'status': pd.Series(dtype=object)})
+
+        marked = [
+            {'staff_id': staff_id, 'date': date, 'status': status}
+            for (staff_id, _), by_date in list(self._overrides.items())
+            for date, (status, _) in list(by_date.items())
+        ]
+        if marked:
+            days = pd.concat([days, pd.DataFrame(marked)], ignore_index=True)
+            days = days.drop_duplicates(['staff_id', 'date'], keep='last').reset_index(drop=True)
+        return days
+
+    def marked_rows(self, staff_id, year, month):
+        """Days recorded through `record` for one staff member and month"""
+        staff_id = int(staff_id)
+        marked = self._overrides.get((staff_id, month_key(month, year)), {})
+        return pd.DataFrame(
+            [{'staff_id': staff_id, 'date': date, 'status': status, 'remarks': remarks}
+             for date, (status, remarks) in list(marked.items())],
+            columns=['staff_id', 'date', 'status', 'remarks'],
+        )
+
+    def month_rows(self, staff_id, year, month):
+        """Attendance rows for one staff member and month, newest first"""
+        staff_id = int(staff_id)
+        ym = month_key(month, year)
+        rows = self._positions.get((staff_id, ym))
+        if rows is not None:
+            base = self.attendance_df.iloc[rows].copy()
+            base['date'] = pd.to_datetime(base['date'])
+        else:
+            base = pd.DataFrame(columns=['staff_id', 'date', 'status', 'remarks'])
+
+        marked = self.marked_rows(staff_id, year, month)
+        if not marked.empty:
+            base = base[~base['date'].isin(marked['date'])]
+            base = pd.concat([base.astype({'status': str}), marked], ignore_index=True)
+
+        return base.sort_values('date', ascending=False).reset_index(drop=True)
+
+
+@st.cache_resource
+def get_attendance_index(attendance_version):
+    """Shared AttendanceIndex, rebuilt when the attendance table is reloaded"""
+    return AttendanceIndex(load_table('attendance'))
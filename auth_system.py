@@ -1,36 +1,51 @@
 import streamlit as st
 import pandas as pd
-import hashlib
 from datetime import datetime
 
+from credentials import CredentialIndex, client_address, hash_password
+from write_log import next_id
+
 class AuthenticationSystem:
-    def __init__(self, users_df, customers_df):
+    def __init__(self, users_df, customers_df, write_log=None, staff_df=None, credentials=None):
         self.users_df = users_df
         self.customers_df = customers_df
+        self.write_log = write_log
+        # Shared CredentialIndex (see credentials.load_credential_index)
+        self.credentials = credentials or CredentialIndex(users_df, staff_df, customers_df)
     
     def register_customer(self, name, mobile, email, password):
         """Register a new customer"""
         # Check if mobile already exists
-        if mobile in self.customers_df['mobile'].values:
+        if self.credentials.exists('customer', mobile):
             return False, "Mobile number already registered"
         
-        # Hash password
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        row = {
+            'name': name,
+            'mobile': mobile,
+            'email': email,
+            'username': f"{name.split()[0].upper()}_{mobile[-4:]}",
+            'password_hash': hash_password(password, self.credentials.iterations),
+            'tier': 'Standard',
+            'joined_date': datetime.now().date(),
+            'pending_amount': 0,
+            'total_purchased': 0,
+            'chit_amount': 0
+        }
+        if self.write_log is not None:
+            row = self.write_log.append_new('customers', row)
+            self.customers_df = self.write_log.store.get('customers')
+        else:
+            row['id'] = next_id(self.customers_df, 'id')
+        self.credentials.add('customer', dict(row, role='customer'), [row['username'], mobile])
         
         return True, "Registration successful"
     
-    def authenticate_user(self, username, password):
-        """Authenticate user login"""
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        user = self.users_df[self.users_df['username'] == username]
-        
-        if user.empty:
-            return False, None
-        
-        if user.iloc[0]['password_hash'] == password_hash:
-            return True, user.iloc[0].to_dict()
-        
-        return False, None
+    def authenticate_user(self, username, password, realm='user'):
+        """Authenticate a login against users ('user'), staff or customers
+
+        Returns (success, user record, seconds to wait when throttled).
+        """
+        return self.credentials.authenticate(realm, username, password, client_address())
 
 def init_session_state():
     """Initialize session state variables"""
@@ -50,7 +65,19 @@ def logout():
     st.session_state.user_data = None
     st.rerun()
 
-def render_login_page():
+def _login(user_data, role):
+    st.session_state.authenticated = True
+    st.session_state.user_role = role
+    st.session_state.user_data = user_data
+    st.rerun()
+
+def _login_error(retry_after):
+    if retry_after:
+        st.error(f"Too many failed attempts. Try again in {int(retry_after // 60) + 1} min")
+    else:
+        st.error("Invalid credentials")
+
+def render_login_page(auth):
     """Render the login page"""
     st.set_page_config(page_title="Jewelry Management System", layout="centered")
     
@@ -64,31 +91,27 @@ def render_login_page():
         
         if login_type == "Manager":
             st.info("👨‍💼 Manager Login")
-            username = st.text_input("Username", value="manager_user")
-            password = st.text_input("Password", type="password", value="manager123")
+            username = st.text_input("Username", placeholder="manager_user")
+            password = st.text_input("Password", type="password")
             
             if st.button("🔓 Login Manager", use_container_width=True):
-                if username == "manager_user" and password == "manager123":
-                    st.session_state.authenticated = True
-                    st.session_state.user_role = "Manager"
-                    st.session_state.user_data = {"name": "Manager User", "role": "Manager"}
-                    st.rerun()
+                success, user, retry_after = auth.authenticate_user(username, password, realm='user')
+                if success:
+                    _login(user, "Manager")
                 else:
-                    st.error("Invalid credentials")
+                    _login_error(retry_after)
         
         elif login_type == "Staff":
             st.info("👨‍💼 Staff Login")
-            username = st.text_input("Username", placeholder="e.g., RAJESH_2001")
-            password = st.text_input("Password", type="password", placeholder="staff123")
+            username = st.text_input("Username or Mobile", placeholder="e.g., RAJESH_2001")
+            password = st.text_input("Password", type="password")
             
             if st.button("🔓 Login Staff", use_container_width=True):
-                if password == "staff123":  # Demo password
-                    st.session_state.authenticated = True
-                    st.session_state.user_role = "Staff"
-                    st.session_state.user_data = {"name": username, "role": "Staff"}
-                    st.rerun()
+                success, user, retry_after = auth.authenticate_user(username, password, realm='staff')
+                if success:
+                    _login(user, "Staff")
                 else:
-                    st.error("Invalid credentials")
+                    _login_error(retry_after)
         
         else:  # Customer
             st.info("👤 Customer Login")
@@ -102,12 +125,16 @@ def render_login_page():
                 otp = st.text_input("Enter OTP", placeholder="Last 4 digits of mobile")
                 
                 if st.button("✅ Verify & Login", use_container_width=True):
-                    if otp == mobile[-4:]:
-                        st.session_state.authenticated = True
-                        st.session_state.user_role = "customer"
-                        st.session_state.user_data = {"mobile": mobile, "role": "customer"}
-                        st.rerun()
+                    throttle = auth.credentials.throttle
+                    key, client = f"otp:{mobile}", client_address()
+                    retry_after = throttle.retry_after(key, client)
+                    if retry_after:
+                        _login_error(retry_after)
+                    elif otp == mobile[-4:] and auth.credentials.exists('customer', mobile):
+                        throttle.succeeded(key)
+                        _login({"mobile": mobile, "role": "customer"}, "customer")
                     else:
+                        throttle.failed(key, client)
                         st.error("Invalid OTP")
         
         st.markdown("---")
@@ -0,0 +1,89 @@
+"""Assistant latency with a fake streaming model: blocking vs streaming
+
+Reports time-to-first-token and total latency for one query, then the wall
+time for several concurrent sessions on the shared worker pool.
+
+    python benchmarks/bench_assistant_stream.py --chunks 20 --chunk-delay 0.05 --sessions 8
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_service import GeminiService, get_assistant_pool  # noqa: E402
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingModel:
+    """Produces `chunks` pieces, `delay` seconds apart, like a streamed completion"""
+
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+
+    def _stream(self):
+        for i in range(self.chunks):
+            time.sleep(self.delay)
+            yield _Chunk(f"token{i} ")
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        if stream:
+            return self._stream()
+        return _Chunk(''.join(chunk.text for chunk in self._stream()))
+
+
+def measure_stream(service, query):
+    start = time.perf_counter()
+    first = None
+    for _ in service.stream_customer_query(query):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chunks', type=int, default=20)
+    parser.add_argument('--chunk-delay', type=float, default=0.05)
+    parser.add_argument('--sessions', type=int, default=8)
+    args = parser.parse_args()
+
+    service = GeminiService(model=FakeStreamingModel(args.chunks, args.chunk_delay))
+    get_assistant_pool()
+
+    start = time.perf_counter()
+    service.answer_customer_query("How do I clean silver?")
+    blocking = time.perf_counter() - start
+    print(f"blocking:  ttft {blocking * 1000:7.1f} ms  total {blocking * 1000:7.1f} ms")
+
+    ttft, total = measure_stream(service, "How do I clean silver?")
+    print(f"streaming: ttft {ttft * 1000:7.1f} ms  total {total * 1000:7.1f} ms")
+
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        service.answer_customer_query(f"question {i}")
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    futures = [service.answer_customer_query_async(f"question {i}") for i in range(args.sessions)]
+    for future in futures:
+        future.result()
+    pooled = time.perf_counter() - start
+    print(f"{args.sessions} sessions: serialized {serial:.2f} s  pooled {pooled:.2f} s")
+
+    cancel = threading.Event()
+    stream = service.stream_customer_query("long answer", cancel_event=cancel)
+    next(stream)
+    stream.close()
+    print(f"cancelled on close: {cancel.is_set()}")
+
+
+if __name__ == '__main__':
+    main()
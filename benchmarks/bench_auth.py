@@ -0,0 +1,73 @@
+"""Login latency through the credential index
+
+Known, unknown and legacy-hash logins should all cost one KDF evaluation;
+throttled attempts should be rejected without hashing.
+
+    python benchmarks/bench_auth.py --customers 100000 --iterations 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from credentials import CredentialIndex, hash_password  # noqa: E402
+from data_store import DATA_DIR  # noqa: E402
+
+
+def scaled_customers(customers, password_hash):
+    base = pd.read_csv(os.path.join(DATA_DIR, 'customers.csv'))
+    scaled = base.sample(customers, replace=True, random_state=1).reset_index(drop=True)
+    scaled['id'] = np.arange(1, customers + 1)
+    scaled['mobile'] = 6000000000 + scaled['id']
+    scaled['username'] = 'CUST_' + scaled['id'].astype(str)
+    scaled['password_hash'] = password_hash
+    return scaled
+
+
+def per_call_ms(fn, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=100_000)
+    parser.add_argument('--iterations', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    customers = scaled_customers(args.customers, hash_password('secret', args.iterations))
+    customers.loc[0, 'password_hash'] = 'legacy'
+    start = time.perf_counter()
+    index = CredentialIndex(None, None, customers, data_dir=tempfile.mkdtemp(prefix='bench_auth_'),
+                            iterations=args.iterations)
+    print(f"index build ({args.customers} customers): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    cases = {
+        'known login': lambda i: index.authenticate('customer', f'CUST_{i + 2}', 'secret'),
+        'wrong password': lambda i: index.authenticate('customer', f'CUST_{i + 100}', 'nope', f'c{i}'),
+        'unknown login': lambda i: index.authenticate('customer', f'NOBODY_{i}', 'secret', f'u{i}'),
+        'legacy hash': lambda i: index.authenticate('customer', 'CUST_1', 'nope', f'l{i}'),
+    }
+    print(f"{'case':<18}{'median ms':>10}")
+    for name, fn in cases.items():
+        print(f"{name:<18}{per_call_ms(fn, args.repeat):>10.2f}")
+
+    for _ in range(index.throttle.limits['login']):
+        index.authenticate('customer', 'CUST_50000', 'nope')
+    throttled = per_call_ms(lambda i: index.authenticate('customer', 'CUST_50000', 'nope'), args.repeat)
+    print(f"{'throttled':<18}{throttled:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
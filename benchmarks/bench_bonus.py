@@ -0,0 +1,86 @@
+"""Staff bonuses for a month: cold compute, cached reads, a recorded sale and a marked day
+
+The target is a few milliseconds per bonus table for thousands of staff once
+the attendance weights are built.
+
+    python benchmarks/bench_bonus.py --staff 5000 --days 31
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attendance_index import AttendanceIndex  # noqa: E402
+from bench_payroll import build_tables  # noqa: E402
+from bonus_system import BonusManagementSystem  # noqa: E402
+
+
+def build_sales(days, seed=11):
+    rng = np.random.default_rng(seed)
+    parts = rng.integers(20_000, 400_000, (days, 4))
+    return pd.DataFrame({
+        'date': pd.date_range('2025-12-01', periods=days),
+        'daily_sales': parts.sum(axis=1),
+        'gold_sales': parts[:, 0],
+        'silver_sales': parts[:, 1],
+        'diamond_sales': parts[:, 2],
+        'other_sales': parts[:, 3],
+        'staff_count': np.full(days, 3, dtype='int32'),
+    })
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--staff', type=int, default=5_000)
+    parser.add_argument('--days', type=int, default=31)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    staff_df, attendance_df = build_tables(args.staff, args.days)
+    sales_df = build_sales(args.days)
+    index = AttendanceIndex(attendance_df)
+    bonus = BonusManagementSystem(sales_df, staff_df, attendance_index=index)
+    start_day, end_day = sales_df['date'].min(), sales_df['date'].max()
+    print(f"staff / attendance rows:     {len(staff_df):,} / {len(attendance_df):,}")
+
+    start = time.perf_counter()
+    bonus._sync_attendance()
+    print(f"attendance weights:          {(time.perf_counter() - start) * 1000:,.1f} ms")
+
+    def cold():
+        bonus._period_cache = {}
+        bonus.compute_bonuses(start_day, end_day)
+
+    print(f"compute_bonuses, cold:       {best_ms(cold, args.repeat):,.2f} ms")
+    print(f"compute_bonuses, cached:     "
+          f"{best_ms(lambda: bonus.compute_bonuses(start_day, end_day), args.repeat):,.2f} ms")
+
+    day = end_day
+    print(f"record_sales (same day):     "
+          f"{best_ms(lambda: bonus.record_sales(day, 500_000, 500_000), args.repeat):,.2f} ms")
+
+    staff_ids = staff_df['staff_id'].to_numpy()
+
+    def mark_and_compute():
+        index.record(int(np.random.choice(staff_ids)), day, 'present')
+        bonus.compute_bonuses(start_day, end_day)
+
+    print(f"mark attendance + recompute: {best_ms(mark_and_compute, args.repeat):,.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Payload size and build time of raw vs downsampled, cached sales charts
+
+    python benchmarks/bench_charts.py --years 5 --points 500000 --reruns 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import FigureCache, RANGES, scatter_figure, time_series_figure, window  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def payload_kb(figure):
+    return len(figure.to_json().encode('utf-8')) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--points', type=int, default=500_000)
+    parser.add_argument('--reruns', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    days = pd.date_range(end='2025-12-31', periods=args.years * 365)
+    daily = pd.DataFrame({'date': days, 'daily_sales': rng.integers(80_000, 400_000, len(days))})
+    ticks = pd.DataFrame({
+        'date': pd.Timestamp('2025-01-01') + pd.to_timedelta(np.sort(rng.uniform(0, 120, args.points)), unit='D'),
+        'amount': rng.gamma(2.0, 20_000, args.points),
+    })
+
+    print(f"{'chart':<28}{'points':>10}{'payload KB':>12}{'build ms':>10}")
+    for label, days_back in RANGES.items():
+        frame = window(daily, 'date', days_back)
+        raw, raw_ms = timed(lambda: px.line(frame, x='date', y='daily_sales'))
+        fig, ms = timed(lambda: time_series_figure(frame, 'date', 'daily_sales', label))
+        print(f"{'raw ' + label:<28}{len(frame):>10,}{payload_kb(raw):>12,.1f}{raw_ms:>10,.1f}")
+        print(f"{'downsampled ' + label:<28}{len(fig.data[0].x):>10,}{payload_kb(fig):>12,.1f}{ms:>10,.1f}")
+
+    raw, raw_ms = timed(lambda: px.line(ticks, x='date', y='amount'))
+    fig, ms = timed(lambda: time_series_figure(ticks, 'date', 'amount', 'Transactions'))
+    print(f"{'raw transactions':<28}{len(ticks):>10,}{payload_kb(raw):>12,.1f}{raw_ms:>10,.1f}")
+    print(f"{'downsampled transactions':<28}{len(fig.data[0].x):>10,}{payload_kb(fig):>12,.1f}{ms:>10,.1f}")
+
+    sample = ticks.head(50_000).assign(hour=ticks['date'].dt.hour)
+    svg, svg_ms = timed(lambda: px.scatter(sample, x='hour', y='amount', render_mode='svg'))
+    gl, gl_ms = timed(lambda: scatter_figure(sample, 'hour', 'amount', 'Amount by hour'))
+    print(f"scatter trace: svg {type(svg.data[0]).__name__} {svg_ms:,.1f} ms, "
+          f"webgl {type(gl.data[0]).__name__} {gl_ms:,.1f} ms")
+
+    cache = FigureCache()
+    frame = window(daily, 'date', None)
+    rebuild = [timed(lambda: time_series_figure(frame, 'date', 'daily_sales', 'All'))[1] for _ in range(args.reruns)]
+    cached = [
+        timed(lambda: cache.get_or_build('trend', 1, lambda: time_series_figure(frame, 'date', 'daily_sales', 'All')))[1]
+        for _ in range(args.reruns)
+    ]
+    print(f"rerun rebuild (median):  {sorted(rebuild)[len(rebuild) // 2]:,.2f} ms")
+    print(f"rerun cached (median):   {sorted(cached)[len(cached) // 2]:,.3f} ms")
+    print(f"cache stats:             {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Month-end chit dues run over hundreds of chits and thousands of members
+
+    python benchmarks/bench_chits.py --chits 500 --members-per-chit 40 --runs 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chit_ledger import ChitLedger  # noqa: E402
+
+
+def build_tables(chits, members_per_chit, seed=5):
+    rng = np.random.default_rng(seed)
+    starts = pd.to_datetime('2024-01-01') + pd.to_timedelta(rng.integers(0, 24, chits) * 30, unit='D')
+    starts = starts.to_period('M').to_timestamp()
+    amount = rng.choice([500_000, 1_000_000, 2_000_000, 3_000_000], chits)
+    months = rng.choice([20, 24, 30], chits)
+    chits_df = pd.DataFrame({
+        'id': np.arange(1, chits + 1),
+        'name': [f"Chit {i}" for i in range(1, chits + 1)],
+        'amount': amount,
+        'monthly_payment': amount // months,
+        'members': members_per_chit,
+        'start_date': starts,
+        'end_date': starts + pd.to_timedelta(months * 30, unit='D'),
+        'draw_schedule': rng.choice(['Monthly', 'Bi-monthly'], chits),
+    })
+
+    total = chits * members_per_chit
+    chit_ids = np.repeat(chits_df['id'].to_numpy(), members_per_chit)
+    member_amount = np.repeat(amount, members_per_chit)
+    paid = (member_amount * rng.uniform(0, 0.9, total)).astype('int64')
+    members_df = pd.DataFrame({
+        'chit_id': chit_ids,
+        'customer_id': np.tile(np.arange(1, members_per_chit + 1), chits),
+        'joined_date': np.repeat(starts, members_per_chit),
+        'amount_paid': paid,
+        'amount_remaining': member_amount - paid,
+        'draw_number': rng.integers(1, 6, total),
+        'status': rng.choice(['active', 'inactive'], total, p=[0.9, 0.1]),
+    })
+    return chits_df, members_df
+
+
+def median_ms(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chits', type=int, default=500)
+    parser.add_argument('--members-per-chit', type=int, default=40)
+    parser.add_argument('--payments', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    chits_df, members_df = build_tables(args.chits, args.members_per_chit)
+    start = time.perf_counter()
+    ledger = ChitLedger(chits_df, members_df)
+    build = (time.perf_counter() - start) * 1000
+    as_of = '2025-12-31'
+
+    rng = np.random.default_rng(9)
+    picks = rng.integers(0, len(members_df), args.payments)
+    payments = members_df.iloc[picks][['chit_id', 'customer_id']].assign(amount=5_000)
+
+    print(f"members:                 {len(ledger):,} in {args.chits:,} chits")
+    print(f"ledger build:            {build:,.1f} ms")
+    print(f"dues (median):           {median_ms(lambda: ledger.dues(as_of), args.runs):,.1f} ms")
+    print(f"chit summary (median):   {median_ms(lambda: ledger.chit_summary(as_of), args.runs):,.1f} ms")
+    print(f"projection 12m (median): "
+          f"{median_ms(lambda: ledger.projected_collections(as_of, 12), args.runs):,.1f} ms")
+    start = time.perf_counter()
+    for row in payments.head(1000).itertuples(index=False):
+        ledger.record_payment(row.chit_id, row.customer_id, row.amount)
+    single = (time.perf_counter() - start) / 1000 * 1e6
+    print(f"record_payment:          {single:,.1f} us each")
+    print(f"apply_payments {len(payments):,}:    {median_ms(lambda: ledger.apply_payments(payments), 1):,.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Rerun latency of table loading with and without the shared DataStore
+
+Generates attendance.csv with millions of rows in a temp directory and times
+what a Streamlit rerun pays to get the tables it needs.
+
+    python benchmarks/bench_data_store.py --rows 2000000 --reruns 5
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import TABLE_SCHEMAS, DataStore  # noqa: E402
+from synthetic_data import generate  # noqa: E402
+
+RERUN_TABLES = ['users', 'customers', 'staff', 'attendance', 'sales']
+
+
+def build_data_dir(rows):
+    """Synthetic tables with a year of attendance for about `rows` rows"""
+    tmp = tempfile.mkdtemp(prefix='bench_store_')
+    generate(tmp, staff=-(-rows // 365), days=365)
+    return tmp
+
+
+def rerun_uncached(data_dir):
+    """What app.py pays today: parse every table on each rerun"""
+    return {t: pd.read_csv(os.path.join(data_dir, TABLE_SCHEMAS[t]['file'])) for t in RERUN_TABLES}
+
+
+def rerun_cached(store):
+    return {t: store.get(t) for t in RERUN_TABLES}
+
+
+def time_runs(fn, reruns):
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--reruns', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = build_data_dir(args.rows)
+    try:
+        before = time_runs(lambda: rerun_uncached(data_dir), args.reruns)
+
+        store = DataStore(data_dir)
+        start = time.perf_counter()
+        store.get_all()
+        first_load = time.perf_counter() - start
+        after = time_runs(lambda: rerun_cached(store), args.reruns)
+
+        attendance = store.get('attendance')
+        raw = pd.read_csv(os.path.join(data_dir, 'attendance.csv'))
+
+        print(f"attendance rows:         {len(attendance):,}")
+        print(f"attendance memory raw:   {raw.memory_usage(deep=True).sum() / 1e6:,.1f} MB")
+        print(f"attendance memory typed: {attendance.memory_usage(deep=True).sum() / 1e6:,.1f} MB")
+        print(f"rerun before (median):   {sorted(before)[len(before) // 2] * 1000:,.1f} ms")
+        print(f"typed cold load:         {first_load * 1000:,.1f} ms")
+        print(f"rerun after (median):    {sorted(after)[len(after) // 2] * 1000:,.3f} ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
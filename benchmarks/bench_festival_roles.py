@@ -0,0 +1,83 @@
+"""Festival role assignment: attendance scoring and the slot solvers on synthetic staff
+
+The plan has --roles festival roles spread over the floors, each fed by one
+or two current roles. The Hungarian solver is only timed when scipy is
+installed.
+
+    python benchmarks/bench_festival_roles.py --staff 500 --roles 40 --days 730
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from festival_roles import _hungarian, assign_roles, attendance_reliability  # noqa: E402
+from synthetic_data import FLOORS, ROLES, generate  # noqa: E402
+
+
+def synthetic_plan(roles, seed=3):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'role': f"Festival Role {k + 1}",
+            'floor': FLOORS[0][rng.integers(len(FLOORS[0]))],
+            'from_roles': list(rng.choice(ROLES[0], rng.integers(1, 3), replace=False)),
+            'slots': int(rng.integers(1, 6)),
+        }
+        for k in range(roles)
+    ]
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--staff', type=int, default=500)
+    parser.add_argument('--roles', type=int, default=40)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_festival_')
+    try:
+        generate(data_dir, customers=1_000, transactions=10_000, staff=args.staff, days=args.days)
+        store = DataStore(data_dir)
+        staff, attendance = store.get('staff'), store.get('attendance')
+        plan = synthetic_plan(args.roles)
+
+        scoring, scores = best_ms(lambda: attendance_reliability(attendance, staff['staff_id']), args.repeat)
+        print(f"staff / attendance rows:  {len(staff):,} / {len(attendance):,}")
+        print(f"roles / slots:            {len(plan)} / {sum(role['slots'] for role in plan)}")
+        print(f"attendance scores:        {scoring:,.1f} ms")
+
+        methods = ['greedy'] + (['hungarian'] if _hungarian() is not None else [])
+        for method in methods:
+            elapsed, (assignments, open_slots) = best_ms(
+                lambda: assign_roles(staff, scores, plan, method), args.repeat
+            )
+            moved = (assignments['floor'] != assignments['festival_floor']).sum()
+            print(f"{method + ':':<26}{elapsed:,.1f} ms, {len(assignments)} assigned, "
+                  f"mean score {assignments['attendance_score'].mean():.1f}, {moved} change floor, "
+                  f"{sum(open_slots.values())} open")
+        if len(methods) == 1:
+            print("hungarian:                skipped, scipy is not installed")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
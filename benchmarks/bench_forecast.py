@@ -0,0 +1,79 @@
+"""Rolling-origin backtest of the sales forecaster on synthetic history
+
+Fits on the history up to each origin, forecasts the next `horizon` days
+and scores the daily sales forecast against a seasonal naive baseline (the
+same weekday one week earlier). Also times a full fit against folding one
+new day into an existing fit.
+
+    python benchmarks/bench_forecast.py --days 730 --transactions 1000000 --horizon 30
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from forecast import SalesForecaster  # noqa: E402
+from synthetic_data import generate  # noqa: E402
+
+
+def mape(actual, predicted):
+    return float(np.mean(np.abs(actual - predicted) / np.maximum(np.abs(actual), 1)) * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--transactions', type=int, default=1_000_000)
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--origins', type=int, default=8)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_forecast_')
+    try:
+        generate(data_dir, customers=20_000, staff=30, transactions=args.transactions, days=args.days)
+        sales = DataStore(data_dir).get('sales').sort_values('date').reset_index(drop=True)
+        actual = sales['daily_sales'].to_numpy(dtype='float64')
+
+        first_origin = max(len(sales) - args.origins * args.horizon, 60)
+        errors, baseline, coverage, fits = [], [], [], []
+        for origin in range(first_origin, len(sales) - args.horizon + 1, args.horizon):
+            start = time.perf_counter()
+            forecaster = SalesForecaster()
+            forecaster.update(sales.iloc[:origin])
+            forecast = forecaster.forecast(args.horizon)
+            fits.append(time.perf_counter() - start)
+
+            truth = actual[origin:origin + args.horizon]
+            errors.append(mape(truth, forecast['daily_sales'].to_numpy()))
+            naive = actual[origin - 7:origin][np.arange(args.horizon) % 7]
+            baseline.append(mape(truth, naive))
+            inside = (truth >= forecast['daily_sales_lower']) & (truth <= forecast['daily_sales_upper'])
+            coverage.append(float(inside.mean()) * 100)
+
+        forecaster = SalesForecaster()
+        forecaster.update(sales.iloc[:-1])
+        forecaster.forecast(args.horizon)
+        start = time.perf_counter()
+        forecaster.update(sales.iloc[-1:])
+        forecaster.forecast(args.horizon)
+        incremental = time.perf_counter() - start
+
+        print(f"history:                 {len(sales):,} days, {len(errors)} origins, {args.horizon}-day horizon")
+        print(f"forecast MAPE:           {np.mean(errors):.1f}%")
+        print(f"seasonal naive MAPE:     {np.mean(baseline):.1f}%")
+        print(f"95% interval coverage:   {np.mean(coverage):.1f}%")
+        print(f"full fit + forecast:     {np.median(fits) * 1000:,.2f} ms (median)")
+        print(f"fold one day + forecast: {incremental * 1000:,.2f} ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
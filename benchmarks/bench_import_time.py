@@ -0,0 +1,74 @@
+"""Cold import time of the app's modules, from ``python -X importtime``
+
+Also a regression guard: exits non-zero if a startup module pulls in one of
+the heavy optional packages (they must stay behind the services facades) or
+takes longer than --budget-ms to import.
+
+    python benchmarks/bench_import_time.py --runs 3 --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on every script run, e.g. for the login page
+STARTUP_MODULES = ['app', 'auth_system', 'customer_dashboard', 'staff_management', 'bonus_system']
+# Loaded on first use through services.py
+LAZY_MODULES = ['gemini_service', 'whatsapp_service', 'campaign_dispatcher', 'charts']
+HEAVY_PACKAGES = ['google.generativeai', 'plotly.express', 'requests', 'scipy']
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$')
+
+
+def import_profile(module):
+    """{package: cumulative microseconds} for a cold `import module`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            profile.setdefault(match.group(4), int(match.group(2)))
+    return profile
+
+
+def measure(module, runs):
+    timings, loaded = [], set()
+    for _ in range(runs):
+        profile = import_profile(module)
+        timings.append(profile.get(module, 0) / 1000)
+        loaded.update(name for name in HEAVY_PACKAGES if name in profile)
+    return sorted(timings)[len(timings) // 2], sorted(loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--budget-ms', type=float, default=1500)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<22}{'median ms':>11}  heavy packages loaded")
+    for module in STARTUP_MODULES + LAZY_MODULES:
+        ms, loaded = measure(module, args.runs)
+        print(f"{module:<22}{ms:>11,.1f}  {', '.join(loaded) or '-'}")
+        if module in STARTUP_MODULES:
+            if loaded:
+                failures.append(f"{module} imports {', '.join(loaded)} at startup")
+            if ms > args.budget_ms:
+                failures.append(f"{module} took {ms:,.0f} ms (budget {args.budget_ms:,.0f} ms)")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Login/registration lookup latency: pandas masks vs the SQLite repository
+
+    python benchmarks/bench_lookup.py --sizes 100 10000 1000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from sqlite_repository import SQLiteRepository  # noqa: E402
+from synthetic_data import CUSTOMER_MOBILE_BASE, generate  # noqa: E402
+
+
+def build_data_dir(customers):
+    tmp = tempfile.mkdtemp(prefix='bench_lookup_')
+    generate(tmp, customers=customers, staff=20, transactions=customers, days=90)
+    return tmp
+
+
+def per_call(fn, keys):
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'customers':>10} {'mask us':>10} {'sqlite us':>10}")
+    for size in args.sizes:
+        data_dir = build_data_dir(size)
+        try:
+            store = DataStore(data_dir)
+            customers = store.get('customers')
+            repository = SQLiteRepository(os.path.join(data_dir, 'shop.db'))
+            repository.import_tables(store)
+
+            rng = np.random.default_rng(0)
+            keys = [str(CUSTOMER_MOBILE_BASE + int(i)) for i in rng.integers(1, size + 1, args.lookups)]
+            mask = per_call(lambda m: m in customers['mobile'].values, keys)
+            indexed = per_call(repository.customer_exists, keys)
+            print(f"{size:>10,} {mask:>10,.1f} {indexed:>10,.1f}")
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
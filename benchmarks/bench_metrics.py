@@ -0,0 +1,108 @@
+"""Overhead of the metrics helpers, off and on, and a recorded staff workload
+
+Recording off should cost about one extra Python call per instrumented
+function; recording on adds a histogram update under a lock.
+
+    python benchmarks/bench_metrics.py --calls 1000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+from data_store import DataStore  # noqa: E402
+from staff_management import StaffManagementSystem  # noqa: E402
+from synthetic_data import generate  # noqa: E402
+
+
+def work(x):
+    return x + 1
+
+
+@metrics.timed('bench.work')
+def timed_work(x):
+    return x + 1
+
+
+def timer_work(x):
+    with metrics.timer('bench.block'):
+        return x + 1
+
+
+def ns_per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def staff_workload(store, months):
+    staff_mgmt = StaffManagementSystem(store.get('staff'), store.get('attendance'))
+    staff_ids = staff_mgmt.staff_df['staff_id'].tolist()
+    for year, month in months:
+        staff_mgmt.run_payroll(year, month)
+        for staff_id in staff_ids[:50]:
+            staff_mgmt.calculate_salary(staff_id, year, month)
+            staff_mgmt.get_attendance_summary(staff_id, f"{year}-{month:02d}")
+    staff_mgmt.suggest_festival_roles(month=10)
+    staff_mgmt.suggest_festival_roles(month=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=1_000_000)
+    parser.add_argument('--staff', type=int, default=200)
+    args = parser.parse_args()
+
+    registry = metrics.REGISTRY
+    bare = ns_per_call(work, args.calls)
+    print(f"{'case':<28}{'ns/call':>10}{'overhead':>10}")
+    print(f"{'bare function':<28}{bare:>10.0f}")
+    for enabled in (False, True):
+        registry.enabled = enabled
+        state = 'on' if enabled else 'off'
+        for name, fn in (('@timed', timed_work), ('with timer()', timer_work)):
+            elapsed = ns_per_call(fn, args.calls)
+            print(f"{f'{name}, recording {state}':<28}{elapsed:>10.0f}{elapsed - bare:>10.0f}")
+        elapsed = ns_per_call(lambda i: metrics.cache_hit('bench.cache'), args.calls)
+        print(f"{f'cache_hit(), recording {state}':<28}{elapsed:>10.0f}")
+
+    data_dir = tempfile.mkdtemp(prefix='bench_metrics_')
+    try:
+        generate(data_dir, customers=1_000, transactions=10_000, staff=args.staff, days=365)
+        months = [(2025, m) for m in range(1, 13)]
+        for enabled in (False, True):
+            registry.enabled = enabled
+            registry.reset()
+            store = DataStore(data_dir)
+            start = time.perf_counter()
+            staff_workload(store, months)
+            print(f"staff workload, recording {'on' if enabled else 'off'}: "
+                  f"{(time.perf_counter() - start) * 1000:,.1f} ms")
+
+        snapshot = registry.snapshot()
+        print(f"\n{'call':<34}{'calls':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, stats in sorted(snapshot['timers'].items()):
+            if not name.startswith('bench.'):
+                print(f"{name:<34}{stats['calls']:>8}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+                      f"{stats['p99_ms']:>10.3f}")
+        for name, stats in sorted(snapshot['caches'].items()):
+            print(f"{name:<34}hit rate {stats['hit_rate']:.1%} ({stats['hits']} / {stats['hits'] + stats['misses']})")
+
+        prom = os.path.join(data_dir, 'shop.prom')
+        start = time.perf_counter()
+        registry.write_prometheus(prom)
+        rows = registry.append_jsonl(os.path.join(data_dir, 'shop.jsonl'))
+        print(f"\nexport: {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"({os.path.getsize(prom):,} byte text file, {rows} JSON lines)")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Offer eligibility: interval index vs per-query masks over thousands of campaigns
+
+    python benchmarks/bench_offers.py --offers 5000 --basket 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from offer_index import OfferIndex  # noqa: E402
+from synthetic_data import CATEGORIES, generate  # noqa: E402
+
+TIERS = ['Standard', 'Silver', 'Gold', 'Platinum']
+
+
+def per_call_us(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(*arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def mask_lookup(offers, tier, day):
+    target = offers['applicable_to'].astype(str).str.lower()
+    open_today = (offers['valid_from'] <= day) & (offers['valid_to'] >= day)
+    return offers[target.isin(['all', tier.lower()]) & open_today]
+
+
+def mask_basket(offers, tier, basket, day):
+    """Best discount per item, one mask per item"""
+    open_today = offers[(offers['valid_from'] <= day) & (offers['valid_to'] >= day)]
+    target = open_today['applicable_to'].astype(str).str.lower()
+    return [
+        open_today.loc[target.isin(['all', tier.lower(), category]), 'discount_percent'].max()
+        for category in basket['category']
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--offers', type=int, default=5_000)
+    parser.add_argument('--basket', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_offers_')
+    try:
+        generate(data_dir, customers=100, staff=5, transactions=100, days=730, offers=args.offers)
+        offers = DataStore(data_dir).get('offers')
+
+        start = time.perf_counter()
+        index = OfferIndex(offers)
+        build = (time.perf_counter() - start) * 1000
+
+        rng = np.random.default_rng(4)
+        days = offers['valid_from'].min() + pd.to_timedelta(rng.integers(0, 730, args.queries), unit='D')
+        queries = list(zip(rng.choice(TIERS, args.queries), days))
+        basket = pd.DataFrame({
+            'category': rng.choice(CATEGORIES, args.basket),
+            'amount': rng.integers(1_000, 200_000, args.basket),
+        })
+        baskets = [(tier, basket, day) for tier, day in queries[:50]]
+
+        open_counts = [len(index.active_positions(tier, day)) for tier, day in queries]
+        print(f"offers:                  {len(offers):,} ({np.mean(open_counts):,.0f} open per query on average)")
+        print(f"index build:             {build:,.1f} ms")
+        print(f"active offers, mask:     {per_call_us(lambda t, d: mask_lookup(offers, t, d), queries):,.1f} us")
+        print(f"active offers, index:    {per_call_us(index.active_positions, queries):,.1f} us")
+        print(f"basket of {args.basket}, masks:    "
+              f"{per_call_us(lambda t, b, d: mask_basket(offers, t, b, d), baskets):,.1f} us")
+        print(f"basket of {args.basket}, index:    {per_call_us(index.best_discounts, baskets):,.1f} us")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Month-end payroll: per-staff calculate_salary loop vs run_payroll
+
+    python benchmarks/bench_payroll.py --staff 10000 --days 31
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from staff_management import StaffManagementSystem  # noqa: E402
+
+
+def build_tables(staff_count, days, seed=7):
+    rng = np.random.default_rng(seed)
+    staff_df = pd.DataFrame({
+        'staff_id': np.arange(1, staff_count + 1, dtype='int32'),
+        'name': [f"Staff {i}" for i in range(1, staff_count + 1)],
+        'floor': pd.Categorical(rng.choice(['Main Floor', 'First Floor', 'Second Floor'], staff_count)),
+        'role': pd.Categorical(rng.choice(['Sales', 'Cashier', 'Customer Service', 'Delivery'], staff_count)),
+        'salary_per_day': rng.choice([800.0, 1000.0, 1200.0], staff_count),
+        'status': pd.Categorical(['active'] * staff_count),
+    })
+    dates = pd.date_range('2025-12-01', periods=days)
+    attendance_df = pd.DataFrame({
+        'staff_id': np.repeat(staff_df['staff_id'].to_numpy(), days),
+        'date': np.tile(dates.to_numpy(), staff_count),
+        'status': pd.Categorical(rng.choice(
+            ['present', 'absent', 'leave', 'half_day'], staff_count * days, p=[0.85, 0.05, 0.05, 0.05]
+        )),
+        'remarks': pd.array([pd.NA] * (staff_count * days), dtype='string'),
+    })
+    return staff_df, attendance_df
+
+
+def masked_salary(staff_df, attendance_df, staff_id):
+    """The original per-call implementation: boolean masks over full tables"""
+    staff = staff_df[staff_df['staff_id'] == staff_id]
+    filtered = attendance_df[attendance_df['staff_id'] == staff_id]
+    present = len(filtered[filtered['status'] == 'present'])
+    half = len(filtered[filtered['status'] == 'half_day'])
+    base = (present + half * 0.5) * staff.iloc[0]['salary_per_day']
+    return base - base * 0.08 + base * 0.05
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--staff', type=int, default=10_000)
+    parser.add_argument('--days', type=int, default=31)
+    parser.add_argument('--sample', type=int, default=200, help="Staff timed for the masked loop")
+    args = parser.parse_args()
+
+    staff_df, attendance_df = build_tables(args.staff, args.days)
+    print(f"attendance rows: {len(attendance_df):,}")
+
+    sample = staff_df['staff_id'].head(args.sample).tolist()
+    start = time.perf_counter()
+    for staff_id in sample:
+        masked_salary(staff_df, attendance_df, staff_id)
+    masked = (time.perf_counter() - start) / len(sample) * args.staff
+    print(f"masked loop (extrapolated):  {masked:,.2f} s")
+
+    start = time.perf_counter()
+    mgmt = StaffManagementSystem(staff_df, attendance_df)
+    build = time.perf_counter() - start
+    print(f"index build:                 {build * 1000:,.1f} ms")
+
+    start = time.perf_counter()
+    payroll = mgmt.run_payroll(2025, 12)
+    batch = time.perf_counter() - start
+    print(f"run_payroll:                 {batch * 1000:,.1f} ms ({len(payroll):,} payslips)")
+
+    start = time.perf_counter()
+    for staff_id in sample:
+        mgmt.calculate_salary(staff_id, 2025, 12)
+    per_call = (time.perf_counter() - start) / len(sample)
+    print(f"calculate_salary from batch: {per_call * 1e6:,.1f} us/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Incremental rollup refresh vs full recompute on a year of transactions
+
+Generates a year of high-volume transactions and daily register sales in a
+temp directory with synthetic_data, appends batches through the write log and times what the
+rollup engine pays to catch up, then checks it against a full recompute.
+
+    python benchmarks/bench_rollup.py --transactions 2000000 --batches 5 --batch-size 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from rollup import RollupEngine, daily_rollup, monthly_rollup  # noqa: E402
+from synthetic_data import generate  # noqa: E402
+from write_log import WriteLog  # noqa: E402
+
+CATEGORIES = ['gold', 'silver', 'diamond', 'other']
+
+
+def build_data_dir(transactions, seed=11):
+    """A synthetic year of 50,000 customers and `transactions` transactions"""
+    tmp = tempfile.mkdtemp(prefix='bench_rollup_')
+    generate(tmp, customers=50_000, staff=50, transactions=transactions, days=365, seed=seed)
+    return tmp
+
+
+def batch_rows(rng, start_id, size, day):
+    return [{
+        'id': start_id + i,
+        'customer_id': int(rng.integers(1, 50_001)),
+        'date': day,
+        'amount': int(rng.integers(1_000, 250_000)),
+        'category': str(rng.choice(CATEGORIES)),
+        'type': 'sale',
+        'status': 'completed',
+        'invoice_id': f"INVB{start_id + i:09d}",
+    } for i in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transactions', type=int, default=2_000_000)
+    parser.add_argument('--batches', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    data_dir = build_data_dir(args.transactions)
+    try:
+        store = DataStore(data_dir)
+        log = WriteLog(store)
+        engine = RollupEngine(store)
+        store.get('sales')
+        store.get('transactions')
+
+        start = time.perf_counter()
+        engine.refresh()
+        first_build = time.perf_counter() - start
+
+        rng = np.random.default_rng(3)
+        next_id = args.transactions + 1
+        incremental, full = [], []
+        for i in range(args.batches):
+            day = f"2025-{(i % 12) + 1:02d}-15"
+            log.append('transactions', batch_rows(rng, next_id, args.batch_size, day))
+            next_id += args.batch_size
+            sales, transactions = store.get('sales'), store.get('transactions')
+
+            start = time.perf_counter()
+            months = engine.refresh()
+            incremental.append(time.perf_counter() - start)
+            assert len(months) == 1
+
+            start = time.perf_counter()
+            daily_rollup(sales, transactions)
+            monthly_rollup(sales, transactions)
+            full.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        mismatched = engine.check_consistency()
+        check = time.perf_counter() - start
+
+        print(f"transactions:              {len(store.get('transactions')):,}")
+        print(f"initial rollup:            {first_build * 1000:,.1f} ms")
+        print(f"full recompute (median):   {sorted(full)[len(full) // 2] * 1000:,.1f} ms")
+        print(f"incremental (median):      {sorted(incremental)[len(incremental) // 2] * 1000:,.1f} ms")
+        print(f"full rebuilds:             {engine.full_rebuilds}")
+        print(f"consistency check:         {check * 1000:,.1f} ms, "
+              f"{'OK' if not mismatched else 'MISMATCH ' + ', '.join(mismatched)}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""RFM scoring: full build vs incremental batches on synthetic data
+
+    python benchmarks/bench_segmentation.py --customers 1000000 --transactions 10000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import DataStore  # noqa: E402
+from segmentation import RFMEngine  # noqa: E402
+from synthetic_data import generate  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', type=int, default=200_000)
+    parser.add_argument('--transactions', type=int, default=2_000_000)
+    parser.add_argument('--batch-size', type=int, default=1_000)
+    parser.add_argument('--batches', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_rfm_')
+    try:
+        generate(data_dir, customers=args.customers, transactions=args.transactions, staff=20, days=365)
+        store = DataStore(data_dir)
+        customers, transactions = store.get('customers'), store.get('transactions')
+        split = len(transactions) - args.batch_size * args.batches
+        history, batches = transactions.iloc[:split], transactions.iloc[split:]
+
+        start = time.perf_counter()
+        engine = RFMEngine(customers, history)
+        build = time.perf_counter() - start
+
+        incremental = []
+        for i in range(args.batches):
+            batch = batches.iloc[i * args.batch_size:(i + 1) * args.batch_size]
+            start = time.perf_counter()
+            engine.add_transactions(batch)
+            incremental.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        engine.rebin()
+        rebin = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = RFMEngine(customers, transactions, as_of=engine.as_of)
+        rebuild = time.perf_counter() - start
+        same = (full.tier == engine.tier).all()
+
+        print(f"customers / transactions: {len(customers):,} / {len(transactions):,}")
+        print(f"full build:               {build * 1000:,.1f} ms")
+        print(f"batch of {args.batch_size:,} (median):   {sorted(incremental)[len(incremental) // 2] * 1000:,.2f} ms")
+        print(f"rebin all customers:      {rebin * 1000:,.1f} ms")
+        print(f"rebuild from history:     {rebuild * 1000:,.1f} ms")
+        print(f"tiers match rebuild:      {'OK' if same else 'MISMATCH'}")
+        print(f"tier changes:             {len(engine.tier_changes()):,}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
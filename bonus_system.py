@@ -1,23 +1,192 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
+
+from attendance_index import AttendanceIndex
+from data_store import drop_superseded
+from forecast import load_sales_forecaster, render_sales_forecast
+from metrics import timed
+from rollup import get_rollup_engine
+from services import charts
+
+# Sales below each threshold earn the matching rate, anything above earns the last
+BONUS_THRESHOLDS = [100000, 250000]
+BONUS_RATES = [0.05, 0.08, 0.10]
+BONUS_ELIGIBLE_MIN = 5000
+
+# Share of a day's sales credited per attendance status
+ATTENDANCE_WEIGHTS = {'present': 1.0, 'half_day': 0.5}
+
+
+def bonus_for_sales(sales):
+    """Vectorized slab bonus, returns (bonus, rate) arrays"""
+    sales = np.asarray(sales, dtype='float64')
+    rates = np.select(
+        [sales < threshold for threshold in BONUS_THRESHOLDS],
+        BONUS_RATES[:-1],
+        default=BONUS_RATES[-1]
+    )
+    return sales * rates, rates
+
+
+def _day_numbers(dates):
+    """Days since the epoch for a date column"""
+    return pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[D]').astype('int64')
+
 
 class BonusManagementSystem:
-    def __init__(self, sales_df, staff_df):
-        self.sales_df = sales_df
+    def __init__(self, sales_df, staff_df, attendance_df=None, write_log=None, attendance_index=None):
+        # A day saved twice is logged twice until compaction; the last save wins
+        self.sales_df = drop_superseded(sales_df, 'sales')
         self.staff_df = staff_df
+        self.attendance_df = attendance_df
+        self.write_log = write_log
+        # Shared with StaffManagementSystem so marked days reach the weights
+        if attendance_index is None and attendance_df is not None:
+            attendance_index = AttendanceIndex(attendance_df)
+        self.attendance_index = attendance_index
+        self._staff_ids = staff_df['staff_id'].to_numpy()
+        self._active = (staff_df['status'].astype(str) == 'active').to_numpy()
+        self._attendance_weights = None
+        self._weights_version = None
+        self._period_cache = {}
+    
+    def _build_attendance_weights(self, day_statuses):
+        """Each worked staff-day's share of that day's sales, sorted by day
+
+        Built from staff_id, date and status columns as (staff position, day
+        number, share) arrays, so attributing a period is a slice and a
+        bincount.
+        """
+        if day_statuses is None or day_statuses.empty:
+            return None
+        weights = day_statuses['status'].astype(str).map(ATTENDANCE_WEIGHTS).fillna(0.0).to_numpy()
+        worked = weights > 0
+        days = _day_numbers(day_statuses['date'])[worked]
+        weights = weights[worked]
+        order = np.argsort(days, kind='stable')
+        days, weights = days[order], weights[order]
+        first = days[0] if len(days) else 0
+        day_total = np.bincount(days - first, weights)
+        return {
+            'position': pd.Index(self._staff_ids).get_indexer(day_statuses['staff_id'].to_numpy()[worked][order]),
+            'day': days,
+            'share': weights / day_total[days - first],
+        }
+    
+    def _sync_attendance(self):
+        """Rebuild the weights, and drop cached periods, once attendance was marked"""
+        index = self.attendance_index
+        if index is None or self._weights_version == index.version:
+            return
+        self._attendance_weights = self._build_attendance_weights(index.day_statuses())
+        self._weights_version = index.version
+        self._period_cache = {}
+    
+    def _default_period(self):
+        """Calendar month of the latest recorded sales day"""
+        if self.sales_df.empty:
+            today = pd.Timestamp.today().normalize()
+            return today.replace(day=1), today
+        latest = pd.to_datetime(self.sales_df['date']).max()
+        return latest.replace(day=1), latest
+    
+    def _attribute(self, sales):
+        """Split each day's sales across the staff who worked it
+
+        Days nobody is marked as working (or no attendance at all) are shared
+        equally among active staff, so no sales drop out of the bonuses.
+        """
+        sale_days = _day_numbers(sales['date'])
+        first, last = sale_days.min(), sale_days.max()
+        amount = np.bincount(sale_days - first, sales['daily_sales'].to_numpy(dtype='float64'))
+        credited = np.zeros(len(self._staff_ids))
+        worked = np.zeros(len(amount), dtype=bool)
+
+        weights = self._attendance_weights
+        if weights is not None:
+            lo, hi = np.searchsorted(weights['day'], [first, last + 1])
+            position = weights['position'][lo:hi]
+            known = position >= 0
+            offset = weights['day'][lo:hi] - first
+            credit = weights['share'][lo:hi] * amount[offset]
+            credited += np.bincount(position[known], credit[known], minlength=len(self._staff_ids))
+            worked[offset[known]] = True
+
+        unattributed = amount[~worked].sum()
+        if unattributed:
+            credited[self._active] += unattributed / max(int(self._active.sum()), 1)
+        return pd.Series(credited, index=self._staff_ids)
+    
+    def attribute_sales(self, start=None, end=None):
+        """Sales credited to every staff member between start and end (inclusive)"""
+        self._sync_attendance()
+        if start is None or end is None:
+            default_start, default_end = self._default_period()
+            start = default_start if start is None else start
+            end = default_end if end is None else end
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        
+        dates = pd.to_datetime(self.sales_df['date'])
+        sales = self.sales_df.loc[(dates >= start) & (dates <= end), ['daily_sales']].assign(
+            date=dates[(dates >= start) & (dates <= end)]
+        )
+        credited = self._attribute(sales) if not sales.empty else pd.Series(dtype='float64')
+        return credited.reindex(self._staff_ids, fill_value=0.0)
+    
+    def compute_bonuses(self, start=None, end=None):
+        """Bonus for all staff over a period as a DataFrame, cached per period"""
+        self._sync_attendance()
+        key = (start, end)
+        bonuses = self._period_cache.get(key)
+        if bonuses is None:
+            bonuses = self.staff_df[['staff_id', 'name']].reset_index(drop=True)
+            bonuses['sales'] = self.attribute_sales(start, end).to_numpy()
+            self._period_cache[key] = bonuses
+        return self._apply_slabs(bonuses.copy())
+    
+    @staticmethod
+    def _apply_slabs(bonuses):
+        bonus, rates = bonus_for_sales(bonuses['sales'])
+        bonuses['bonus'] = bonus
+        bonuses['bonus_percent'] = rates * 100
+        bonuses['eligible'] = bonuses['bonus'] > BONUS_ELIGIBLE_MIN
+        return bonuses
+    
+    def record_sales(self, date, daily_sales, gold_sales=0, silver_sales=0, diamond_sales=0,
+                     other_sales=0, staff_count=0):
+        """Add (or replace) a day of sales and credit it to cached periods without a rescan"""
+        self._sync_attendance()
+        date = pd.Timestamp(date).normalize()
+        row = pd.DataFrame([{
+            'date': date, 'daily_sales': daily_sales, 'gold_sales': gold_sales,
+            'silver_sales': silver_sales, 'diamond_sales': diamond_sales,
+            'other_sales': other_sales, 'staff_count': staff_count
+        }])
+        if self.write_log is not None:
+            self.write_log.append('sales', row.iloc[0].to_dict())
+        saved = pd.to_datetime(self.sales_df['date']) == date
+        replaced = self.sales_df.loc[saved, ['daily_sales']].assign(date=date)
+        self.sales_df = pd.concat([self.sales_df[~saved], row], ignore_index=True)
+        
+        credited = self._attribute(row).reindex(self._staff_ids, fill_value=0.0).to_numpy()
+        if not replaced.empty:
+            credited -= self._attribute(replaced).reindex(self._staff_ids, fill_value=0.0).to_numpy()
+        for (start, end), bonuses in self._period_cache.items():
+            if start is None or end is None:
+                # Default period follows the latest day, recompute on next access
+                continue
+            if pd.Timestamp(start) <= date <= pd.Timestamp(end):
+                bonuses['sales'] = bonuses['sales'].to_numpy() + credited
+        self._period_cache = {
+            key: bonuses for key, bonuses in self._period_cache.items()
+            if key[0] is not None and key[1] is not None
+        }
     
     def calculate_bonus(self, sales_amount, base_bonus_percent=5):
         """Calculate bonus based on sales"""
-        if sales_amount < 100000:
-            bonus = sales_amount * 0.05  # 5%
-        elif sales_amount < 250000:
-            bonus = sales_amount * 0.08  # 8%
-        else:
-            bonus = sales_amount * 0.10  # 10%
-        
-        return bonus
+        bonus, _ = bonus_for_sales([sales_amount])
+        return float(bonus[0])
     
     def get_sales_summary(self):
         """Get overall sales summary"""
@@ -31,24 +200,9 @@ class BonusManagementSystem:
             'records': len(self.sales_df)
         }
     
-    def get_staff_bonus_suggestions(self):
-        """Get bonus suggestions for staff"""
-        suggestions = []
-        
-        for idx, staff in self.staff_df.head(10).iterrows():
-            sales_mock = 150000  # Mock sales
-            bonus = self.calculate_bonus(sales_mock)
-            
-            suggestions.append({
-                'staff_id': staff['staff_id'],
-                'name': staff['name'],
-                'sales': sales_mock,
-                'bonus': bonus,
-                'bonus_percent': (bonus / sales_mock) * 100,
-                'eligible': bonus > 5000
-            })
-        
-        return suggestions
+    def get_staff_bonus_suggestions(self, start=None, end=None):
+        """Get bonus suggestions for all staff from their attributed sales"""
+        return self.compute_bonuses(start, end).to_dict('records')
 
 def render_sales_tracking(bonus_mgmt):
     """Render sales tracking interface"""
@@ -77,6 +231,10 @@ def render_sales_tracking(bonus_mgmt):
         diamond_sales = st.number_input("Diamond Sales (₹)", value=20000, min_value=0)
     
     if st.button("💾 Save Sales Data", use_container_width=True):
+        other_sales = max(daily_sales - gold_sales - silver_sales - diamond_sales, 0)
+        bonus_mgmt.record_sales(
+            date, daily_sales, gold_sales, silver_sales, diamond_sales, other_sales, staff_count
+        )
         st.success("✅ Sales data saved successfully!")
 
 def render_bonus_suggestions(bonus_mgmt):
@@ -85,26 +243,26 @@ def render_bonus_suggestions(bonus_mgmt):
     
     st.info("Based on sales performance, here are bonus recommendations:")
     
-    suggestions = bonus_mgmt.get_staff_bonus_suggestions()
+    bonuses = bonus_mgmt.compute_bonuses()
     
-    for sugg in suggestions:
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.write(f"**{sugg['name']}**")
-        
-        with col2:
-            st.write(f"Sales: ₹{sugg['sales']:,}")
-        
-        with col3:
-            st.write(f"Bonus: ₹{sugg['bonus']:,.0f}")
-        
-        with col4:
-            if sugg['eligible']:
-                st.write("✅ Eligible")
-            else:
-                st.write("⏳ Not Yet")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Eligible Staff", f"{int(bonuses['eligible'].sum())} / {len(bonuses)}")
+    with col2:
+        st.metric("Total Bonus", f"₹{bonuses['bonus'].sum():,.0f}")
+    
+    st.dataframe(
+        bonuses.assign(eligible=np.where(bonuses['eligible'], "✅ Eligible", "⏳ Not Yet")),
+        column_config={
+            'sales': st.column_config.NumberColumn("Sales (₹)", format="%.0f"),
+            'bonus': st.column_config.NumberColumn("Bonus (₹)", format="%.0f"),
+            'bonus_percent': st.column_config.NumberColumn("Bonus %", format="%.0f%%"),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
 
+@timed('render_bonus_analytics')
 def render_bonus_analytics(bonus_mgmt):
     """Render bonus analytics and reports"""
     st.subheader("📈 Bonus Analytics")
@@ -128,38 +286,42 @@ def render_bonus_analytics(bonus_mgmt):
     
     st.divider()
     
-    # Analytics charts
-    if not bonus_mgmt.sales_df.empty:
+    # Analytics charts, served from the materialized rollups and cached per rollup version
+    rollup = get_rollup_engine()
+    daily = rollup.daily_frame()
+    daily = daily[daily['daily_sales'] > 0]
+    if not daily.empty:
+        chart_lib = charts()
+        figures = chart_lib.get_figure_cache()
+        selected = st.selectbox("Range", list(chart_lib.RANGES), key="bonus_analytics_range")
         col1, col2 = st.columns(2)
         
         with col1:
             # Sales trend
-            fig = px.line(
-                bonus_mgmt.sales_df.tail(30),
-                x='date',
-                y='daily_sales',
-                title='Sales Trend (Last 30 Days)',
-                markers=True
+            trend = figures.get_or_build(
+                'sales_trend', rollup.version,
+                lambda days: chart_lib.time_series_figure(
+                    chart_lib.window(daily, 'date', days), 'date', 'daily_sales', f"Sales Trend ({selected})"
+                ),
+                days=chart_lib.RANGES[selected]
             )
-            st.plotly_chart(fig, use_container_width=True)
+            figures.render('sales_trend', trend)
         
         with col2:
             # Category breakdown
-            latest = bonus_mgmt.sales_df.iloc[-1] if not bonus_mgmt.sales_df.empty else {}
-            
-            categories = {
-                'Gold': latest.get('gold_sales', 0),
-                'Silver': latest.get('silver_sales', 0),
-                'Diamond': latest.get('diamond_sales', 0),
-                'Other': latest.get('other_sales', 0)
-            }
+            def category_pie():
+                monthly = rollup.monthly_frame()
+                latest = monthly[monthly['total_sales'] > 0].iloc[-1]
+                return chart_lib.pie_figure(
+                    ['Gold', 'Silver', 'Diamond', 'Other'],
+                    latest[['gold_sales', 'silver_sales', 'diamond_sales', 'other_sales']],
+                    f"Sales by Category ({latest['month']})"
+                )
             
-            fig = px.pie(
-                names=categories.keys(),
-                values=categories.values(),
-                title='Sales by Category (Latest Day)'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            figures.render('category_split', figures.get_or_build('category_split', rollup.version, category_pie))
+        
+        st.divider()
+        render_sales_forecast(load_sales_forecaster(), chart_lib)
 
 def render_staff_bonus_view():
     """Render staff view of their bonuses"""
@@ -0,0 +1,228 @@
+"""Concurrent WhatsApp campaign sending
+
+Messages go out from a bounded thread pool over one pooled keep-alive
+session, paced by a token bucket. 429/5xx responses are retried with
+exponential backoff, and every recipient's outcome is appended to a
+progress file so an interrupted campaign resumes where it stopped.
+"""
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+from data_store import DATA_DIR
+from metrics import timer
+from whatsapp_service import normalize_phone_numbers
+
+PROGRESS_DIR = os.path.join(DATA_DIR, 'campaigns')
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` sends per second, bursting to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CampaignReport:
+    def __init__(self, campaign_id, total):
+        self.campaign_id = campaign_id
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.invalid = 0
+        self.skipped = 0
+        self.retries = 0
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def count(self, field, n=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    @property
+    def done(self):
+        return self.sent + self.failed + self.invalid + self.skipped
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def to_dict(self):
+        elapsed = self.elapsed
+        return {
+            'campaign_id': self.campaign_id,
+            'total': self.total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'invalid': self.invalid,
+            'skipped': self.skipped,
+            'retries': self.retries,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_per_s': round(self.sent / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class CampaignDispatcher:
+    def __init__(self, service, rate_per_second=20, workers=8, max_retries=4,
+                 backoff_base=0.5, backoff_max=30.0, timeout=10, progress_dir=PROGRESS_DIR):
+        self.service = service
+        self.bucket = TokenBucket(rate_per_second)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.progress_dir = progress_dir
+        self._progress_lock = threading.Lock()
+
+        if workers <= getattr(service, 'pool_size', 0):
+            # The service's keep-alive pool is large enough to share
+            self.session = service.session
+        else:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers.update(service.headers)
+
+    def progress_path(self, campaign_id):
+        return os.path.join(self.progress_dir, f"{campaign_id}.jsonl")
+
+    def load_progress(self, campaign_id):
+        """Final status per phone from an earlier run of the campaign"""
+        done = {}
+        try:
+            with open(self.progress_path(campaign_id), encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        done[entry['phone']] = entry['status']
+        except FileNotFoundError:
+            pass
+        return done
+
+    def _record(self, campaign_id, entry):
+        os.makedirs(self.progress_dir, exist_ok=True)
+        line = json.dumps(entry) + '\n'
+        with self._progress_lock, open(self.progress_path(campaign_id), 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def _backoff(self, attempt, response):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        delay = self.backoff_base * (2 ** attempt)
+        return min(delay * (0.5 + random.random()), self.backoff_max)
+
+    def send_one(self, phone, message, report=None, validated=False):
+        """Send one message with retries, returning (status, attempts, error)"""
+        if not validated and not self.service.validate_phone_number(phone):
+            return 'invalid', 0, f"Invalid phone: {phone}"
+
+        payload = self.service.build_text_payload(phone, message, normalized=validated)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt and report is not None:
+                report.count('retries')
+            self.bucket.acquire()
+            response = None
+            try:
+                with timer('whatsapp.post'):
+                    response = self.session.post(self.service.messages_url, json=payload, timeout=self.timeout)
+                if response.status_code == 200:
+                    return 'sent', attempt + 1, None
+                error = f"HTTP {response.status_code}"
+                if response.status_code not in RETRY_STATUS:
+                    return 'failed', attempt + 1, error
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+        return 'failed', self.max_retries + 1, error
+
+    def _prepare(self, campaign_id, recipients):
+        """Validate and dedupe the audience in bulk, dropping already-sent numbers"""
+        valid, invalid = normalize_phone_numbers(list(recipients))
+        invalid = invalid[invalid['reason'] != 'duplicate']
+        report = CampaignReport(campaign_id, len(valid) + len(invalid))
+        
+        for phone, reason in zip(invalid['input'].fillna(''), invalid['reason']):
+            report.count('invalid')
+            self._record(campaign_id, {
+                'phone': phone, 'status': 'invalid', 'attempts': 0, 'error': reason, 'ts': time.time()
+            })
+        
+        previous = self.load_progress(campaign_id)
+        phones = valid['phone'].tolist()
+        pending = [phone for phone in phones if previous.get(phone) != 'sent']
+        report.count('skipped', len(phones) - len(pending))
+        return report, pending
+
+    def _run(self, report, pending, message):
+        def deliver(phone):
+            status, attempts, error = self.send_one(phone, message, report, validated=True)
+            report.count(status)
+            self._record(report.campaign_id, {
+                'phone': phone, 'status': status, 'attempts': attempts,
+                'error': error, 'ts': time.time()
+            })
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='campaign') as pool:
+            list(pool.map(deliver, pending))
+
+        report.finished = time.monotonic()
+        return report
+
+    def send_campaign(self, campaign_id, recipients, message):
+        """Send `message` to every recipient, skipping ones already sent"""
+        report, pending = self._prepare(campaign_id, recipients)
+        return self._run(report, pending, message)
+
+    def start_campaign(self, campaign_id, recipients, message):
+        """Run a campaign in the background, returning (future, live report)"""
+        report, pending = self._prepare(campaign_id, recipients)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='campaign-runner')
+        future = executor.submit(self._run, report, pending, message)
+        executor.shutdown(wait=False)
+        return future, report
+
+
+def offer_campaign(dispatcher, offer_id, offers_df, customers_df, tier=None, tiers=None):
+    """Send an offer's campaign_message to its audience from customers.csv
+
+    `tiers` (customer id -> tier, e.g. RFMEngine.tiers()) targets the
+    recomputed tiers instead of the ones stored in customers.csv.
+    """
+    offer = offers_df.loc[offers_df['id'] == offer_id].iloc[0]
+    audience = customers_df
+    target = str(tier or offer['applicable_to']).lower()
+    if target != 'all':
+        current = audience['tier'] if tiers is None else audience['id'].map(tiers)
+        audience = audience[current.astype(str).str.lower() == target]
+    message = f"{offer['campaign_message']}\n{offer['name']}: {offer['description']}"
+    return dispatcher.send_campaign(f"offer-{offer_id}", audience['mobile'].astype(str), message)
+
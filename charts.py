@@ -0,0 +1,204 @@
+"""Cached, downsampled Plotly figures for the dashboards
+
+Figures are built once per (chart, data version, options) and reused across
+reruns and sessions. Long time series are resampled to weeks or months for
+wide ranges and thinned with LTTB (largest triangle three buckets) otherwise,
+so the browser never receives more than MAX_POINTS points per trace. Large
+scatter plots switch to WebGL traces. Payload bytes and build/render times
+are recorded per chart and available from `FigureCache.stats()`.
+"""
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from metrics import cache_hit, cache_miss, observe
+
+MAX_POINTS = 1000
+WEBGL_THRESHOLD = 5000
+
+# Widest span (in days) shown at each resolution
+RESAMPLE_RULES = [(180, None), (3 * 366, 'W'), (None, 'MS')]
+
+RANGES = {
+    'Last 30 Days': 30,
+    'Last 90 Days': 90,
+    'Last Year': 365,
+    'All Time': None,
+}
+
+
+def lttb(x, y, threshold):
+    """Positions of `threshold` points that keep the visual shape of (x, y)"""
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    picks = np.empty(threshold, dtype='int64')
+    picks[0], picks[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        picks[i + 1] = a
+    return picks
+
+
+def resample_rule(span_days):
+    for limit, rule in RESAMPLE_RULES:
+        if limit is None or span_days <= limit:
+            return rule
+    return None
+
+
+def downsample_series(df, x, y, max_points=MAX_POINTS, how='sum'):
+    """Time series ready to plot: resampled for wide spans, then LTTB-thinned
+
+    `how` is the aggregation used when resampling (sum for sales totals,
+    mean for rates). Returns (frame, resolution label).
+    """
+    if df.empty:
+        return df[[x, y]], 'daily'
+    df = df[[x, y]].sort_values(x)
+    span = (df[x].iloc[-1] - df[x].iloc[0]).days
+    rule = resample_rule(span)
+    label = 'daily'
+    if rule is not None:
+        df = df.set_index(x)[y].resample(rule).agg(how).reset_index()
+        label = 'weekly' if rule == 'W' else 'monthly'
+    if len(df) > max_points:
+        df = df.iloc[lttb(df[x].to_numpy(dtype='datetime64[ns]').astype('int64'), df[y], max_points)]
+    return df, label
+
+
+def _count_points(figure):
+    total = 0
+    for trace in figure.data:
+        data = getattr(trace, 'x', None)
+        if data is None:
+            data = getattr(trace, 'values', None)
+        total += 0 if data is None else len(data)
+    return total
+
+
+class ChartEntry:
+    def __init__(self, figure, build_ms):
+        self.figure = figure
+        self.build_ms = build_ms
+        self.payload_bytes = len(figure.to_json().encode('utf-8'))
+        self.points = _count_points(figure)
+        self.render_ms = None
+
+
+class FigureCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, name, version, build, **options):
+        """Cached ChartEntry for `name` at a data version, building it on a miss"""
+        key = (name, version, tuple(sorted(options.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats.setdefault(name, {'builds': 0, 'hits': 0})['hits'] += 1
+                cache_hit('figure_cache')
+                return entry
+
+        cache_miss('figure_cache')
+        start = time.perf_counter()
+        figure = build(**options)
+        elapsed = time.perf_counter() - start
+        observe(f"figure_build.{name}", elapsed)
+        entry = ChartEntry(figure, elapsed * 1000)
+
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            stats = self._stats.setdefault(name, {'builds': 0, 'hits': 0})
+            stats['builds'] += 1
+        return entry
+
+    def render(self, name, entry):
+        """Send a cached figure to the page, timing the call"""
+        start = time.perf_counter()
+        st.plotly_chart(entry.figure, use_container_width=True)
+        elapsed = time.perf_counter() - start
+        observe(f"figure_render.{name}", elapsed)
+        entry.render_ms = elapsed * 1000
+        with self._lock:
+            self._stats.setdefault(name, {'builds': 0, 'hits': 0}).update(
+                payload_bytes=entry.payload_bytes,
+                points=entry.points,
+                build_ms=round(entry.build_ms, 2),
+                render_ms=round(entry.render_ms, 2),
+            )
+
+    def stats(self):
+        """Per chart: builds, cache hits, payload bytes, points and timings"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Process-wide figure cache shared by every session"""
+    return FigureCache()
+
+
+def time_series_figure(df, x, y, title, how='sum', max_points=MAX_POINTS):
+    points, resolution = downsample_series(df, x, y, max_points=max_points, how=how)
+    return px.line(points, x=x, y=y, title=f"{title} ({resolution})", markers=len(points) <= 60)
+
+
+def forecast_figure(history, forecast, x, y, title, history_points=MAX_POINTS // 2):
+    """Recent history, the forecast and its `<y>_lower`/`<y>_upper` band"""
+    recent, _ = downsample_series(history, x, y, max_points=history_points)
+    band_x = pd.concat([forecast[x], forecast[x][::-1]])
+    band_y = pd.concat([forecast[f"{y}_upper"], forecast[f"{y}_lower"][::-1]])
+    figure = go.Figure([
+        go.Scatter(x=recent[x], y=recent[y], name='Actual', mode='lines'),
+        go.Scatter(x=band_x, y=band_y, name='Interval', fill='toself', mode='none', opacity=0.3),
+        go.Scatter(x=forecast[x], y=forecast[y], name='Forecast', mode='lines', line={'dash': 'dash'}),
+    ])
+    figure.update_layout(title=title)
+    return figure
+
+
+def pie_figure(names, values, title):
+    return px.pie(names=list(names), values=list(values), title=title)
+
+
+def scatter_figure(df, x, y, title, color=None):
+    """Scatter plot, as WebGL (Scattergl) once it has more than WEBGL_THRESHOLD points"""
+    render_mode = 'webgl' if len(df) > WEBGL_THRESHOLD else 'svg'
+    return px.scatter(df, x=x, y=y, color=color, title=title, render_mode=render_mode)
+
+
+def window(df, x, days):
+    """Rows in the last `days` days of the data (all rows for None)"""
+    if days is None or df.empty:
+        return df
+    return df[df[x] > df[x].max() - pd.Timedelta(days=days)]
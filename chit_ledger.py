@@ -0,0 +1,248 @@
+"""Chit fund ledger: dues, overdue members, draws and projected collections
+
+Every member of every chit is one slot in flat NumPy arrays, addressed by a
+(chit_id, customer_id) dict, so a payment updates its slot in place and the
+month-end dues run is a handful of array operations over all members.
+
+Instalments of `monthly_payment` fall due every month from the chit's
+start_date until the member has paid the chit `amount`. Draws are held on the
+start day every month (Monthly) or every second month (Bi-monthly) until
+end_date. A member's draw_number is the first draw they take part in.
+"""
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import get_data_store, load_table
+
+DRAW_INTERVAL_MONTHS = {'Monthly': 1, 'Bi-monthly': 2}
+
+LEDGER_COLUMNS = [
+    'chit_id', 'customer_id', 'joined_date', 'amount_paid', 'amount_remaining', 'draw_number', 'status'
+]
+
+
+def _month_index(dates):
+    """Months since year 0 for each date, so differences count whole months"""
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 12 + dates.month - 1).to_numpy(dtype='int64')
+
+
+def _from_month_index(months, day=1):
+    months = np.asarray(months, dtype='int64')
+    return pd.to_datetime(pd.DataFrame({'year': months // 12, 'month': months % 12 + 1, 'day': day}))
+
+
+class ChitLedger:
+    def __init__(self, chits_df, chit_members_df):
+        chits = chits_df.set_index('id')
+        members = chit_members_df.reset_index(drop=True)
+        orphaned = ~members['chit_id'].isin(chits.index)
+        if orphaned.any():
+            raise ValueError(
+                f"{int(orphaned.sum())} chit member rows refer to chits missing from chits.csv: "
+                f"{sorted(members.loc[orphaned, 'chit_id'].unique().tolist())}"
+            )
+        self.chits = chits
+
+        self.chit_ids = members['chit_id'].to_numpy(dtype='int64')
+        self.customer_ids = members['customer_id'].to_numpy(dtype='int64')
+        self.joined = members['joined_date'].to_numpy()
+        self.draw_numbers = members['draw_number'].to_numpy(dtype='int64')
+        self.active = (members['status'].astype(str) == 'active').to_numpy()
+        self.paid = members['amount_paid'].to_numpy(dtype='int64').copy()
+        self.remaining = members['amount_remaining'].to_numpy(dtype='int64').copy()
+        self._slots = {key: i for i, key in enumerate(zip(self.chit_ids.tolist(), self.customer_ids.tolist()))}
+
+        # Chit terms broadcast to every member slot
+        terms = chits.reindex(self.chit_ids)
+        self.instalment = terms['monthly_payment'].to_numpy(dtype='int64')
+        self.start_month = _month_index(terms['start_date'])
+        self.end_month = _month_index(terms['end_date'])
+        self.interval = terms['draw_schedule'].astype(str).map(DRAW_INTERVAL_MONTHS).fillna(1) \
+            .to_numpy(dtype='int64')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.paid)
+
+    def record_payment(self, chit_id, customer_id, amount):
+        """Apply one payment to a member's slot, returning the new remaining amount"""
+        if int(amount) <= 0:
+            raise ValueError(f"Payment amount must be positive, got {amount}")
+        slot = self._slots.get((int(chit_id), int(customer_id)))
+        if slot is None:
+            raise KeyError(f"Customer {customer_id} is not a member of chit {chit_id}")
+        with self._lock:
+            amount = min(int(amount), int(self.remaining[slot]))
+            self.paid[slot] += amount
+            self.remaining[slot] -= amount
+            return int(self.remaining[slot])
+
+    def apply_payments(self, payments):
+        """Apply a batch of payments with chit_id, customer_id and amount columns
+
+        Rows for unknown members or with a non-positive amount are skipped;
+        returns how many were.
+        """
+        payments = pd.DataFrame(payments)
+        slots = np.array([
+            self._slots.get(key, -1)
+            for key in zip(payments['chit_id'].astype(int), payments['customer_id'].astype(int))
+        ], dtype='int64')
+        amounts = payments['amount'].to_numpy(dtype='int64')
+        skipped = (slots < 0) | (amounts <= 0)
+        amounts = amounts[~skipped]
+        slots = slots[~skipped]
+        with self._lock:
+            totals = np.bincount(slots, weights=amounts, minlength=len(self)).astype('int64')
+            totals = np.minimum(totals, self.remaining)
+            self.paid += totals
+            self.remaining -= totals
+        return int(skipped.sum())
+
+    def _elapsed(self, as_of):
+        as_of = pd.Timestamp(as_of or pd.Timestamp.today()).normalize()
+        return as_of, _month_index([as_of])[0] - self.start_month
+
+    def dues(self, as_of=None):
+        """Per-member dues as of a date
+
+        expected is what should have been paid through the as_of month,
+        due_now the part of it still unpaid, overdue_amount the unpaid part of
+        instalments from earlier months.
+        """
+        as_of, elapsed = self._elapsed(as_of)
+        instalments_due = np.clip(elapsed + 1, 0, None)
+        total = self.paid + self.remaining
+        expected = np.minimum(instalments_due * self.instalment, total)
+        expected_before = np.minimum(np.clip(elapsed, 0, None) * self.instalment, total)
+
+        due_now = np.where(self.active, np.clip(expected - self.paid, 0, self.remaining), 0)
+        overdue = np.where(self.active, np.clip(expected_before - self.paid, 0, self.remaining), 0)
+        overdue_instalments = -(-overdue // np.maximum(self.instalment, 1))
+
+        # Draws already held before as_of, the next one is counted from 1
+        draws_held = np.where(elapsed > 0, -(-elapsed // self.interval), 0)
+        draws_held += (as_of.day > 1) & (elapsed >= 0) & (elapsed % self.interval == 0)
+        next_draw = draws_held + 1
+        next_draw_month = self.start_month + draws_held * self.interval
+        finished = next_draw_month > self.end_month
+
+        eligible = self.active & (overdue == 0) & (self.draw_numbers <= next_draw) & ~finished & (self.remaining > 0)
+
+        return pd.DataFrame({
+            'chit_id': self.chit_ids,
+            'customer_id': self.customer_ids,
+            'active': self.active,
+            'amount_paid': self.paid,
+            'amount_remaining': self.remaining,
+            'expected': expected,
+            'due_now': due_now,
+            'overdue_amount': overdue,
+            'overdue_instalments': overdue_instalments,
+            'next_draw': np.where(finished, 0, next_draw),
+            'next_draw_date': _from_month_index(next_draw_month).where(~finished),
+            'draw_eligible': eligible,
+        })
+
+    def overdue_members(self, as_of=None):
+        dues = self.dues(as_of)
+        return dues[dues['overdue_amount'] > 0].sort_values('overdue_amount', ascending=False)
+
+    def chit_summary(self, as_of=None):
+        """Month-end figures per chit"""
+        dues = self.dues(as_of)
+        dues['is_overdue'] = dues['overdue_amount'] > 0
+        summary = dues.groupby('chit_id').agg(
+            active_members=('active', 'sum'),
+            collected=('amount_paid', 'sum'),
+            outstanding=('amount_remaining', 'sum'),
+            due_now=('due_now', 'sum'),
+            overdue_amount=('overdue_amount', 'sum'),
+            overdue_members=('is_overdue', 'sum'),
+            draw_eligible=('draw_eligible', 'sum'),
+            next_draw=('next_draw', 'max'),
+            next_draw_date=('next_draw_date', 'max'),
+        )
+        return self.chits[['name']].join(summary, how='right').rename_axis('chit_id').reset_index()
+
+    def projected_collections(self, as_of=None, months=3):
+        """Expected collections per chit for the next `months` months
+
+        Arrears are assumed to be collected in the first month, then one
+        instalment a month until each member's remaining amount is paid.
+        """
+        as_of, elapsed = self._elapsed(as_of)
+        horizon = np.arange(1, months + 1)
+        instalments = np.clip(elapsed[:, None] + horizon[None, :], 0, None)
+        total = (self.paid + self.remaining)[:, None]
+        outstanding = np.clip(
+            np.minimum(instalments * self.instalment[:, None], total) - self.paid[:, None],
+            0, self.remaining[:, None]
+        )
+        outstanding = np.where(self.active[:, None], outstanding, 0)
+        collections = np.diff(outstanding, axis=1, prepend=0)
+
+        labels = _from_month_index(_month_index([as_of])[0] + horizon - 1).dt.strftime('%Y-%m')
+        frame = pd.DataFrame(collections, columns=labels)
+        return frame.groupby(self.chit_ids).sum().rename_axis('chit_id')
+
+    def to_frame(self):
+        """Current ledger in the layout of chit_members.csv"""
+        return pd.DataFrame({
+            'chit_id': self.chit_ids,
+            'customer_id': self.customer_ids,
+            'joined_date': self.joined,
+            'amount_paid': self.paid,
+            'amount_remaining': self.remaining,
+            'draw_number': self.draw_numbers,
+            'status': np.where(self.active, 'active', 'inactive'),
+        })[LEDGER_COLUMNS]
+
+
+@st.cache_resource
+def get_chit_ledger(chits_version, chit_members_version):
+    """Shared ChitLedger, rebuilt when chits or chit_members is reloaded"""
+    return ChitLedger(load_table('chits'), load_table('chit_members'))
+
+
+def load_chit_ledger():
+    store = get_data_store()
+    return get_chit_ledger(store.version('chits'), store.version('chit_members'))
+
+
+def render_chit_dues(ledger):
+    """Render month-end chit dues for the manager"""
+    st.subheader("💎 Chit Dues")
+
+    summary = ledger.chit_summary()
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Collected", f"₹{summary['collected'].sum():,.0f}")
+
+    with col2:
+        st.metric("Due This Month", f"₹{summary['due_now'].sum():,.0f}")
+
+    with col3:
+        st.metric("Overdue", f"₹{summary['overdue_amount'].sum():,.0f}")
+
+    with col4:
+        st.metric("Overdue Members", int(summary['overdue_members'].sum()))
+
+    st.divider()
+
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.write("**Overdue Members**")
+        st.dataframe(ledger.overdue_members().head(50), use_container_width=True, hide_index=True)
+
+    with col2:
+        st.write("**Projected Collections**")
+        st.dataframe(ledger.projected_collections(), use_container_width=True)
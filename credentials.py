@@ -0,0 +1,289 @@
+"""Credential index, password hashing and login throttling
+
+Logins for managers (users.csv), staff (staff.csv) and customers
+(customers.csv) are resolved from one in-memory index keyed by username and
+mobile. Passwords are stored as PBKDF2-SHA256 with a tunable iteration
+count; legacy single-pass SHA-256 hashes still verify and are upgraded on the
+next successful login. Upgraded hashes are appended to ``wal/credentials.log``
+and applied on top of the CSVs when the index is built.
+
+With ``DATA_BACKEND = "sqlite"`` accounts are not loaded up front: a login
+missing from the index is looked up in the SQLite repository and indexed.
+
+Every verification costs exactly one KDF evaluation, including for unknown
+logins and legacy hashes, so login time does not reveal which accounts exist.
+Throttled attempts are rejected before any hashing.
+"""
+import os
+import json
+import hmac
+import time
+import hashlib
+import secrets
+import threading
+from collections import deque
+import streamlit as st
+
+from data_store import DATA_DIR, LOG_DIR, get_data_store, load_table
+from sqlite_repository import get_repository
+
+KDF_NAME = 'pbkdf2_sha256'
+KDF_ITERATIONS = 200_000
+SALT_BYTES = 16
+
+REALMS = ('user', 'staff', 'customer')
+
+# Failed attempts allowed per login / per client address within the window
+MAX_FAILURES_PER_LOGIN = 5
+MAX_FAILURES_PER_CLIENT = 20
+FAILURE_WINDOW = 15 * 60
+# Expired counters are swept once this many keys are tracked
+MAX_TRACKED_KEYS = 100_000
+
+UPGRADE_LOG = os.path.join(LOG_DIR, 'credentials.log')
+
+
+def get_kdf_iterations():
+    """AUTH_KDF_ITERATIONS env var, then secret, default KDF_ITERATIONS"""
+    iterations = os.environ.get('AUTH_KDF_ITERATIONS')
+    if not iterations:
+        try:
+            iterations = st.secrets.get('AUTH_KDF_ITERATIONS')
+        except Exception:
+            iterations = None
+    return int(iterations or KDF_ITERATIONS)
+
+
+def hash_password(password, iterations=KDF_ITERATIONS, salt=None):
+    """Encoded hash: pbkdf2_sha256$<iterations>$<salt hex>$<digest hex>"""
+    salt = salt or secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{KDF_NAME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def _legacy_hash(password):
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
+def verify_password(password, stored, iterations=KDF_ITERATIONS):
+    """Return (matches, needs_upgrade) after exactly one KDF evaluation"""
+    parts = str(stored or '').split('$')
+    if len(parts) == 4 and parts[0] == KDF_NAME:
+        stored_iterations = int(parts[1])
+        digest = hashlib.pbkdf2_hmac(
+            'sha256', password.encode('utf-8'), bytes.fromhex(parts[2]), stored_iterations
+        )
+        matches = hmac.compare_digest(digest.hex(), parts[3])
+        return matches, matches and stored_iterations < iterations
+
+    # Legacy SHA-256 (or missing) hash: burn one KDF so timing matches
+    hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), b'\0' * SALT_BYTES, iterations)
+    matches = bool(stored) and hmac.compare_digest(_legacy_hash(password), str(stored))
+    return matches, matches
+
+
+class LoginThrottle:
+    """Sliding-window failure counter per login and per client address"""
+
+    def __init__(self, max_per_login=MAX_FAILURES_PER_LOGIN, max_per_client=MAX_FAILURES_PER_CLIENT,
+                 window=FAILURE_WINDOW):
+        self.limits = {'login': max_per_login, 'client': max_per_client}
+        self.window = window
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+    def retry_after(self, login, client=None):
+        """Seconds until another attempt is allowed, 0 if allowed now"""
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for kind, key in (('login', login), ('client', client)):
+                if key is None:
+                    continue
+                failures = self._recent((kind, key), now)
+                if failures is not None and len(failures) >= self.limits[kind]:
+                    wait = max(wait, failures[0] + self.window - now)
+        return wait
+
+    def failed(self, login, client=None):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._failures) >= MAX_TRACKED_KEYS:
+                for key in list(self._failures):
+                    self._recent(key, now)
+            for kind, key in (('login', login), ('client', client)):
+                if key is not None:
+                    self._failures.setdefault((kind, key), deque(maxlen=self.limits[kind])).append(now)
+
+    def succeeded(self, login):
+        with self._lock:
+            self._failures.pop(('login', login), None)
+
+
+class CredentialIndex:
+    def __init__(self, users_df, staff_df, customers_df, data_dir=DATA_DIR, iterations=KDF_ITERATIONS,
+                 throttle=None, repository=None):
+        self.data_dir = data_dir
+        self.iterations = iterations
+        self.throttle = throttle or LoginThrottle()
+        # Optional SQLiteRepository resolving logins that are not indexed yet
+        self.repository = repository
+        self._entries = {realm: {} for realm in REALMS}
+        self._upgrades = {}
+        self._lock = threading.Lock()
+        # Verified against for unknown logins so they cost the same as known ones
+        self._dummy_hash = hash_password(secrets.token_hex(8), iterations)
+        # Rows of each realm's table already indexed, see catch_up
+        self.seen = dict.fromkeys(REALMS, 0)
+
+        self._load_upgrades()
+        self.catch_up(users_df, staff_df, customers_df)
+
+    def _add(self, realm, record, keys):
+        for key in keys:
+            if key is not None and str(key) not in ('', 'nan', '<NA>'):
+                self._entries[realm][str(key)] = record
+
+    def _index(self, realm, record):
+        """Index a table row under its logins, returning the indexed record (None for inactive staff)"""
+        if realm == 'user':
+            keys = [record['username']]
+        else:
+            if realm == 'staff' and str(record.get('status', 'active')) != 'active':
+                return None
+            if realm == 'customer':
+                record = dict(record, role='customer')
+            keys = [record['username'], record['mobile']]
+        upgraded = self._upgrades.get((realm, str(record['username'])))
+        if upgraded is not None:
+            record['password_hash'] = upgraded
+        self._add(realm, record, keys)
+        return record
+
+    def catch_up(self, users_df=None, staff_df=None, customers_df=None):
+        """Index rows appended to the tables since they were last seen"""
+        with self._lock:
+            for realm, df in zip(REALMS, (users_df, staff_df, customers_df)):
+                if df is None or len(df) <= self.seen[realm]:
+                    continue
+                for record in df.iloc[self.seen[realm]:].to_dict('records'):
+                    self._index(realm, record)
+                self.seen[realm] = len(df)
+        return self
+
+    def _record(self, realm, login):
+        record = self._entries[realm].get(str(login))
+        if record is None and self.repository is not None:
+            row = self.repository.get_login(realm, login)
+            if row is not None:
+                with self._lock:
+                    record = self._index(realm, row)
+        return record
+
+    @property
+    def upgrade_log(self):
+        return os.path.join(self.data_dir, UPGRADE_LOG)
+
+    def _load_upgrades(self):
+        """Upgraded hashes by (realm, username), applied as accounts are indexed"""
+        try:
+            with open(self.upgrade_log, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            if not line.endswith('\n'):
+                break
+            upgrade = json.loads(line)
+            self._upgrades[(upgrade['realm'], upgrade['login'])] = upgrade['password_hash']
+
+    def _persist_upgrade(self, realm, login, password_hash):
+        line = json.dumps({'realm': realm, 'login': login, 'password_hash': password_hash}) + '\n'
+        os.makedirs(os.path.dirname(self.upgrade_log), exist_ok=True)
+        fd = os.open(self.upgrade_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line.encode('utf-8'))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def exists(self, realm, login):
+        return self._record(realm, login) is not None
+
+    def add(self, realm, record, keys):
+        """Index a newly registered account"""
+        with self._lock:
+            self._add(realm, record, keys)
+
+    def authenticate(self, realm, login, password, client=None):
+        """Return (ok, record without password_hash, retry_after seconds)"""
+        record = self._record(realm, login)
+        # Username and mobile of one account share a counter
+        throttle_key = f"{realm}:{record['username'] if record is not None else login}"
+        wait = self.throttle.retry_after(throttle_key, client)
+        if wait > 0:
+            return False, None, wait
+
+        stored = record.get('password_hash') if record is not None else self._dummy_hash
+        matches, needs_upgrade = verify_password(password or '', stored, self.iterations)
+
+        if record is None or not matches:
+            self.throttle.failed(throttle_key, client)
+            return False, None, 0.0
+
+        self.throttle.succeeded(throttle_key)
+        if needs_upgrade:
+            upgraded = hash_password(password, self.iterations)
+            with self._lock:
+                record['password_hash'] = upgraded
+                self._upgrades[(realm, str(record['username']))] = upgraded
+            self._persist_upgrade(realm, str(record['username']), upgraded)
+        return True, {k: v for k, v in record.items() if k != 'password_hash'}, 0.0
+
+
+@st.cache_resource
+def get_credential_index(users_version, staff_version, customers_version):
+    """Shared CredentialIndex, rebuilt when one of its tables is reloaded
+
+    With the SQLite repository it starts empty and resolves logins there.
+    """
+    repository = get_repository()
+    if repository is not None:
+        return CredentialIndex(None, None, None, iterations=get_kdf_iterations(), repository=repository)
+    return CredentialIndex(
+        load_table('users'), load_table('staff'), load_table('customers'), iterations=get_kdf_iterations()
+    )
+
+
+def load_credential_index():
+    if get_repository() is not None:
+        # The write log mirrors new accounts into the repository, nothing to catch up
+        return get_credential_index(None, None, None)
+    store = get_data_store()
+    index = get_credential_index(
+        store.base_version('users'), store.base_version('staff'), store.base_version('customers')
+    )
+    return index.catch_up(store.get('users'), store.get('staff'), store.get('customers'))
+
+
+def client_address():
+    """Remote address of the current browser session, None if unavailable"""
+    try:
+        from streamlit.runtime import get_instance
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        client = get_instance().get_client(ctx.session_id)
+        return client.request.remote_ip
+    except Exception:
+        return None
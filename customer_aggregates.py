@@ -0,0 +1,209 @@
+"""Per-customer aggregates for the customer dashboard and assistant
+
+Totals, pending amount, recent transactions and chit memberships for every
+customer are computed in one grouped pass over the tables and kept in dicts
+keyed by customer id and by mobile, so a login is a dictionary lookup rather
+than a filter over every table. Customers and transactions appended through
+the write log are folded in by `catch_up`, which remembers how many rows of
+each it has seen.
+"""
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import get_data_store, load_table
+from offer_index import OfferIndex
+
+RECENT_TRANSACTIONS = 5
+TRANSACTION_FIELDS = ['date', 'type', 'category', 'amount', 'status', 'invoice_id']
+
+
+class CustomerAggregateStore:
+    def __init__(self, customers_df, transactions_df, chits_df, chit_members_df, offers_df,
+                 recent=RECENT_TRANSACTIONS):
+        self.recent = recent
+        self._lock = threading.RLock()
+        self._by_id = {}
+        self._id_by_mobile = {}
+
+        self.add_customers(customers_df)
+        self._fold_transactions(transactions_df)
+        self._fold_chits(chits_df, chit_members_df)
+        self.offer_index = OfferIndex(offers_df)
+        self.customers_seen = len(customers_df)
+        self.transactions_seen = len(transactions_df)
+
+    def _fold_transactions(self, tx):
+        if tx.empty:
+            return
+        tx = tx.assign(
+            date=pd.to_datetime(tx['date']),
+            sale=np.where(tx['type'].astype(str) == 'sale', tx['amount'], 0),
+            pending=np.where(tx['status'].astype(str) == 'pending', tx['amount'], 0),
+        )
+        totals = tx.groupby('customer_id').agg(
+            transactions=('amount', 'size'),
+            purchased=('sale', 'sum'),
+            pending=('pending', 'sum'),
+            last_date=('date', 'max'),
+        )
+        for customer_id, row in zip(totals.index, totals.to_dict('records')):
+            aggregate = self._by_id.get(int(customer_id))
+            if aggregate is not None:
+                aggregate.update(
+                    transactions=int(row['transactions']),
+                    purchased=float(row['purchased']),
+                    pending=float(row['pending']),
+                    last_date=row['last_date'],
+                )
+
+        categories = tx.groupby(['customer_id', tx['category'].astype(str)])['sale'].sum()
+        for (customer_id, category), amount in categories.items():
+            aggregate = self._by_id.get(int(customer_id))
+            if aggregate is not None and amount:
+                aggregate['categories'][category] = float(amount)
+
+        latest = tx.sort_values('date', ascending=False, kind='stable').groupby('customer_id').head(self.recent)
+        for customer_id, group in latest.groupby('customer_id'):
+            aggregate = self._by_id.get(int(customer_id))
+            if aggregate is not None:
+                aggregate['recent'] = group[TRANSACTION_FIELDS].to_dict('records')
+
+    def _fold_chits(self, chits_df, chit_members_df):
+        members = chit_members_df.merge(
+            chits_df[['id', 'name', 'monthly_payment', 'end_date']].rename(columns={'id': 'chit_id'}),
+            on='chit_id', how='left'
+        )
+        for row in members.to_dict('records'):
+            aggregate = self._by_id.get(int(row['customer_id']))
+            if aggregate is not None:
+                aggregate['chits'].append(row)
+
+    def customer_id(self, customer):
+        """Customer id from an id, a mobile number or a user_data dict"""
+        if isinstance(customer, dict):
+            customer = customer.get('id') or customer.get('customer_id') or customer.get('mobile')
+        if customer is None:
+            return None
+        key = str(customer)
+        if key in self._id_by_mobile:
+            return self._id_by_mobile[key]
+        try:
+            customer_id = int(customer)
+        except (TypeError, ValueError):
+            return None
+        return customer_id if customer_id in self._by_id else None
+
+    def get(self, customer):
+        """Aggregate dict for a customer, or None if unknown"""
+        customer_id = self.customer_id(customer)
+        return None if customer_id is None else self._by_id[customer_id]
+
+    def by_mobile(self, mobile):
+        customer_id = self._id_by_mobile.get(str(mobile))
+        return None if customer_id is None else self._by_id[customer_id]
+
+    def favourite_category(self, aggregate):
+        categories = aggregate['categories']
+        return max(categories, key=categories.get) if categories else None
+
+    def active_chits(self, aggregate):
+        return [chit for chit in aggregate['chits'] if str(chit['status']) == 'active']
+
+    def eligible_offers(self, tier, today=None):
+        """Offers open to a tier today, best discount first"""
+        return self.offer_index.active(tier, today)
+
+    def add_customers(self, customers_df):
+        """Add (or replace) customer profiles, returning their ids"""
+        customers = customers_df.assign(mobile=customers_df['mobile'].astype(str))
+        ids = customers['id'].astype(int).tolist()
+        with self._lock:
+            for customer_id, row in zip(ids, customers.to_dict('records')):
+                aggregate = self._by_id.get(customer_id)
+                if aggregate is not None:
+                    aggregate['profile'] = row
+                    continue
+                self._by_id[customer_id] = {
+                    'profile': row,
+                    'transactions': 0,
+                    'purchased': 0.0,
+                    'pending': 0.0,
+                    'last_date': None,
+                    'categories': {},
+                    'recent': [],
+                    'chits': [],
+                }
+            self._id_by_mobile.update(zip(customers['mobile'], ids))
+        return ids
+
+    def catch_up(self, customers_df, transactions_df):
+        """Fold rows appended to the tables since last seen, returning the customer ids touched"""
+        touched = []
+        with self._lock:
+            if len(customers_df) > self.customers_seen:
+                touched += self.add_customers(customers_df.iloc[self.customers_seen:])
+                self.customers_seen = len(customers_df)
+            if len(transactions_df) > self.transactions_seen:
+                touched += self.add_transactions(transactions_df.iloc[self.transactions_seen:])
+                self.transactions_seen = len(transactions_df)
+        return touched
+
+    def add_transactions(self, rows):
+        """Fold new transactions into the affected customers only"""
+        rows = pd.DataFrame(rows)
+        if rows.empty:
+            return []
+        rows['date'] = pd.to_datetime(rows['date'])
+        if 'invoice_id' not in rows:
+            rows['invoice_id'] = ''
+        touched = []
+        with self._lock:
+            for row in rows.sort_values('date').to_dict('records'):
+                aggregate = self._by_id.get(int(row['customer_id']))
+                if aggregate is None:
+                    continue
+                amount = float(row['amount'])
+                aggregate['transactions'] += 1
+                if str(row['type']) == 'sale':
+                    aggregate['purchased'] += amount
+                    category = str(row['category'])
+                    aggregate['categories'][category] = aggregate['categories'].get(category, 0.0) + amount
+                if str(row['status']) == 'pending':
+                    aggregate['pending'] += amount
+                if aggregate['last_date'] is None or row['date'] > aggregate['last_date']:
+                    aggregate['last_date'] = row['date']
+                recent = aggregate['recent'] + [{field: row[field] for field in TRANSACTION_FIELDS}]
+                aggregate['recent'] = sorted(recent, key=lambda t: t['date'], reverse=True)[:self.recent]
+                touched.append(int(row['customer_id']))
+        return touched
+
+
+def aggregate_versions(store):
+    """Versions keying the shared aggregates: appends to customers and transactions are caught up instead"""
+    return (
+        store.base_version('customers'),
+        store.base_version('transactions'),
+        store.version('chit_members'),
+        store.version('offers'),
+    )
+
+
+@st.cache_resource
+def get_customer_aggregates(customers_version, transactions_version, chit_members_version, offers_version):
+    """Shared CustomerAggregateStore, rebuilt when a source table is reloaded"""
+    return CustomerAggregateStore(
+        load_table('customers'),
+        load_table('transactions'),
+        load_table('chits'),
+        load_table('chit_members'),
+        load_table('offers'),
+    )
+
+
+def load_customer_aggregates():
+    store = get_data_store()
+    aggregates = get_customer_aggregates(*aggregate_versions(store))
+    aggregates.catch_up(store.get('customers'), store.get('transactions'))
+    return aggregates
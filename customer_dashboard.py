@@ -1,6 +1,13 @@
 import streamlit as st
 import pandas as pd
 
+from customer_aggregates import load_customer_aggregates
+
+
+def _inr(value):
+    return f"₹{float(value):,.0f}"
+
+
 def render_customer_dashboard(user_data):
     """Render the customer dashboard"""
     st.set_page_config(page_title="Customer Dashboard", layout="wide", page_icon="👤")
@@ -18,20 +25,27 @@ def render_customer_dashboard(user_data):
     
     st.divider()
     
+    aggregates = load_customer_aggregates()
+    aggregate = aggregates.get(user_data)
+    if aggregate is None:
+        st.error("❌ Customer record not found")
+        return
+    profile = aggregate['profile']
+    
     # Customer info
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Mobile", user_data.get('mobile', 'N/A'))
+        st.metric("Mobile", profile['mobile'])
     
     with col2:
-        st.metric("Tier", "Gold")
+        st.metric("Tier", profile['tier'])
     
     with col3:
-        st.metric("Total Purchased", "₹5,00,000")
+        st.metric("Total Purchased", _inr(aggregate['purchased']))
     
     with col4:
-        st.metric("Pending Amount", "₹50,000")
+        st.metric("Pending Amount", _inr(aggregate['pending']))
     
     st.divider()
     
@@ -44,78 +58,81 @@ def render_customer_dashboard(user_data):
         "📋 Transactions"
     ])
     
+    active_chits = aggregates.active_chits(aggregate)
+    recent = pd.DataFrame(aggregate['recent'])
+    
     with customer_tabs[0]:
         st.subheader("📊 Overview")
-        st.info("Your account summary appears here")
         
         col1, col2 = st.columns(2)
         with col1:
-            st.write("**Account Status:** Active ✅")
-            st.write("**Membership Tier:** Gold 🏆")
+            st.write(f"**Name:** {profile['name']}")
+            st.write(f"**Membership Tier:** {profile['tier']} 🏆")
+            st.write(f"**Active Chits:** {len(active_chits)}")
         
         with col2:
-            st.write("**Join Date:** 2025-01-15")
-            st.write("**Loyalty Points:** 5,000")
+            st.write(f"**Join Date:** {pd.Timestamp(profile['joined_date']):%Y-%m-%d}")
+            st.write(f"**Transactions:** {aggregate['transactions']}")
+            if aggregate['last_date'] is not None:
+                st.write(f"**Last Visit:** {aggregate['last_date']:%Y-%m-%d}")
     
     with customer_tabs[1]:
         st.subheader("🛍️ Your Purchases")
-        st.info("Recent purchase history appears here")
         
-        purchase_data = {
-            'Date': ['2025-12-10', '2025-12-08', '2025-12-05'],
-            'Item': ['Gold Ring', 'Silver Necklace', 'Diamond Earrings'],
-            'Amount': ['₹50,000', '₹25,000', '₹75,000'],
-            'Status': ['Completed', 'Completed', 'Completed']
-        }
-        st.dataframe(purchase_data, use_container_width=True)
+        purchases = recent[recent['type'].astype(str) == 'sale'] if not recent.empty else recent
+        if purchases.empty:
+            st.info("No purchases yet")
+        else:
+            st.dataframe(pd.DataFrame({
+                'Date': purchases['date'].dt.strftime('%Y-%m-%d'),
+                'Category': purchases['category'].astype(str).str.title(),
+                'Amount': purchases['amount'].map(_inr),
+                'Status': purchases['status'].astype(str).str.title(),
+            }), use_container_width=True, hide_index=True)
     
     with customer_tabs[2]:
         st.subheader("💎 Chit Membership")
-        st.info("Your chit participation details")
         
-        chit_data = {
-            'Chit Name': ['Gold Chit 100K', 'Premium Chit 150K'],
-            'Status': ['Active', 'Active'],
-            'Amount Paid': ['₹500,000', '₹750,000'],
-            'Remaining': ['₹500,000', '₹750,000']
-        }
-        st.dataframe(chit_data, use_container_width=True)
+        if not aggregate['chits']:
+            st.info("You are not part of any chit yet")
+        else:
+            chits = pd.DataFrame(aggregate['chits'])
+            st.dataframe(pd.DataFrame({
+                'Chit Name': chits['name'],
+                'Status': chits['status'].astype(str).str.title(),
+                'Amount Paid': chits['amount_paid'].map(_inr),
+                'Remaining': chits['amount_remaining'].map(_inr),
+                'Draw': chits['draw_number'],
+            }), use_container_width=True, hide_index=True)
     
     with customer_tabs[3]:
         st.subheader("💰 Available Offers")
-        st.info("Special offers available for you")
         
-        col1, col2 = st.columns(2)
+        offers = aggregates.eligible_offers(profile['tier'])
+        if not offers:
+            st.info("No offers available right now")
         
-        with col1:
-            st.markdown("""
-            #### 🎉 Gold Member Bonus
-            **12% Discount** on all gold items
-            - Valid till: 2025-12-31
-            - Click to apply coupon
-            """)
-            if st.button("Apply", key="offer1"):
-                st.success("Coupon applied! 🎉")
-        
-        with col2:
-            st.markdown("""
-            #### ✨ New Year Bonanza
-            **20% Discount** on rings & bracelets
-            - Valid till: 2026-01-31
-            - Limited time offer!
-            """)
-            if st.button("Apply", key="offer2"):
-                st.success("Coupon applied! 🎉")
+        columns = st.columns(2)
+        for i, offer in enumerate(offers):
+            with columns[i % 2]:
+                st.markdown(f"""
+                #### 🎉 {offer['name']}
+                **{offer['discount_percent']}% Discount** - {offer['description']}
+                - Valid till: {offer['valid_to']:%Y-%m-%d}
+                """)
+                if st.button("Apply", key=f"offer{offer['id']}"):
+                    st.success("Coupon applied! 🎉")
     
     with customer_tabs[4]:
         st.subheader("📋 Transaction History")
-        st.info("All your transactions")
         
-        transaction_data = {
-            'Date': ['2025-12-10', '2025-12-08', '2025-12-05', '2025-12-01'],
-            'Type': ['Sale', 'Payment', 'Sale', 'Adjustment'],
-            'Amount': ['₹50,000', '₹25,000', '₹75,000', '₹10,000'],
-            'Status': ['Completed', 'Completed', 'Completed', 'Completed'],
-            'Invoice': ['INV20251210001', 'INV20251208002', 'INV20251205003', 'INV20251201004']
-        }
-        st.dataframe(transaction_data, use_container_width=True)
+        if recent.empty:
+            st.info("No transactions yet")
+        else:
+            st.dataframe(pd.DataFrame({
+                'Date': recent['date'].dt.strftime('%Y-%m-%d'),
+                'Type': recent['type'].astype(str).str.title(),
+                'Amount': recent['amount'].map(_inr),
+                'Status': recent['status'].astype(str).str.title(),
+                'Invoice': recent['invoice_id'],
+            }), use_container_width=True, hide_index=True)
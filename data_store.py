@@ -0,0 +1,394 @@
+import os
+import json
+import fcntl
+import hashlib
+import itertools
+import threading
+from contextlib import contextmanager
+import pandas as pd
+import streamlit as st
+
+from metrics import cache_hit, cache_miss, count, timer
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = 'wal'
+
+DATA_BACKENDS = ('csv', 'sqlite')
+
+# Explicit dtypes for every table so a rerun never has to infer them again
+TABLE_SCHEMAS = {
+    'users': {
+        'file': 'users.csv',
+        'dtypes': {'user_id': 'int32', 'username': 'string', 'role': 'category'},
+        'dates': ['created_date'],
+    },
+    'customers': {
+        'file': 'customers.csv',
+        'dtypes': {
+            'id': 'int32', 'mobile': 'string', 'username': 'string', 'tier': 'category',
+            'pending_amount': 'int64', 'total_purchased': 'int64', 'chit_amount': 'int64',
+        },
+        'dates': ['joined_date'],
+        # Allocated by WriteLog.append_new; compaction rejects duplicates
+        'id': 'id',
+    },
+    'staff': {
+        'file': 'staff.csv',
+        'dtypes': {
+            'staff_id': 'int32', 'mobile': 'string', 'username': 'string', 'floor': 'category',
+            'role': 'category', 'salary_per_day': 'float64', 'status': 'category',
+        },
+        'dates': ['hire_date'],
+        'id': 'staff_id',
+    },
+    'attendance': {
+        'file': 'attendance.csv',
+        'dtypes': {'staff_id': 'int32', 'status': 'category', 'remarks': 'string'},
+        'dates': ['date'],
+        # Marking a staff-day again logs a new row; compaction keeps the last
+        'unique': ['staff_id', 'date'],
+    },
+    'sales': {
+        'file': 'sales.csv',
+        'dtypes': {
+            'daily_sales': 'int64', 'gold_sales': 'int64', 'silver_sales': 'int64',
+            'diamond_sales': 'int64', 'other_sales': 'int64', 'staff_count': 'int32',
+        },
+        'dates': ['date'],
+        # Saving a day's sales again logs a new row; compaction keeps the last
+        'unique': ['date'],
+    },
+    'summary': {
+        'file': 'summary.csv',
+        'dtypes': {'month': 'string', 'total_transactions': 'int32', 'active_staff': 'int32'},
+        'dates': [],
+    },
+    'transactions': {
+        'file': 'transactions.csv',
+        'dtypes': {
+            'id': 'int32', 'customer_id': 'int32', 'amount': 'int64', 'category': 'category',
+            'type': 'category', 'status': 'category', 'invoice_id': 'string',
+        },
+        'dates': ['date'],
+        'id': 'id',
+    },
+    'chits': {
+        'file': 'chits.csv',
+        'dtypes': {'id': 'int32', 'members': 'int32', 'draw_schedule': 'category'},
+        'dates': ['start_date', 'end_date'],
+    },
+    'chit_members': {
+        'file': 'chit_members.csv',
+        'dtypes': {
+            'chit_id': 'int32', 'customer_id': 'int32', 'amount_paid': 'int64',
+            'amount_remaining': 'int64', 'draw_number': 'int32', 'status': 'category',
+        },
+        'dates': ['joined_date'],
+    },
+    'offers': {
+        'file': 'offers.csv',
+        'dtypes': {'id': 'int32', 'discount_percent': 'int32', 'applicable_to': 'category'},
+        'dates': ['valid_from', 'valid_to'],
+    },
+}
+
+
+def read_table_csv(path, table):
+    """Parse a CSV file with the declared schema of a table"""
+    schema = TABLE_SCHEMAS[table]
+    with timer(f"csv_load.{table}"):
+        return pd.read_csv(
+            path,
+            dtype=schema['dtypes'],
+            parse_dates=schema['dates'] or False,
+        )
+
+
+def write_table_csv(df, path):
+    """Write a table back out in the layout of the bundled CSVs"""
+    df.to_csv(path, index=False, date_format='%Y-%m-%d')
+
+
+def coerce_rows(rows, table, like=None):
+    """Build a typed DataFrame from row dicts, matching the columns of `like`"""
+    schema = TABLE_SCHEMAS[table]
+    df = pd.DataFrame(rows)
+    if like is not None:
+        df = df.reindex(columns=like.columns)
+    for col in schema['dates']:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col, dtype in schema['dtypes'].items():
+        if col in df.columns and dtype != 'category':
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def append_typed(base, rows_df):
+    """Concatenate new rows onto a table without losing categorical dtypes"""
+    rows_df = rows_df.copy()
+    for col in base.columns:
+        if isinstance(base[col].dtype, pd.CategoricalDtype) and col in rows_df.columns:
+            categories = base[col].cat.categories.union(pd.Index(rows_df[col].dropna().unique()))
+            if len(categories) != len(base[col].cat.categories):
+                base = base.assign(**{col: base[col].cat.set_categories(categories)})
+            rows_df[col] = pd.Categorical(rows_df[col], categories=categories)
+    return pd.concat([base, rows_df], ignore_index=True)
+
+
+def drop_superseded(df, table):
+    """Keep only the last row per key of a table declaring a `unique` key"""
+    key = TABLE_SCHEMAS[table].get('unique')
+    if not key:
+        return df
+    return df.drop_duplicates(key, keep='last').reset_index(drop=True)
+
+
+def _file_digest(path):
+    """Hash file contents in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def log_path(data_dir, table):
+    """Append-only write log of a table (see write_log.py)"""
+    return os.path.join(data_dir, LOG_DIR, f"{table}.log")
+
+
+def compaction_marker(data_dir, table):
+    """Marker present while a compaction swaps a table's CSV and log"""
+    return os.path.join(data_dir, LOG_DIR, f"{table}.compact")
+
+
+def recover_compaction(data_dir, table, csv_path):
+    """Finish or roll back a compaction interrupted between its CSV and log swaps
+
+    Must run under the exclusive table lock. The marker holds the digest of
+    the merged CSV and how many log bytes went into it. If that CSV is in
+    place but the trimmed log was never swapped in, those bytes are dropped
+    from the log now (keeping anything appended since), so compacted rows are
+    never applied twice; otherwise the leftovers are discarded. Returns True
+    if there was anything to recover.
+    """
+    marker = compaction_marker(data_dir, table)
+    try:
+        with open(marker, encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return False
+    except ValueError:
+        # Torn marker: it is fsync'd before the CSV swap, so nothing was swapped
+        state = None
+
+    log = log_path(data_dir, table)
+    tmp_log = f"{log}.tmp"
+    if state is not None and os.path.exists(tmp_log) and _file_digest(csv_path) == state['csv_digest']:
+        with open(log, 'rb') as f:
+            f.seek(state['consumed'])
+            rest = f.read()
+        with open(tmp_log, 'wb') as f:
+            f.write(rest)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_log, log)
+    for leftover in (tmp_log, f"{csv_path}.compact.tmp", marker):
+        try:
+            os.remove(leftover)
+        except FileNotFoundError:
+            pass
+    return True
+
+
+@contextmanager
+def table_lock(data_dir, table, shared=False):
+    """Inter-process lock guarding a table's CSV/log swap during compaction"""
+    lock_dir = os.path.join(data_dir, LOG_DIR)
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"{table}.lock"), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_log(path, offset=0, end=None):
+    """Parse complete JSON lines of a log from `offset`, returning (rows, new_offset)"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read() if end is None else f.read(end - offset)
+    except FileNotFoundError:
+        return [], offset
+    # A trailing partial line is a write in progress, pick it up next time
+    complete = data.rfind(b'\n') + 1
+    rows = [json.loads(line) for line in data[:complete].splitlines() if line.strip()]
+    return rows, offset + complete
+
+
+def _size(path):
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+class _CacheEntry:
+    def __init__(self, mtime_ns, size, digest, df):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.df = df
+        # base_version changes when the CSV is reparsed, version on any change
+        self.base_version = 0
+        self.version = 0
+        self.log_offset = 0
+
+    def matches(self, stat):
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+class DataStore:
+    """Process-wide cache of the shop tables
+
+    DataFrames returned by `get` are shared between sessions and must be
+    treated as read-only by callers. Rows appended to a table's write log
+    are folded into the cached frame without reparsing the CSV.
+
+    `version` changes whenever a table's frame changes (reload, folded log
+    rows or compaction) and keys caches rebuilt from the whole table.
+    `base_version` only changes on a reparse: while it stays the same, rows
+    past a consumer's seen-row count are appends, which is what incremental
+    consumers (rollups, RFM, customer aggregates) fold.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self._entries = {}
+        self._locks = {table: threading.Lock() for table in TABLE_SCHEMAS}
+        self.loads = 0
+        self._generations = itertools.count(1)
+
+    def path(self, table):
+        """Absolute path of the file backing a table"""
+        return os.path.join(self.data_dir, TABLE_SCHEMAS[table]['file'])
+
+    def get(self, table):
+        """Return the cached DataFrame for a table, reloading if the file changed"""
+        if table not in TABLE_SCHEMAS:
+            raise KeyError(f"Unknown table: {table}")
+
+        path = self.path(table)
+        log = log_path(self.data_dir, table)
+        entry = self._entries.get(table)
+        if entry and entry.matches(os.stat(path)) and entry.log_offset == _size(log):
+            cache_hit('data_store')
+            return entry.df
+
+        if os.path.exists(compaction_marker(self.data_dir, table)):
+            with self._locks[table], table_lock(self.data_dir, table):
+                recover_compaction(self.data_dir, table, path)
+
+        with self._locks[table], table_lock(self.data_dir, table, shared=True):
+            entry = self._entries.get(table)
+            stat = os.stat(path)
+            log_size = _size(log)
+            if entry and entry.matches(stat) and entry.log_offset == log_size:
+                cache_hit('data_store')
+                return entry.df
+
+            digest = None
+            if entry and not entry.matches(stat):
+                digest = _file_digest(path)
+                if entry.digest == digest:
+                    # Touched but unchanged, keep the parsed frame
+                    entry.mtime_ns = stat.st_mtime_ns
+                    entry.size = stat.st_size
+                else:
+                    entry = None
+
+            if entry is None or log_size < entry.log_offset:
+                cache_miss('data_store')
+                df = read_table_csv(path, table)
+                self.loads += 1
+                entry = _CacheEntry(stat.st_mtime_ns, stat.st_size, digest or _file_digest(path), df)
+                entry.base_version = entry.version = next(self._generations)
+                self._entries[table] = entry
+
+            if log_size > entry.log_offset:
+                rows, entry.log_offset = read_log(log, entry.log_offset)
+                if rows:
+                    entry.df = append_typed(entry.df, coerce_rows(rows, table, like=entry.df))
+                    entry.version = next(self._generations)
+                    count(f"data_store.log_rows.{table}", len(rows))
+            return entry.df
+
+    def adopt_compaction(self, table, consumed, superseded=False):
+        """Account for `consumed` log bytes having been merged into the CSV
+
+        Called by the compactor while it holds the exclusive table lock, which
+        already keeps readers from touching the entry, so the cached frame
+        stays valid instead of being reparsed. If the merge dropped superseded
+        rows the frame no longer matches the CSV and is reparsed instead.
+        """
+        entry = self._entries.get(table)
+        if entry is None:
+            return
+        if superseded or entry.log_offset < consumed:
+            self._entries.pop(table, None)
+            return
+        stat = os.stat(self.path(table))
+        entry.mtime_ns = stat.st_mtime_ns
+        entry.size = stat.st_size
+        entry.digest = _file_digest(self.path(table))
+        entry.log_offset -= consumed
+        entry.version = next(self._generations)
+
+    def version(self, table):
+        """Version of a table, increasing on every change to its frame"""
+        self.get(table)
+        return self._entries[table].version
+
+    def base_version(self, table):
+        """Version of a table's parsed CSV, increasing only when it is reparsed"""
+        self.get(table)
+        return self._entries[table].base_version
+
+    def get_all(self):
+        """Return every table as a dict of DataFrames"""
+        return {table: self.get(table) for table in TABLE_SCHEMAS}
+
+    def invalidate(self, table=None):
+        """Drop cached tables so the next access reparses them"""
+        if table is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(table, None)
+
+
+def get_data_backend():
+    """Configured lookup backend: DATA_BACKEND env var, then secret, default csv"""
+    backend = os.environ.get('DATA_BACKEND')
+    if not backend:
+        try:
+            backend = st.secrets.get('DATA_BACKEND')
+        except Exception:
+            backend = None
+    backend = (backend or 'csv').lower()
+    if backend not in DATA_BACKENDS:
+        raise ValueError(f"DATA_BACKEND must be one of {', '.join(DATA_BACKENDS)}")
+    return backend
+
+
+@st.cache_resource
+def get_data_store():
+    """Shared DataStore for every Streamlit session in this process"""
+    return DataStore()
+
+
+def load_table(table):
+    """Load a table through the shared store"""
+    return get_data_store().get(table)
@@ -0,0 +1,215 @@
+"""Festival role assignment from attendance reliability
+
+Every staff member gets an attendance score from all their recorded days in
+one vectorized pass: each day earns credit by status (present 1, leave 0.75,
+half day 0.5, absent 0), weighted by recency with a 90-day half-life and
+blended with a few days at the shop-wide rate so new joiners are not judged
+on a handful of days.
+
+A festival plan lists the extra roles for the season, each staffed on one
+floor from a set of current roles and with a number of slots. Filling the
+slots is an assignment problem over staff x slots: a staff member can only
+take a slot their current role allows, and scores higher for staying on
+their own floor and for the role's main feeder role. It is solved exactly
+with the Hungarian method when scipy is installed, and with a greedy
+best-pair-first pass otherwise.
+
+    python festival_roles.py --festival diwali
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+from data_store import DATA_DIR, DataStore
+
+FESTIVAL_MONTHS = {'diwali': 10, 'new_year': 1, 'holi': 3}
+
+# Festival role: floor it is staffed on, current roles that can take it (main
+# feeder role first) and how many staff it needs
+FESTIVAL_ROLES = {
+    'diwali': [
+        {'role': 'Sales Lead', 'floor': 'Main Floor', 'from_roles': ['Sales'], 'slots': 2},
+        {'role': 'VIP Manager', 'floor': 'Second Floor', 'from_roles': ['Customer Service', 'Sales'], 'slots': 1},
+        {'role': 'Premium Counter', 'floor': 'First Floor', 'from_roles': ['Sales', 'Cashier'], 'slots': 2},
+    ],
+    'new_year': [
+        {'role': 'Event Manager', 'floor': 'Main Floor', 'from_roles': ['Customer Service', 'Sales'], 'slots': 1},
+        {'role': 'Counter Manager', 'floor': 'First Floor', 'from_roles': ['Cashier'], 'slots': 2},
+        {'role': 'Sales Lead', 'floor': 'Main Floor', 'from_roles': ['Sales'], 'slots': 2},
+    ],
+    'holi': [
+        {'role': 'Promotion Manager', 'floor': 'Main Floor', 'from_roles': ['Sales', 'Customer Service'],
+         'slots': 1},
+        {'role': 'Sales Associate', 'floor': 'First Floor', 'from_roles': ['Sales', 'Cashier'], 'slots': 2},
+        {'role': 'Customer Care', 'floor': 'Main Floor', 'from_roles': ['Customer Service'], 'slots': 2},
+    ],
+}
+
+STATUS_CREDIT = {'present': 1.0, 'leave': 0.75, 'half_day': 0.5, 'absent': 0.0}
+HALF_LIFE_DAYS = 90
+# Pseudo-days at the shop-wide rate added to everyone's record
+PRIOR_DAYS = 10
+
+# Assignment score on top of reliability (0-1): 0.1 is worth 10 attendance points
+FLOOR_MATCH_WEIGHT = 0.1
+MAIN_ROLE_WEIGHT = 0.05
+
+ASSIGNMENT_COLUMNS = [
+    'staff_id', 'name', 'current_role', 'floor', 'festival_role', 'festival_floor', 'attendance_score'
+]
+
+
+def _days(dates):
+    """Days since the epoch for a datetime column or scalar"""
+    return pd.DatetimeIndex(pd.to_datetime(dates)).to_numpy(dtype='datetime64[D]').astype('int64')
+
+
+def festival_for(month):
+    """Festival whose season a month falls in, or None"""
+    return next((name for name, m in FESTIVAL_MONTHS.items() if m == int(month)), None)
+
+
+def attendance_reliability(day_statuses, staff_ids, as_of=None, half_life=HALF_LIFE_DAYS):
+    """Attendance score (0-100) of every staff member as a Series by staff_id
+
+    `day_statuses` has staff_id, date and status columns (attendance.csv or
+    AttendanceIndex.day_statuses). Days after `as_of` (default: the latest
+    recorded day) are ignored.
+    """
+    staff_ids = pd.Index(staff_ids, name='staff_id')
+    position = staff_ids.get_indexer(day_statuses['staff_id'])
+    days = _days(day_statuses['date'])
+    codes = pd.Categorical(day_statuses['status'], categories=list(STATUS_CREDIT)).codes
+
+    if as_of is not None:
+        as_of = _days([as_of])[0]
+    elif len(days):
+        as_of = days.max()
+    keep = (position >= 0) & (codes >= 0)
+    if as_of is not None:
+        keep &= days <= as_of
+
+    weights = 0.5 ** ((as_of - days[keep]) / half_life) if keep.any() else np.zeros(0)
+    credit = np.array(list(STATUS_CREDIT.values()))[codes[keep]]
+    recorded = np.bincount(position[keep], weights, minlength=len(staff_ids))
+    earned = np.bincount(position[keep], weights * credit, minlength=len(staff_ids))
+
+    shop_rate = earned.sum() / recorded.sum() if recorded.sum() > 0 else 1.0
+    score = (earned + PRIOR_DAYS * shop_rate) / (recorded + PRIOR_DAYS)
+    return pd.Series(np.round(score * 100, 1), index=staff_ids, name='attendance_score')
+
+
+def _hungarian():
+    # scipy is optional and slow to import, only load it when roles are assigned
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        return None
+    return linear_sum_assignment
+
+
+def _greedy(score, eligible):
+    """Best remaining (staff, slot) pair first until slots or staff run out"""
+    rows, cols = np.nonzero(eligible)
+    order = np.argsort(-score[rows, cols], kind='stable')
+    taken_staff = np.zeros(score.shape[0], dtype=bool)
+    taken_slot = np.zeros(score.shape[1], dtype=bool)
+    picked = []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if taken_staff[r] or taken_slot[c]:
+            continue
+        taken_staff[r] = taken_slot[c] = True
+        picked.append((r, c))
+        if len(picked) == min(score.shape):
+            break
+    picked = np.array(picked, dtype='int64').reshape(-1, 2)
+    return picked[:, 0], picked[:, 1]
+
+
+def assign_roles(staff_df, scores, plan, method='auto'):
+    """Fill the slots of a festival plan with active staff
+
+    `scores` is attendance_reliability's Series. `method` is 'hungarian'
+    (needs scipy), 'greedy' or 'auto' (hungarian when scipy is installed).
+    Returns (assignments, open_slots): one row per assigned staff member in
+    plan order, best attendance first, and {festival role: slots nobody
+    could take}.
+    """
+    plan = pd.DataFrame(plan, columns=['role', 'floor', 'from_roles', 'slots'])
+    staff = staff_df
+    if 'status' in staff.columns:
+        staff = staff[staff['status'] == 'active']
+    roles = staff['role'].astype(str).to_numpy()
+    floors = staff['floor'].astype(str).to_numpy()
+    slot_plan = np.repeat(np.arange(len(plan)), plan['slots'].to_numpy(dtype='int64'))
+
+    # staff x plan roles
+    eligible = np.zeros((len(staff), len(plan)), dtype=bool)
+    for k, allowed in enumerate(plan['from_roles']):
+        eligible[:, k] = np.isin(roles, list(allowed))
+    main_role = roles[:, None] == plan['from_roles'].str[0].to_numpy()[None, :]
+    reliability = scores.reindex(staff['staff_id']).fillna(0).to_numpy() / 100
+    score = (reliability[:, None] + FLOOR_MATCH_WEIGHT * (floors[:, None] == plan['floor'].to_numpy()[None, :])
+             + MAIN_ROLE_WEIGHT * main_role)
+
+    # ... expanded to staff x slots, dropping staff who fit no slot
+    candidates = np.flatnonzero(eligible[:, slot_plan].any(axis=1))
+    eligible = eligible[np.ix_(candidates, slot_plan)]
+    score = score[np.ix_(candidates, slot_plan)]
+
+    solver = _hungarian() if method in ('auto', 'hungarian') else None
+    if method == 'hungarian' and solver is None:
+        raise ImportError("The hungarian method needs scipy")
+    if not eligible.any():
+        rows = cols = np.zeros(0, dtype='int64')
+    elif solver is not None:
+        # Ineligible pairs cost more than any set of eligible ones, then are dropped
+        cost = np.where(eligible, -score, score.max() * eligible.size + 1)
+        rows, cols = solver(cost)
+        fits = eligible[rows, cols]
+        rows, cols = rows[fits], cols[fits]
+    else:
+        rows, cols = _greedy(score, eligible)
+
+    picked = staff.iloc[candidates[rows]]
+    picked_plan = plan.iloc[slot_plan[cols]]
+    assignments = pd.DataFrame({
+        'staff_id': picked['staff_id'].to_numpy(),
+        'name': picked['name'].to_numpy(),
+        'current_role': picked['role'].to_numpy(),
+        'floor': picked['floor'].to_numpy(),
+        'festival_role': picked_plan['role'].to_numpy(),
+        'festival_floor': picked_plan['floor'].to_numpy(),
+        'attendance_score': (reliability[candidates[rows]] * 100).round(1),
+        'plan_order': slot_plan[cols],
+    }, columns=ASSIGNMENT_COLUMNS + ['plan_order'])
+    assignments = (assignments.sort_values(['plan_order', 'attendance_score'], ascending=[True, False],
+                                           kind='stable')
+                   .drop(columns='plan_order').reset_index(drop=True))
+
+    filled = np.bincount(slot_plan[cols], minlength=len(plan))
+    open_slots = {
+        role: int(slots - count)
+        for role, slots, count in zip(plan['role'], plan['slots'], filled) if slots > count
+    }
+    return assignments, open_slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign festival roles from staff attendance")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--festival', choices=sorted(FESTIVAL_ROLES), default='diwali')
+    parser.add_argument('--method', choices=['auto', 'hungarian', 'greedy'], default='auto')
+    args = parser.parse_args()
+
+    store = DataStore(args.data_dir)
+    staff = store.get('staff')
+    scores = attendance_reliability(store.get('attendance'), staff['staff_id'])
+    assignments, open_slots = assign_roles(staff, scores, FESTIVAL_ROLES[args.festival], args.method)
+    print(assignments.to_string(index=False))
+    for role, count in open_slots.items():
+        print(f"{role}: {count} slot(s) unfilled")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""Daily sales forecasts per category with staffing recommendations
+
+Each column of sales.csv (daily, gold, silver, diamond and other sales) is
+fitted with the same small linear model, solved for all columns at once with
+NumPy:
+
+    sales = level + trend + weekday effect + yearly seasonality + festival month effect
+
+Yearly seasonality (two Fourier harmonics) is only fitted once the history
+spans most of a year. Festival months are the ones festival staffing already
+plans for (Diwali, New Year, Holi). A small ridge penalty keeps effects that
+the history has not seen yet (e.g. a first Diwali) at zero rather than
+unstable.
+
+The fit keeps only the normal equations (X'X, X'Y, Y'Y), so folding new or
+corrected days adds or subtracts their rows instead of refitting the whole
+history. Forecasts come with prediction intervals from the residual spread.
+
+    python forecast.py --horizon 90      # forecast from the bundled sales.csv
+"""
+import argparse
+import threading
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import DATA_DIR, DataStore
+from festival_roles import FESTIVAL_MONTHS
+from rollup import SALES_COLUMNS, daily_rollup, get_rollup_engine
+
+HORIZONS = (30, 90)
+INTERVAL_LEVEL = 0.95
+
+ANNUAL_HARMONICS = 2
+# Days of history needed before yearly seasonality is fitted
+MIN_ANNUAL_SPAN = 300
+RIDGE_PENALTY = 1.0
+
+DAYS_PER_YEAR = 365.25
+
+
+def _days(dates):
+    """Days since the epoch for a datetime column"""
+    return pd.DatetimeIndex(dates).to_numpy(dtype='datetime64[D]').astype('int64')
+
+
+def design_matrix(days, origin, annual):
+    """Model features for days (days since the epoch)"""
+    days = np.asarray(days, dtype='int64')
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64') % 12 + 1
+    # 1970-01-01 was a Thursday; Monday is the baseline weekday
+    weekday = (days + 3) % 7
+    columns = [np.ones(len(days)), (days - origin) / DAYS_PER_YEAR]
+    columns += [(weekday == d).astype('float64') for d in range(1, 7)]
+    columns += [(months == m).astype('float64') for m in FESTIVAL_MONTHS.values()]
+    if annual:
+        angle = 2 * np.pi * days / DAYS_PER_YEAR
+        for k in range(1, ANNUAL_HARMONICS + 1):
+            columns += [np.sin(k * angle), np.cos(k * angle)]
+    return np.column_stack(columns)
+
+
+class SalesForecaster:
+    def __init__(self, targets=SALES_COLUMNS, penalty=RIDGE_PENALTY):
+        self.targets = list(targets)
+        self.penalty = penalty
+        self._lock = threading.Lock()
+        # Folded history: day -> (target values, staff_count)
+        self._rows = {}
+        self._origin = None
+        self._annual = False
+        self._xtx = self._xty = self._yty = None
+        self._fit = None
+        self.full_fits = 0
+        self.days_folded = 0
+        # Bumped whenever the fitted history changes, for caches built on forecasts
+        self.version = 0
+        self.source_version = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def history(self, days=None):
+        """Folded days as a frame of date and targets, the last `days` only if given"""
+        with self._lock:
+            keys = sorted(self._rows)[-days:] if days else sorted(self._rows)
+            values = np.array([self._rows[day][0] for day in keys]).reshape(len(keys), len(self.targets))
+        frame = pd.DataFrame(values, columns=self.targets)
+        frame.insert(0, 'date', np.array(keys, dtype='int64').astype('datetime64[D]').astype('datetime64[ns]'))
+        return frame
+
+    def _reset_stats(self):
+        width = design_matrix([0], 0, self._annual).shape[1]
+        self._xtx = np.zeros((width, width))
+        self._xty = np.zeros((width, len(self.targets)))
+        self._yty = np.zeros(len(self.targets))
+
+    def _accumulate(self, days, values, sign=1.0):
+        x = design_matrix(days, self._origin, self._annual)
+        self._xtx += sign * (x.T @ x)
+        self._xty += sign * (x.T @ values)
+        self._yty += sign * (values ** 2).sum(axis=0)
+
+    def update(self, daily_df):
+        """Fold new or changed days of a daily frame, returning how many changed
+
+        `daily_df` has a date column, the target columns and staff_count (the
+        layout of sales.csv or rollup.daily_rollup). Days without sales or
+        staff are skipped.
+        """
+        frame = daily_df[daily_df[self.targets + ['staff_count']].abs().sum(axis=1) > 0]
+        days = _days(frame['date'])
+        values = frame[self.targets].to_numpy(dtype='float64')
+        staff = frame['staff_count'].to_numpy(dtype='float64')
+
+        with self._lock:
+            changed = [
+                i for i, day in enumerate(days.tolist())
+                if day not in self._rows
+                or not np.array_equal(self._rows[day][0], values[i]) or self._rows[day][1] != staff[i]
+            ]
+            if not changed:
+                return 0
+            previous = {days[i]: self._rows[days[i]] for i in changed if days[i] in self._rows}
+            for i in changed:
+                self._rows[int(days[i])] = (values[i], staff[i])
+
+            first, last = min(self._rows), max(self._rows)
+            annual = last - first >= MIN_ANNUAL_SPAN
+            if self._xtx is None or first != self._origin or annual != self._annual:
+                # Feature layout changed, rebuild the normal equations from the folded days
+                self._origin, self._annual = first, annual
+                self._reset_stats()
+                all_days = np.fromiter(self._rows, dtype='int64')
+                self._accumulate(all_days, np.array([self._rows[d][0] for d in all_days.tolist()]))
+                self.full_fits += 1
+            else:
+                if previous:
+                    self._accumulate(np.fromiter(previous, dtype='int64'),
+                                     np.array([row[0] for row in previous.values()]), sign=-1.0)
+                self._accumulate(days[changed], values[changed])
+            self.days_folded += len(changed)
+            self._fit = None
+            self.version += 1
+            return len(changed)
+
+    def _solve(self):
+        with self._lock:
+            if self._fit is not None:
+                return self._fit
+            if not self._rows:
+                raise ValueError("No sales history to forecast from")
+            width = self._xtx.shape[0]
+            ridge = np.full(width, self.penalty)
+            ridge[0] = 0.0
+            precision = self._xtx + np.diag(ridge)
+            inverse = np.linalg.pinv(precision)
+            beta = inverse @ self._xty
+            rss = self._yty - 2 * (beta * self._xty).sum(axis=0) + (beta * (self._xtx @ beta)).sum(axis=0)
+            dof = max(len(self._rows) - width, 1)
+            sigma = np.sqrt(np.clip(rss, 0, None) / dof)
+
+            staff = np.array([row[1] for row in self._rows.values()])
+            sales = np.array([row[0][0] for row in self._rows.values()])
+            worked = staff > 0
+            self._fit = {
+                'beta': beta,
+                'inverse': inverse,
+                'sigma': sigma,
+                'origin': self._origin,
+                'annual': self._annual,
+                'last_day': max(self._rows),
+                'sales_per_staff': float(np.median(sales[worked] / staff[worked])) if worked.any() else None,
+                'staff_range': (int(staff[worked].min()), int(staff[worked].max())) if worked.any() else (1, 1),
+            }
+            return self._fit
+
+    def forecast(self, horizon=HORIZONS[0], level=INTERVAL_LEVEL, max_staff=None):
+        """Forecast the `horizon` days after the last recorded day
+
+        Returns one row per day with each target, its `<target>_lower` and
+        `<target>_upper` prediction interval at `level`, and
+        recommended_staff: forecast daily sales over the historical median
+        sales per staff member, between the fewest staff ever on the floor
+        and `max_staff` (default: the most ever on the floor).
+        """
+        fit = self._solve()
+        days = fit['last_day'] + np.arange(1, horizon + 1)
+        x = design_matrix(days, fit['origin'], fit['annual'])
+        mean = x @ fit['beta']
+        leverage = np.einsum('ij,jk,ik->i', x, fit['inverse'], x)
+        spread = NormalDist().inv_cdf(0.5 + level / 2) * np.sqrt(1 + leverage)[:, None] * fit['sigma'][None, :]
+
+        frame = pd.DataFrame({'date': days.astype('datetime64[D]').astype('datetime64[ns]')})
+        for i, target in enumerate(self.targets):
+            frame[target] = mean[:, i].round()
+            frame[f"{target}_lower"] = (mean[:, i] - spread[:, i]).round()
+            frame[f"{target}_upper"] = (mean[:, i] + spread[:, i]).round()
+
+        fewest, most = fit['staff_range']
+        if fit['sales_per_staff']:
+            needed = np.ceil(frame[self.targets[0]].clip(lower=0) / fit['sales_per_staff'])
+            frame['recommended_staff'] = needed.clip(fewest, max_staff or most).astype('int64')
+        return frame
+
+
+@st.cache_resource
+def get_sales_forecaster():
+    """Process-wide SalesForecaster, folded forward from the daily rollup"""
+    return SalesForecaster()
+
+
+def load_sales_forecaster():
+    """Shared forecaster brought up to date with the recorded sales"""
+    forecaster = get_sales_forecaster()
+    rollup = get_rollup_engine()
+    daily = rollup.daily_frame()
+    # Rollup version changes with every recomputed month, skip the diff otherwise
+    if forecaster.source_version != rollup.version:
+        forecaster.update(daily)
+        forecaster.source_version = rollup.version
+    return forecaster
+
+
+def render_sales_forecast(forecaster, chart_lib):
+    """Render the sales forecast and staffing plan for the manager"""
+    st.subheader("🔮 Sales Forecast")
+
+    horizon = st.radio("Horizon", HORIZONS, format_func=lambda days: f"{days} days", horizontal=True,
+                       key="sales_forecast_horizon")
+    forecast = forecaster.forecast(horizon)
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Forecast Sales", f"₹{forecast['daily_sales'].sum():,.0f}")
+
+    with col2:
+        st.metric("Range (95%)", f"₹{forecast['daily_sales_lower'].sum():,.0f} - "
+                                 f"₹{forecast['daily_sales_upper'].sum():,.0f}")
+
+    with col3:
+        if 'recommended_staff' in forecast:
+            st.metric("Peak Staff Needed", int(forecast['recommended_staff'].max()))
+
+    figures = chart_lib.get_figure_cache()
+    entry = figures.get_or_build(
+        'sales_forecast', forecaster.version,
+        lambda horizon: chart_lib.forecast_figure(
+            forecaster.history(), forecast, 'date', 'daily_sales', f"Daily Sales, next {horizon} days"
+        ),
+        horizon=horizon
+    )
+    figures.render('sales_forecast', entry)
+
+    columns = ['date', 'daily_sales', 'daily_sales_lower', 'daily_sales_upper', 'gold_sales', 'silver_sales',
+               'diamond_sales', 'other_sales']
+    if 'recommended_staff' in forecast:
+        columns.append('recommended_staff')
+    st.dataframe(forecast[columns], use_container_width=True, hide_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast daily sales from sales.csv")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--horizon', type=int, default=HORIZONS[0])
+    args = parser.parse_args()
+
+    store = DataStore(args.data_dir)
+    forecaster = SalesForecaster()
+    forecaster.update(daily_rollup(store.get('sales'), store.get('transactions')))
+    forecast = forecaster.forecast(args.horizon)
+    print(forecast[['date', 'daily_sales', 'daily_sales_lower', 'daily_sales_upper', 'recommended_staff']]
+          .to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,236 @@
-import google.generativeai as genai
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 
+from assistant_context import build_customer_context
+from metrics import timed, timer
+from response_cache import ResponseCache, get_response_cache, make_cache_key
+
+MODEL_NAME = 'gemini-pro'
+GENERATION_CONFIG = {'max_output_tokens': 500, 'temperature': 0.7}
+
+# Upstream calls run on a bounded pool shared by every session
+ASSISTANT_WORKERS = 8
+STREAM_TIMEOUT = 60
+
+_STREAM_DONE = object()
+
+SYSTEM_PROMPT = """You are an expert AI assistant for a premium jewelry shop.
+Be helpful, professional, and knowledgeable about jewelry, jewelry care, and customer service.
+Current context: You are assisting with customer queries about jewelry products, prices, and care."""
+
 class GeminiService:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-    
+    def __init__(self, api_key: str = None, model=None, cache: ResponseCache = None):
+        """Initialize Gemini service with API key, or with an injected model object"""
+        self.cache = cache
+        if model is not None:
+            self.model = model
+            return
+
+        try:
+            # Imported here so callers injecting a model never load the SDK
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel(MODEL_NAME)
+        except Exception as e:
+            st.error(f"Failed to initialize Gemini: {str(e)}")
+            self.model = None
+
+    def build_prompt(self, query: str, customer_data: dict = None, context_text: str = ""):
+        """Assemble the prompt sent upstream
+
+        Only the customer's tier is included (not their name). Shop data from
+        assistant_context goes in `context_text`, which is part of the cache
+        key. It only holds the customer's own records for personal questions,
+        so other answers are shared by every customer of a tier.
+        """
+        system_prompt = SYSTEM_PROMPT
+        if customer_data and customer_data.get('tier'):
+            system_prompt += f"\n\nCustomer tier: {customer_data['tier']}"
+        if context_text:
+            system_prompt += f"\n\nShop records (answer from these when relevant):\n{context_text}"
+        return f"{system_prompt}\n\nCustomer Question: {query}"
+
+    def _cache_key(self, query: str, customer_data: dict = None, context_text: str = ""):
+        return make_cache_key(
+            query,
+            (customer_data or {}).get('tier'),
+            {'model': MODEL_NAME, **GENERATION_CONFIG},
+            context_text
+        )
+
+    @timed('gemini.generate')
+    def _generate(self, prompt: str):
+        response = self.model.generate_content(prompt, generation_config=GENERATION_CONFIG)
+        if response and response.text:
+            return response.text
+        return None
+
     def answer_customer_query(self, query: str, customer_data: dict = None, context_text: str = ""):
-        system_prompt = f"""You are a jewelry shop AI assistant. Be helpful and professional."""
-        full_prompt = f"{system_prompt}\n\nQuery: {query}"
-        response = self.model.generate_content(full_prompt)
-        return response.text
+        """Answer customer queries using Gemini with error handling"""
 
-def init_gemini_service():
-    if "gemini_service" not in st.session_state:
+        if not self.model:
+            return "Error: Gemini not initialized properly"
+
+        try:
+            prompt = self.build_prompt(query, customer_data, context_text)
+
+            if self.cache is None:
+                text = self._generate(prompt)
+            else:
+                key = self._cache_key(query, customer_data, context_text)
+                text = self.cache.get_or_compute(key, lambda: self._generate(prompt))
+
+            if text:
+                return text
+            else:
+                return "I apologize, I couldn't generate a response. Please try again."
+
+        except Exception as e:
+            return self._error_message(e)
+
+    def _error_message(self, error: Exception):
+        error_msg = str(error)
+        if "API key" in error_msg or "authentication" in error_msg.lower():
+            return f"Error: API key issue - {error_msg}"
+        elif "quota" in error_msg.lower():
+            return "Error: API quota exceeded. Please try again later."
+        return f"Error getting response: {error_msg}"
+
+    def answer_customer_query_async(self, query: str, customer_data: dict = None, context_text: str = ""):
+        """Run answer_customer_query on the shared worker pool, returning a Future"""
+        return get_assistant_pool().submit(self.answer_customer_query, query, customer_data, context_text)
+
+    def stream_customer_query(self, query: str, customer_data: dict = None, context_text: str = "",
+                              timeout: float = STREAM_TIMEOUT, cancel_event: threading.Event = None):
+        """Yield the answer in chunks as the model produces them
+
+        The upstream call runs on the shared pool. Closing the generator (e.g.
+        Streamlit stopping the script when the user navigates away), setting
+        `cancel_event`, or exceeding `timeout` stops reading the stream.
+        """
+        if not self.model:
+            yield "Error: Gemini not initialized properly"
+            return
+
+        prompt = self.build_prompt(query, customer_data, context_text)
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(query, customer_data, context_text)
+            cached = self.cache.get(key)
+            if cached:
+                yield cached
+                return
+
+        cancel_event = cancel_event or threading.Event()
+        chunks = queue.Queue()
+
+        def produce():
+            try:
+                # Queued behind other sessions' calls: the reader may have closed or timed out already
+                if cancel_event.is_set():
+                    return
+                with timer('gemini.stream'):
+                    response = self.model.generate_content(
+                        prompt, generation_config=GENERATION_CONFIG, stream=True
+                    )
+                    for chunk in response:
+                        if cancel_event.is_set():
+                            break
+                        text = getattr(chunk, 'text', '')
+                        if text:
+                            chunks.put(text)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(_STREAM_DONE)
+
+        get_assistant_pool().submit(produce)
+        deadline = time.monotonic() + timeout
+        parts = []
+        completed = False
         try:
-            api_key = st.secrets.get("GEMINI_API_KEY")
-            if not api_key:
-                return None
-            st.session_state.gemini_service = GeminiService(api_key)
-            return st.session_state.gemini_service
-        except:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield "\n\n_Response timed out. Please try again._"
+                    return
+                try:
+                    item = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if item is _STREAM_DONE:
+                    completed = not cancel_event.is_set()
+                    break
+                if isinstance(item, Exception):
+                    yield self._error_message(item)
+                    return
+                parts.append(item)
+                yield item
+        finally:
+            cancel_event.set()
+
+        if completed and parts and key is not None:
+            self.cache.set(key, ''.join(parts))
+        elif not parts:
+            yield "I apologize, I couldn't generate a response. Please try again."
+
+@st.cache_resource
+def get_assistant_pool():
+    """Bounded pool so queries from several sessions run side by side"""
+    return ThreadPoolExecutor(max_workers=ASSISTANT_WORKERS, thread_name_prefix='assistant')
+
+
+@st.cache_resource(max_entries=1)
+def get_gemini_service(api_key: str):
+    """Process-wide GeminiService, rebuilt only when the API key changes"""
+    service = GeminiService(api_key, cache=get_response_cache())
+    if service.model is None:
+        # Not cached, so the next call retries
+        raise RuntimeError("Gemini model could not be created")
+    return service
+
+
+def init_gemini_service():
+    """Shared Gemini service for the configured API key"""
+    try:
+        api_key = st.secrets.get("GEMINI_API_KEY")
+        if not api_key:
+            st.error("❌ GEMINI_API_KEY not found in Streamlit secrets!")
             return None
-    return st.session_state.gemini_service
+
+        return get_gemini_service(api_key)
+    except Exception as e:
+        st.error(f"Error initializing Gemini: {str(e)}")
+        return None
+
 
 def get_gemini_response(prompt: str, customer_data: dict = None, context: str = ""):
+    """Get response from Gemini with error handling"""
     service = init_gemini_service()
+
     if not service:
-        return None
+        return "Error: Gemini service not available. Please check your API key."
+
     try:
+        if not context and customer_data:
+            context = build_customer_context(customer_data, prompt)
         response = service.answer_customer_query(prompt, customer_data, context)
         return response
-    except:
-        return None
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+
+def stream_gemini_response(prompt: str, customer_data: dict = None, context: str = ""):
+    """Chunk generator for st.write_stream"""
+    service = init_gemini_service()
+
+    if not service:
+        yield "Error: Gemini service not available. Please check your API key."
+        return
+
+    if not context and customer_data:
+        context = build_customer_context(customer_data, prompt)
+    yield from service.stream_customer_query(prompt, customer_data, context)
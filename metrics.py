@@ -0,0 +1,390 @@
+"""Timings, cache hit rates and counters for the app's hot paths
+
+Instrumented code calls the module-level helpers:
+
+    @timed('staff.run_payroll')
+    def run_payroll(...): ...
+
+    with timer('csv_load.customers'):
+        ...
+
+    cache_hit('data_store') / cache_miss('data_store')
+
+Each timer keeps a fixed histogram of log-spaced buckets (four per doubling,
+1 µs to ~2 min), so p50/p95/p99 come from bucket counts in constant memory
+however many calls are recorded. Recording is off unless SHOP_METRICS=1 is
+set or a manager switches it on in the performance panel; while off the
+helpers return after one attribute check.
+
+Snapshots can be written as a Prometheus text file (for node_exporter's
+textfile collector) or appended as JSON lines. Setting SHOP_METRICS_EXPORT
+to a path (ending in .prom for Prometheus) also exports every
+SHOP_METRICS_EXPORT_INTERVAL seconds from a background thread.
+"""
+import os
+import json
+import time
+import bisect
+import functools
+import threading
+import pandas as pd
+import streamlit as st
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics')
+
+# Upper bounds in seconds; bucket i holds durations in (BOUNDS[i - 1], BOUNDS[i]]
+BUCKETS_PER_DOUBLING = 4
+BOUNDS = [1e-6 * 2 ** (i / BUCKETS_PER_DOUBLING) for i in range(27 * BUCKETS_PER_DOUBLING + 1)]
+QUANTILES = (0.5, 0.95, 0.99)
+
+EXPORT_INTERVAL = 60
+PROMETHEUS_PREFIX = 'shop'
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class _Histogram:
+    __slots__ = ('counts', 'calls', 'errors', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds, error=False):
+        self.counts[bisect.bisect_left(BOUNDS, seconds)] += 1
+        self.calls += 1
+        self.errors += error
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Duration below which a fraction q of calls fell, interpolated within its bucket"""
+        if not self.calls:
+            return 0.0
+        rank = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = BOUNDS[i - 1] if i > 0 else 0.0
+                high = BOUNDS[i] if i < len(BOUNDS) else self.max
+                # Geometric within a log-spaced bucket, linear in the first one
+                share = (rank - seen) / count
+                value = low * (high / low) ** share if low > 0 else high * share
+                return min(value, self.max)
+            seen += count
+        return self.max
+
+
+class _Timing:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, error=exc_type is not None)
+        return False
+
+
+class _NoTiming:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_TIMING = _NoTiming()
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._timers = {}
+        self._caches = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, name, seconds, error=False):
+        """Record one call of `name` that took `seconds`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._timers.get(name)
+            if histogram is None:
+                histogram = self._timers[name] = _Histogram()
+            histogram.add(seconds, error)
+
+    def timer(self, name):
+        """Context manager timing its block as one call of `name`"""
+        if not self.enabled:
+            return _NO_TIMING
+        return _Timing(self, name)
+
+    def cache(self, name, hit):
+        if not self.enabled:
+            return
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._caches.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """Timers, caches and counters recorded so far as plain dicts"""
+        with self._lock:
+            timers = {
+                name: {
+                    'calls': h.calls,
+                    'errors': h.errors,
+                    'total_ms': h.total * 1000,
+                    'mean_ms': h.total / h.calls * 1000 if h.calls else 0.0,
+                    **{f"p{round(q * 100)}_ms": h.quantile(q) * 1000 for q in QUANTILES},
+                    'max_ms': h.max * 1000,
+                }
+                for name, h in self._timers.items()
+            }
+            caches = {
+                name: {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+                for name, (hits, misses) in self._caches.items()
+            }
+            counters = dict(self._counters)
+        return {'started': self.started, 'timers': timers, 'caches': caches, 'counters': counters}
+
+    def prometheus_text(self):
+        """Snapshot in the Prometheus text exposition format"""
+        prefix = PROMETHEUS_PREFIX
+        with self._lock:
+            timers = {name: (list(h.counts), h.calls, h.errors, h.total) for name, h in self._timers.items()}
+            caches = {name: tuple(counts) for name, counts in self._caches.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            f"# HELP {prefix}_call_seconds Duration of instrumented calls",
+            f"# TYPE {prefix}_call_seconds histogram",
+        ]
+        for name, (counts, calls, _, total) in sorted(timers.items()):
+            label = f'name="{_escape(name)}"'
+            cumulative = 0
+            for i, count in enumerate(counts[:-1]):
+                cumulative += count
+                # Every doubling is enough resolution for scraping
+                if i % BUCKETS_PER_DOUBLING == 0:
+                    lines.append(f'{prefix}_call_seconds_bucket{{{label},le="{BOUNDS[i]:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_call_seconds_bucket{{{label},le="+Inf"}} {calls}')
+            lines.append(f'{prefix}_call_seconds_sum{{{label}}} {total:.9g}')
+            lines.append(f'{prefix}_call_seconds_count{{{label}}} {calls}')
+
+        lines += [f"# HELP {prefix}_call_errors_total Instrumented calls that raised",
+                  f"# TYPE {prefix}_call_errors_total counter"]
+        lines += [f'{prefix}_call_errors_total{{name="{_escape(name)}"}} {errors}'
+                  for name, (_, _, errors, _) in sorted(timers.items())]
+
+        lines += [f"# HELP {prefix}_cache_requests_total Cache lookups by result",
+                  f"# TYPE {prefix}_cache_requests_total counter"]
+        for name, (hits, misses) in sorted(caches.items()):
+            lines.append(f'{prefix}_cache_requests_total{{name="{_escape(name)}",result="hit"}} {hits}')
+            lines.append(f'{prefix}_cache_requests_total{{name="{_escape(name)}",result="miss"}} {misses}')
+
+        lines += [f"# HELP {prefix}_events_total Counted events",
+                  f"# TYPE {prefix}_events_total counter"]
+        lines += [f'{prefix}_events_total{{name="{_escape(name)}"}} {n}' for name, n in sorted(counters.items())]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Replace `path` with the current snapshot, atomically for the textfile collector"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def append_jsonl(self, path):
+        """Append one JSON line per timer, cache and counter to `path`"""
+        snapshot = self.snapshot()
+        now = time.time()
+        rows = [{'ts': now, 'kind': 'timer', 'name': name, **stats} for name, stats in snapshot['timers'].items()]
+        rows += [{'ts': now, 'kind': 'cache', 'name': name, **stats} for name, stats in snapshot['caches'].items()]
+        rows += [{'ts': now, 'kind': 'counter', 'name': name, 'count': n}
+                 for name, n in snapshot['counters'].items()]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as f:
+            f.writelines(json.dumps(row) + '\n' for row in rows)
+        return len(rows)
+
+    def export(self, path):
+        """Prometheus text for a .prom path, JSON lines otherwise"""
+        if str(path).endswith('.prom'):
+            self.write_prometheus(path)
+        else:
+            self.append_jsonl(path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# A plain module global rather than st.cache_resource: the helpers below run
+# on hot paths where even a cached-resource lookup would cost more than the call
+REGISTRY = Metrics(enabled=_env_flag('SHOP_METRICS'))
+
+
+def timed(name=None):
+    """Decorator recording every call of a function under `name` (default: its qualified name)"""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            error = True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                REGISTRY.observe(label, time.perf_counter() - start, error)
+        return wrapper
+    return decorate
+
+
+def timer(name):
+    """Context manager timing its block as one call of `name`"""
+    if not REGISTRY.enabled:
+        return _NO_TIMING
+    return _Timing(REGISTRY, name)
+
+
+def observe(name, seconds):
+    if REGISTRY.enabled:
+        REGISTRY.observe(name, seconds)
+
+
+def cache_hit(name):
+    if REGISTRY.enabled:
+        REGISTRY.cache(name, True)
+
+
+def cache_miss(name):
+    if REGISTRY.enabled:
+        REGISTRY.cache(name, False)
+
+
+def count(name, n=1):
+    if REGISTRY.enabled:
+        REGISTRY.count(name, n)
+
+
+class PeriodicExporter(threading.Thread):
+    """Daemon thread exporting a registry to a file every `interval` seconds"""
+
+    def __init__(self, registry, path, interval=EXPORT_INTERVAL):
+        super().__init__(name='metrics-exporter', daemon=True)
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if self.registry.enabled:
+                self.registry.export(self.path)
+
+    def stop(self):
+        self.stopped.set()
+
+
+_exporter = None
+
+
+def start_exporter(path, interval=EXPORT_INTERVAL):
+    """Start (once per process) the background exporter to `path`"""
+    global _exporter
+    if _exporter is None:
+        _exporter = PeriodicExporter(REGISTRY, path, interval)
+        _exporter.start()
+    return _exporter
+
+
+if os.environ.get('SHOP_METRICS_EXPORT'):
+    start_exporter(os.environ['SHOP_METRICS_EXPORT'],
+                   float(os.environ.get('SHOP_METRICS_EXPORT_INTERVAL', EXPORT_INTERVAL)))
+
+
+def render_performance_panel(registry=REGISTRY, refresh_seconds=5):
+    """Render live call timings and cache hit rates, for managers only"""
+    if st.session_state.get('user_role') != 'Manager':
+        st.warning("The performance panel is only available to managers")
+        return
+
+    st.subheader("⏱️ Performance")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        registry.enabled = st.toggle("Record timings", value=registry.enabled, key="metrics_enabled")
+
+    with col2:
+        if st.button("🔄 Reset", key="metrics_reset"):
+            registry.reset()
+
+    with col3:
+        if st.button("📤 Export Prometheus", key="metrics_export_prom"):
+            path = os.path.join(METRICS_DIR, 'shop.prom')
+            registry.write_prometheus(path)
+            st.success(f"Written to {path}")
+
+    with col4:
+        if st.button("📤 Export JSON lines", key="metrics_export_jsonl"):
+            path = os.path.join(METRICS_DIR, 'shop.jsonl')
+            rows = registry.append_jsonl(path)
+            st.success(f"{rows} rows appended to {path}")
+
+    @st.experimental_fragment(run_every=refresh_seconds if registry.enabled else None)
+    def live_numbers():
+        snapshot = registry.snapshot()
+        if not snapshot['timers'] and not snapshot['caches']:
+            st.info("Nothing recorded yet" if registry.enabled else "Switch on recording to collect timings")
+            return
+
+        since = pd.Timestamp(snapshot['started'], unit='s').strftime('%Y-%m-%d %H:%M:%S')
+        st.caption(f"Since {since} UTC, refreshed every {refresh_seconds}s")
+        if snapshot['timers']:
+            timers = pd.DataFrame.from_dict(snapshot['timers'], orient='index').rename_axis('call')
+            timers = timers.sort_values('total_ms', ascending=False).reset_index()
+            st.dataframe(timers.round(2), use_container_width=True, hide_index=True)
+        if snapshot['caches']:
+            caches = pd.DataFrame.from_dict(snapshot['caches'], orient='index').rename_axis('cache').reset_index()
+            caches['hit_rate'] = (caches['hit_rate'] * 100).round(1)
+            st.dataframe(caches, use_container_width=True, hide_index=True)
+        if snapshot['counters']:
+            st.json(snapshot['counters'])
+
+    live_numbers()
@@ -0,0 +1,148 @@
+"""Offer eligibility by date, tier and category
+
+Offers are grouped by their `applicable_to` target ('all', a tier such as
+'platinum' or a category such as 'diamond'). Within a group the validity
+windows are cut into elementary date segments at every valid_from and
+valid_to + 1, and each segment stores the offers open throughout it as a
+slice of one flat array (CSR layout), best discount first. "Which offers are
+open on this day" is then one `np.searchsorted` per group plus the slice,
+however many campaigns overlap.
+
+A customer sees the 'all' offers and the offers for their tier; an item in a
+basket can also use the offers for its category.
+"""
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import get_data_store, load_table
+
+ALL = 'all'
+
+NS_PER_DAY = 86_400 * 10**9
+
+
+def _days(dates):
+    """Days since the epoch for a datetime column or scalar"""
+    return pd.DatetimeIndex(pd.to_datetime(dates)).to_numpy(dtype='datetime64[D]').astype('int64')
+
+
+def _today(today):
+    return pd.Timestamp(today or pd.Timestamp.today()).value // NS_PER_DAY
+
+
+class _IntervalGroup:
+    """Elementary-segment index over the offers of one target"""
+
+    def __init__(self, positions, starts, ends, discounts):
+        # Segment i covers [bounds[i], bounds[i + 1])
+        self.bounds = np.unique(np.concatenate([starts, ends + 1]))
+        first = np.searchsorted(self.bounds, starts)
+        last = np.searchsorted(self.bounds, ends + 1)
+        spans = last - first
+
+        # Every (offer, segment) pair the offer spans
+        offers = np.repeat(np.arange(len(positions)), spans)
+        segments = np.repeat(first, spans) + np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        # By segment, then best discount first
+        order = np.lexsort((-discounts[offers], segments))
+        self.members = positions[offers[order]]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(segments, minlength=len(self.bounds)))])
+
+    def open_on(self, day):
+        segment = np.searchsorted(self.bounds, day, side='right') - 1
+        if segment < 0:
+            return self.members[:0]
+        return self.members[self.offsets[segment]:self.offsets[segment + 1]]
+
+
+class OfferIndex:
+    def __init__(self, offers_df):
+        self.offers = offers_df.reset_index(drop=True)
+        self.ids = self.offers['id'].to_numpy()
+        self.targets = self.offers['applicable_to'].astype(str).str.lower().to_numpy(dtype=object)
+        self.discounts = self.offers['discount_percent'].to_numpy(dtype='float64')
+        self.valid_from = _days(self.offers['valid_from'])
+        self.valid_to = _days(self.offers['valid_to'])
+        self._records = None
+        self._lock = threading.Lock()
+
+        self._groups = {}
+        for target in np.unique(self.targets):
+            positions = np.flatnonzero(self.targets == target)
+            self._groups[target] = _IntervalGroup(
+                positions, self.valid_from[positions], self.valid_to[positions], self.discounts[positions]
+            )
+
+    def __len__(self):
+        return len(self.offers)
+
+    def positions(self, targets, today=None):
+        """Row positions of the offers open today for any of `targets`"""
+        day = _today(today)
+        found = [
+            self._groups[target].open_on(day)
+            for target in dict.fromkeys(str(t).lower() for t in targets)
+            if target in self._groups
+        ]
+        return np.concatenate(found) if found else np.zeros(0, dtype='int64')
+
+    def active_positions(self, tier, today=None):
+        """Row positions of the offers open to a tier today, best discount first"""
+        positions = self.positions([ALL, tier], today)
+        return positions[np.argsort(-self.discounts[positions], kind='stable')]
+
+    def active(self, tier, today=None):
+        """Offer dicts open to a tier today, best discount first"""
+        with self._lock:
+            if self._records is None:
+                self._records = self.offers.to_dict('records')
+        return [self._records[i] for i in self.active_positions(tier, today)]
+
+    def active_mask(self, tier, today=None):
+        mask = np.zeros(len(self.offers), dtype=bool)
+        mask[self.active_positions(tier, today)] = True
+        return mask
+
+    def best_discounts(self, tier, basket, today=None):
+        """Best offer for every item of a basket in one pass
+
+        `basket` has `category` and `amount` columns (a DataFrame or a list of
+        dicts). Each item can use offers for everyone, for the customer's tier
+        or for its own category. Returns the basket with offer_id,
+        discount_percent, discount and net columns added (offer_id is -1 and
+        the discount 0 when nothing applies).
+        """
+        basket = pd.DataFrame(basket).reset_index(drop=True)
+        categories = basket['category'].astype(str).str.lower().to_numpy(dtype=object)
+        amounts = basket['amount'].to_numpy(dtype='float64')
+
+        candidates = self.positions([ALL, tier, *np.unique(categories)], today)
+        targets = self.targets[candidates]
+        shared = (targets == ALL) | (targets == str(tier).lower())
+        # items x candidate offers
+        applies = shared[None, :] | (targets[None, :] == categories[:, None])
+        discounts = np.where(applies, self.discounts[candidates][None, :], 0.0)
+
+        if len(candidates):
+            best = discounts.argmax(axis=1)
+            percent = discounts[np.arange(len(basket)), best]
+            offer_ids = np.where(percent > 0, self.ids[candidates[best]], -1)
+        else:
+            percent = np.zeros(len(basket))
+            offer_ids = np.full(len(basket), -1)
+
+        discount = np.round(amounts * percent / 100, 2)
+        return basket.assign(offer_id=offer_ids, discount_percent=percent, discount=discount,
+                             net=amounts - discount)
+
+
+@st.cache_resource
+def get_offer_index(offers_version):
+    """Shared OfferIndex, rebuilt when offers.csv is reloaded"""
+    return OfferIndex(load_table('offers'))
+
+
+def load_offer_index():
+    return get_offer_index(get_data_store().version('offers'))
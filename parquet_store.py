@@ -0,0 +1,191 @@
+"""Columnar Parquet storage for the shop tables
+
+attendance and transactions are partitioned by month (hive layout,
+``attendance/month=2025-12/``) so a read for one month only opens that
+partition. Every other table is a single Parquet file.
+
+    python parquet_store.py import            # CSV -> Parquet
+    python parquet_store.py export --out dir  # Parquet -> CSV
+"""
+import argparse
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_store import DATA_DIR, TABLE_SCHEMAS, read_table_csv
+
+PARQUET_DIR = os.path.join(DATA_DIR, 'parquet')
+
+# Table -> date column used to derive the month partition
+PARTITIONED_TABLES = {
+    'attendance': 'date',
+    'transactions': 'date',
+}
+
+PARTITION_COLUMN = 'month'
+
+# Row order of the original CSVs, restored on export
+EXPORT_ORDER = {
+    'attendance': (['staff_id', 'date'], [True, False]),
+    'transactions': (['id'], [True]),
+}
+
+
+def month_key(year, month):
+    """Partition value for a year/month"""
+    return f"{int(year)}-{int(month):02d}"
+
+
+class ParquetStore:
+    def __init__(self, root=PARQUET_DIR):
+        self.root = root
+
+    def path(self, table):
+        """Dataset path of a table (directory when partitioned)"""
+        if table in PARTITIONED_TABLES:
+            return os.path.join(self.root, table)
+        return os.path.join(self.root, f"{table}.parquet")
+
+    def exists(self, table):
+        return os.path.exists(self.path(table))
+
+    def write_table(self, table, df):
+        """Replace a table with the contents of a DataFrame"""
+        path = self.path(table)
+        if table in PARTITIONED_TABLES:
+            df = df.assign(**{PARTITION_COLUMN: df[PARTITIONED_TABLES[table]].dt.strftime('%Y-%m')})
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            pq.write_to_dataset(
+                pa.Table.from_pandas(df, preserve_index=False),
+                root_path=path,
+                partition_cols=[PARTITION_COLUMN],
+            )
+        else:
+            os.makedirs(self.root, exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+
+    def write_months(self, table, df, rows):
+        """Rewrite the month partitions `rows` fall in from the whole table `df`
+
+        Called by WriteLog.compact with the rows it merged. Each partition
+        is written beside the dataset under a hidden name and renamed into
+        place, so readers never open a half-written file.
+        """
+        path = self.path(table)
+        if table not in PARTITIONED_TABLES or not os.path.isdir(path):
+            return
+        column = PARTITIONED_TABLES[table]
+        labels = df[column].dt.strftime('%Y-%m')
+        for month in sorted(set(rows[column].dt.strftime('%Y-%m'))):
+            target = os.path.join(path, f"{PARTITION_COLUMN}={month}")
+            # Leading dot: pyarrow dataset discovery skips these
+            tmp, old = (os.path.join(path, f".{PARTITION_COLUMN}={month}.{suffix}") for suffix in ('tmp', 'old'))
+            for leftover in (tmp, old):
+                shutil.rmtree(leftover, ignore_errors=True)
+            os.makedirs(tmp)
+            month_rows = df[(labels == month).to_numpy()]
+            if table in EXPORT_ORDER:
+                by, ascending = EXPORT_ORDER[table]
+                month_rows = month_rows.sort_values(by, ascending=ascending, kind='stable')
+            pq.write_table(pa.Table.from_pandas(month_rows, preserve_index=False), os.path.join(tmp, 'part-0.parquet'))
+            if os.path.isdir(target):
+                os.replace(target, old)
+            os.replace(tmp, target)
+            shutil.rmtree(old, ignore_errors=True)
+
+    def read_table(self, table, columns=None, filters=None):
+        """Read a table with optional column projection and pushed-down filters
+
+        `filters` uses the pyarrow DNF form, e.g.
+        ``[('month', '=', '2025-12'), ('staff_id', '=', 3)]``. A filter on
+        ``month`` prunes partitions before any file is opened.
+        """
+        if columns is not None and filters:
+            # Filtered columns must be readable even when not projected
+            wanted = list(columns)
+            read_columns = wanted + [c for c, _, _ in filters if c not in wanted and c != PARTITION_COLUMN]
+        else:
+            wanted = read_columns = columns
+
+        arrow_table = pq.read_table(
+            self.path(table),
+            columns=read_columns,
+            filters=filters or None,
+        )
+        df = arrow_table.to_pandas()
+        if PARTITION_COLUMN in df.columns and table in PARTITIONED_TABLES:
+            df = df.drop(columns=PARTITION_COLUMN)
+        if wanted is not None:
+            df = df[wanted]
+        return df.reset_index(drop=True)
+
+    def read_month(self, table, year, month, columns=None, filters=None):
+        """Read a single month partition of attendance or transactions"""
+        if table not in PARTITIONED_TABLES:
+            raise ValueError(f"{table} is not partitioned by month")
+        return self.read_table(
+            table,
+            columns=columns,
+            filters=[(PARTITION_COLUMN, '=', month_key(year, month))] + list(filters or []),
+        )
+
+    def partitions(self, table):
+        """Months present in a partitioned table"""
+        path = self.path(table)
+        if not os.path.isdir(path):
+            return []
+        prefix = f"{PARTITION_COLUMN}="
+        return sorted(name[len(prefix):] for name in os.listdir(path) if name.startswith(prefix))
+
+    def import_csv(self, data_dir=DATA_DIR, tables=None):
+        """Load every CSV table into Parquet, returning row counts"""
+        counts = {}
+        for table in tables or TABLE_SCHEMAS:
+            csv_path = os.path.join(data_dir, TABLE_SCHEMAS[table]['file'])
+            if not os.path.exists(csv_path):
+                continue
+            df = read_table_csv(csv_path, table)
+            self.write_table(table, df)
+            counts[table] = len(df)
+        return counts
+
+    def export_csv(self, out_dir, tables=None):
+        """Write Parquet tables back out in the original CSV layout"""
+        os.makedirs(out_dir, exist_ok=True)
+        counts = {}
+        for table in tables or TABLE_SCHEMAS:
+            if not self.exists(table):
+                continue
+            df = self.read_table(table)
+            for col in TABLE_SCHEMAS[table]['dates']:
+                df[col] = df[col].dt.strftime('%Y-%m-%d')
+            if table in EXPORT_ORDER:
+                by, ascending = EXPORT_ORDER[table]
+                df = df.sort_values(by, ascending=ascending, kind='stable')
+            df.to_csv(os.path.join(out_dir, TABLE_SCHEMAS[table]['file']), index=False)
+            counts[table] = len(df)
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate shop tables between CSV and Parquet")
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory holding the CSV files")
+    parser.add_argument('--parquet-dir', default=PARQUET_DIR)
+    parser.add_argument('--out', help="Export directory (defaults to --data-dir)")
+    args = parser.parse_args()
+
+    store = ParquetStore(args.parquet_dir)
+    if args.command == 'import':
+        counts = store.import_csv(args.data_dir)
+    else:
+        counts = store.export_csv(args.out or args.data_dir)
+
+    for table, rows in counts.items():
+        print(f"{args.command}ed {table}: {rows} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Response cache for the AI assistant
+
+In-memory LRU with TTL, an optional SQLite disk tier shared by processes,
+and coalescing of identical in-flight requests so concurrent sessions asking
+the same question cost one upstream call.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import streamlit as st
+
+from data_store import DATA_DIR
+from metrics import cache_hit, cache_miss
+
+CACHE_DB_PATH = os.path.join(DATA_DIR, '.cache', 'gemini_responses.db')
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?.!]+$')
+
+
+def normalize_prompt(text):
+    """Case/whitespace/trailing punctuation insensitive form of a question"""
+    text = _WHITESPACE.sub(' ', str(text or '').strip().lower())
+    return _TRAILING_PUNCTUATION.sub('', text)
+
+
+def make_cache_key(query, tier=None, model_config=None, context_text=''):
+    payload = json.dumps({
+        'query': normalize_prompt(query),
+        'tier': str(tier or '').lower(),
+        'model': model_config or {},
+        'context': context_text or '',
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _DiskTier:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires REAL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None, 0
+        return row[0], row[1]
+
+    def set(self, key, value, expires):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, expires)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=512, ttl=6 * 3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._stats = {
+            'hits': 0, 'disk_hits': 0, 'misses': 0, 'coalesced': 0,
+            'evictions': 0, 'errors': 0, 'upstream_calls': 0, 'upstream_seconds': 0.0,
+        }
+
+    def _remember(self, key, value, expires):
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get(self, key):
+        """Cached value or None, checking memory then disk"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] >= now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    cache_hit('gemini_response')
+                    return entry[0]
+                del self._entries[key]
+
+        if self._disk is not None:
+            value, expires = self._disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self._remember(key, value, expires)
+                    self._stats['disk_hits'] += 1
+                cache_hit('gemini_response')
+                return value
+        cache_miss('gemini_response')
+        return None
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires)
+        if self._disk is not None:
+            self._disk.set(key, value, expires)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value or run `compute` once for all concurrent callers
+
+        Falsy results (e.g. an empty completion) are returned but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        start = time.perf_counter()
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._stats['upstream_calls'] += 1
+                self._stats['upstream_seconds'] += time.perf_counter() - start
+
+        if value:
+            self.set(key, value)
+        with self._lock:
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        """Hit/miss counters, hit rate and mean upstream latency"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_rate'] = (lookups - stats['misses']) / lookups if lookups else 0.0
+        calls = stats['upstream_calls']
+        stats['upstream_avg_ms'] = stats['upstream_seconds'] / calls * 1000 if calls else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+
+@st.cache_resource
+def get_response_cache():
+    """Process-wide response cache, with the disk tier under .cache/"""
+    return ResponseCache(disk_path=CACHE_DB_PATH)
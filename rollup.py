@@ -0,0 +1,446 @@
+"""Daily and monthly rollups of sales and transactions, materialized to summary.csv
+
+Daily figures come from the shop register (sales.csv) and the transaction
+ledger (transactions.csv); months are rolled up from the same rows. The
+engine remembers how many rows of each source it has seen, so rows appended
+through the write log only cause their own months to be recomputed, and a
+background writer merges those months into summary.csv shortly after.
+
+summary.csv holds history older than the sources, so syncing only replaces
+a month's figures where the source they come from has rows for every day
+of that month, and keeps every other month as stored.
+
+    python rollup.py sync    # merge the months the current tables cover into summary.csv
+    python rollup.py check   # compare the incremental rollup to a full recompute
+"""
+import argparse
+import os
+import sys
+import time
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import (
+    DATA_DIR, TABLE_SCHEMAS, DataStore, drop_superseded, get_data_store, read_table_csv, table_lock,
+    write_table_csv,
+)
+
+ROLLUP_SOURCES = ('sales', 'transactions')
+
+# Columns the rollups read from each source
+SOURCE_COLUMNS = {
+    'sales': ['date', 'daily_sales', 'gold_sales', 'silver_sales', 'diamond_sales', 'other_sales', 'staff_count'],
+    'transactions': ['date', 'amount', 'customer_id'],
+}
+
+SALES_COLUMNS = ['daily_sales', 'gold_sales', 'silver_sales', 'diamond_sales', 'other_sales']
+
+DAILY_COLUMNS = ['date', *SALES_COLUMNS, 'staff_count', 'transactions', 'transaction_amount']
+
+SUMMARY_COLUMNS = [
+    'month', 'total_sales', 'total_transactions', 'gold_sales', 'silver_sales',
+    'diamond_sales', 'other_sales', 'avg_transaction', 'total_customers', 'active_staff',
+]
+
+SUMMARY_DTYPES = {
+    **{column: 'int64' for column in SUMMARY_COLUMNS[1:]},
+    **TABLE_SCHEMAS['summary']['dtypes'],
+}
+
+# Seconds the background writer waits for a burst of refreshes before merging into summary.csv
+SUMMARY_DEBOUNCE = 1.0
+
+# summary.csv columns computed from each source
+SOURCE_SUMMARY_COLUMNS = {
+    'sales': ['total_sales', 'gold_sales', 'silver_sales', 'diamond_sales', 'other_sales'],
+    'transactions': ['total_transactions', 'avg_transaction'],
+}
+
+# Customer base and active staff at the end of the month
+HEADCOUNT_COLUMNS = ['total_customers', 'active_staff']
+
+
+def month_keys(dates):
+    """YYYYMM integers for a datetime column"""
+    dates = pd.DatetimeIndex(dates)
+    return (dates.year * 100 + dates.month).to_numpy(dtype='int64')
+
+
+def _month_label(key):
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def daily_rollup(sales_df, transactions_df):
+    """One row per day with register sales, staff on the floor and ledger activity"""
+    sales_df = drop_superseded(sales_df, 'sales')
+    sales = sales_df.groupby(sales_df['date'].dt.normalize()).agg(
+        **{col: (col, 'sum') for col in SALES_COLUMNS},
+        staff_count=('staff_count', 'max'),
+    )
+    ledger = transactions_df.groupby(transactions_df['date'].dt.normalize()).agg(
+        transactions=('amount', 'size'),
+        transaction_amount=('amount', 'sum'),
+    )
+    daily = sales.join(ledger, how='outer').fillna(0).astype('int64')
+    daily.index.name = 'date'
+    return daily.reset_index()[DAILY_COLUMNS]
+
+
+def headcount_dates(customers_df=None, staff_df=None):
+    """Sorted start dates behind each headcount column, for tables that are given"""
+    dates = {}
+    if customers_df is not None:
+        dates['total_customers'] = np.sort(customers_df['joined_date'].dropna().to_numpy(dtype='datetime64[ns]'))
+    if staff_df is not None:
+        staff = staff_df[staff_df['status'] == 'active'] if 'status' in staff_df.columns else staff_df
+        dates['active_staff'] = np.sort(staff['hire_date'].dropna().to_numpy(dtype='datetime64[ns]'))
+    return dates
+
+
+def headcounts(months, customers_df=None, staff_df=None, dates=None):
+    """total_customers and active_staff at the end of each month key
+
+    total_customers counts customers who joined by the end of the month and
+    active_staff the staff currently active who were hired by then. A column
+    is 0 when its table is not given. `dates` (from headcount_dates) can be
+    passed instead of the tables.
+    """
+    months = np.asarray(months, dtype='int64')
+    ends = (pd.to_datetime([_month_label(key) for key in months.tolist()]) + pd.offsets.MonthBegin(1)).to_numpy()
+    if dates is None:
+        dates = headcount_dates(customers_df, staff_df)
+    counts = pd.DataFrame(0, index=months, columns=HEADCOUNT_COLUMNS, dtype='int64')
+    for column, starts in dates.items():
+        counts[column] = np.searchsorted(starts, ends, side='left')
+    return counts
+
+
+def monthly_rollup(sales_df, transactions_df, customers_df=None, staff_df=None):
+    """Rows in the layout of summary.csv
+
+    Sales columns sum the register, total_transactions counts ledger rows and
+    avg_transaction is their mean amount. The headcount columns come from
+    `headcounts` and are 0 unless customers and staff are given.
+    """
+    sales_df = drop_superseded(sales_df, 'sales')
+    sales = sales_df.groupby(month_keys(sales_df['date'])).agg(
+        **{col: (col, 'sum') for col in SALES_COLUMNS},
+    )
+    ledger = transactions_df.groupby(month_keys(transactions_df['date'])).agg(
+        total_transactions=('amount', 'size'),
+        transaction_amount=('amount', 'sum'),
+    )
+    monthly = sales.join(ledger, how='outer').fillna(0).astype('int64').sort_index()
+    monthly = monthly.rename(columns={'daily_sales': 'total_sales'})
+    count = monthly['total_transactions']
+    monthly['avg_transaction'] = (monthly['transaction_amount'] / count.where(count > 0)).round().fillna(0) \
+        .astype('int64')
+    monthly[HEADCOUNT_COLUMNS] = headcounts(monthly.index, customers_df, staff_df)
+    monthly['month'] = [_month_label(key) for key in monthly.index]
+    return monthly.astype({'total_transactions': 'int32', 'active_staff': 'int32'})[SUMMARY_COLUMNS]
+
+
+def covered_months(dates):
+    """Labels of the months a source fully covers: it has rows on every day of them
+
+    A sample of the ledger, or the month to date, does not hold a whole
+    month, so that month's stored figures are left alone.
+    """
+    if len(dates) == 0:
+        return []
+    days = pd.DatetimeIndex(np.unique(pd.DatetimeIndex(dates).to_numpy(dtype='datetime64[D]')))
+    counts = pd.Series(days.to_period('M')).value_counts()
+    full = counts.index[counts.to_numpy() == counts.index.days_in_month]
+    return sorted(str(month) for month in full)
+
+
+def merge_summary(current, monthly, covered):
+    """summary.csv rows with recomputed `monthly` rows merged in
+
+    `covered` maps each source to the month labels it covers. A month's
+    columns from a source are only replaced where that source covers the
+    month, and its headcounts whenever either does; months missing from
+    `current` are added and all others keep their stored figures.
+    """
+    stored = current.set_index('month')
+    fresh = monthly.set_index('month')
+    merged = stored.reindex(stored.index.union(fresh.index))
+    incoming = fresh.reindex(merged.index)
+    recomputed = merged.index.isin(fresh.index)
+    added = recomputed & ~merged.index.isin(stored.index)
+    updated = added.copy()
+    # Whole columns through np.where: label-aligned .loc assignment costs more than the data here
+    for table, columns in SOURCE_SUMMARY_COLUMNS.items():
+        take = added | (recomputed & merged.index.isin(covered.get(table, [])))
+        updated |= take
+        for column in columns:
+            merged[column] = np.where(take, incoming[column], merged[column])
+    for column in HEADCOUNT_COLUMNS:
+        merged[column] = np.where(updated, incoming[column], merged[column])
+    # np.where over the NaN-reindexed columns yields floats
+    return merged.reset_index()[SUMMARY_COLUMNS].astype(SUMMARY_DTYPES)
+
+
+class RollupEngine:
+    def __init__(self, store: DataStore):
+        self.store = store
+        self.daily = pd.DataFrame(columns=DAILY_COLUMNS)
+        self.monthly = pd.DataFrame(columns=SUMMARY_COLUMNS)
+        # Per source: (store version, rows folded in, {month key: row position arrays})
+        self._watermarks = {}
+        self._lock = threading.Lock()
+        self.full_rebuilds = 0
+        # Bumped whenever the rollups change, for caches built on top of them
+        self.version = 0
+        self._headcounts = (None, None)
+        self._headcount_dates = (None, None)
+        # Months waiting for the background summary writer
+        self._summary_months = set()
+        self._summary_lock = threading.Lock()
+        self._summary_wake = threading.Event()
+        self._summary_writer = None
+
+    def _frames(self):
+        return {table: self.store.get(table) for table in ROLLUP_SOURCES}
+
+    def refresh(self):
+        """Bring the rollups up to date, returning the month keys recomputed
+
+        Months recomputed from new rows are handed to the background summary
+        writer, so chart renders never wait on summary.csv. A full rebuild
+        queues the months whose figures changed, except the first one of the
+        engine, which only reads. Months still queued when the process exits
+        are picked up by the next `sync_summary`.
+        """
+        with self._lock:
+            frames = self._frames()
+            stale = set()
+            rebuild = False
+            for table, df in frames.items():
+                version = self.store.base_version(table)
+                seen = self._watermarks.get(table)
+                if seen is None or seen[0] != version or len(df) < seen[1]:
+                    rebuild = True
+                elif len(df) > seen[1]:
+                    stale.update(np.unique(month_keys(df['date'].iloc[seen[1]:])).tolist())
+
+            if rebuild:
+                previous = self.monthly if self._watermarks else None
+                self._rebuild(frames)
+                months = [int(month.replace('-', '')) for month in self.monthly['month']]
+                if previous is None:
+                    return months
+                before = previous.set_index('month').reindex(self.monthly['month'])
+                changed = ~(before == self.monthly.set_index('month')).all(axis=1)
+                stale = {int(month.replace('-', '')) for month in changed.index[changed.to_numpy()]}
+            elif stale:
+                self._recompute(frames, sorted(stale))
+                months = sorted(stale)
+            else:
+                return []
+
+        if stale:
+            self._schedule_summary(stale)
+        return months
+
+    def _schedule_summary(self, months):
+        with self._summary_lock:
+            self._summary_months.update(months)
+            if self._summary_writer is None or not self._summary_writer.is_alive():
+                self._summary_writer = threading.Thread(
+                    target=self._run_summary_writer, name="summary-writer", daemon=True
+                )
+                self._summary_writer.start()
+        self._summary_wake.set()
+
+    def _run_summary_writer(self):
+        while True:
+            self._summary_wake.wait()
+            # Let a burst of appends settle into one merge
+            time.sleep(SUMMARY_DEBOUNCE)
+            self._summary_wake.clear()
+            try:
+                self.flush_summary()
+            except Exception:
+                # The months stay queued, retry on the next refresh
+                pass
+
+    def flush_summary(self):
+        """Merge the queued months into summary.csv now, returning the labels changed"""
+        with self._summary_lock:
+            months, self._summary_months = self._summary_months, set()
+        if not months:
+            return []
+        try:
+            return self._write_summary(sorted(months))
+        except Exception:
+            with self._summary_lock:
+                self._summary_months.update(months)
+            raise
+
+    def _advance(self, frames):
+        for table, df in frames.items():
+            version = self.store.base_version(table)
+            seen = self._watermarks.get(table)
+            if seen is not None and seen[0] == version and len(df) >= seen[1]:
+                start, positions = seen[1], seen[2]
+            else:
+                start, positions = 0, {}
+            keys = month_keys(df['date'].iloc[start:])
+            order = np.argsort(keys, kind='stable')
+            months, bounds = np.unique(keys[order], return_index=True)
+            for month, chunk in zip(months.tolist(), np.split(order + start, bounds[1:])):
+                positions.setdefault(month, []).append(chunk)
+            self._watermarks[table] = (version, len(df), positions)
+
+    def _rebuild(self, frames):
+        self.daily = daily_rollup(frames['sales'], frames['transactions'])
+        self.monthly = monthly_rollup(frames['sales'], frames['transactions'])
+        self.full_rebuilds += 1
+        self.version += 1
+        self._advance(frames)
+
+    def _recompute(self, frames, months):
+        """Replace the rows of `months` from just those months' source rows"""
+        self._advance(frames)
+        subsets = {}
+        for table, df in frames.items():
+            positions = self._watermarks[table][2]
+            rows = [chunk for month in months for chunk in positions.get(month, [])]
+            df = df[SOURCE_COLUMNS[table]]
+            subsets[table] = df.take(np.concatenate(rows)) if rows else df.iloc[:0]
+        daily = daily_rollup(subsets['sales'], subsets['transactions'])
+        monthly = monthly_rollup(subsets['sales'], subsets['transactions'])
+
+        keep_days = ~np.isin(month_keys(self.daily['date']), months)
+        self.daily = pd.concat([self.daily[keep_days], daily], ignore_index=True) \
+            .sort_values('date', kind='stable').reset_index(drop=True)
+        keep_months = ~self.monthly['month'].isin([_month_label(m) for m in months])
+        self.monthly = pd.concat([self.monthly[keep_months], monthly], ignore_index=True) \
+            .sort_values('month', kind='stable').reset_index(drop=True)
+        self.version += 1
+
+    def daily_frame(self, start=None, end=None):
+        """Daily rollup between two dates (inclusive)"""
+        self.refresh()
+        daily = self.daily
+        if start is not None:
+            daily = daily[daily['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            daily = daily[daily['date'] <= pd.Timestamp(end)]
+        return daily
+
+    def monthly_frame(self):
+        """Monthly rollup in the layout of summary.csv, headcounts included"""
+        self.refresh()
+        tables = (self.store.version('customers'), self.store.version('staff'))
+        if self._headcount_dates[0] != tables:
+            self._headcount_dates = (tables, headcount_dates(self.store.get('customers'), self.store.get('staff')))
+        key = (self.version, tables)
+        if self._headcounts[0] != key:
+            monthly = self.monthly.copy()
+            counts = headcounts(month_keys(pd.to_datetime(monthly['month'])), dates=self._headcount_dates[1])
+            monthly[HEADCOUNT_COLUMNS] = counts.to_numpy()
+            self._headcounts = (key, monthly.astype({'active_staff': 'int32'}))
+        return self._headcounts[1]
+
+    def _write_summary(self, months=None):
+        """Merge the monthly rollup (or just `months`) into summary.csv, returning the labels changed
+
+        The file is reread and replaced under the summary table lock, so
+        concurrent syncs never interleave and readers never see a partial file.
+        """
+        monthly = self.monthly_frame()
+        if months is not None:
+            monthly = monthly[monthly['month'].isin([_month_label(key) for key in months])]
+        covered = {table: covered_months(self._source_dates(table, months)) for table in ROLLUP_SOURCES}
+
+        path = self.store.path('summary')
+        with table_lock(self.store.data_dir, 'summary'):
+            if os.path.exists(path):
+                current = read_table_csv(path, 'summary')
+            else:
+                current = monthly.iloc[:0]
+            merged = merge_summary(current, monthly, covered)
+            stored = current.set_index('month').reindex(merged['month'])
+            changed = merged['month'][~(stored == merged.set_index('month')).all(axis=1).to_numpy()].tolist()
+            if not changed and len(merged) == len(current):
+                return []
+            tmp = f"{path}.tmp"
+            write_table_csv(merged, tmp)
+            with open(tmp, 'rb+') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        return changed
+
+    def _source_dates(self, table, months=None):
+        """Dates of a source's rows, only those in `months` when the row positions allow"""
+        df = self.store.get(table)
+        with self._lock:
+            seen = self._watermarks.get(table)
+            if months is None or seen is None or seen[0] != self.store.base_version(table):
+                return df['date']
+            rows = [chunk for month in months for chunk in seen[2].get(month, [])]
+        return df['date'].take(np.concatenate(rows)) if rows else df['date'].iloc[:0]
+
+    def sync_summary(self):
+        """Merge every month the sources cover into summary.csv, returning the labels changed"""
+        self.refresh()
+        return self._write_summary()
+
+    def check_consistency(self):
+        """Months where the incremental rollup differs from a full recompute"""
+        self.refresh()
+        with self._lock:
+            frames = self._frames()
+            incremental = self.monthly.set_index('month')
+            daily = self.daily.set_index('date')
+        expected = monthly_rollup(frames['sales'], frames['transactions']).set_index('month')
+        expected_daily = daily_rollup(frames['sales'], frames['transactions']).set_index('date')
+
+        months = incremental.index.union(expected.index)
+        a = incremental.reindex(months).astype('float64')
+        b = expected.reindex(months).astype('float64')
+        mismatched = set(months[~((a == b) | (a.isna() & b.isna())).all(axis=1)])
+
+        days = daily.index.union(expected_daily.index)
+        a = daily.reindex(days).astype('float64')
+        b = expected_daily.reindex(days).astype('float64')
+        bad_days = days[~((a == b) | (a.isna() & b.isna())).all(axis=1)]
+        mismatched.update(bad_days.strftime('%Y-%m'))
+        return sorted(mismatched)
+
+
+@st.cache_resource
+def get_rollup_engine():
+    """Shared RollupEngine over the process-wide DataStore"""
+    return RollupEngine(get_data_store())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize monthly rollups into summary.csv")
+    parser.add_argument('command', choices=['sync', 'check'])
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    engine = RollupEngine(DataStore(args.data_dir))
+    if args.command == 'sync':
+        changed = engine.sync_summary()
+        if changed:
+            print(f"summary.csv updated: {', '.join(changed)}")
+        else:
+            print("summary.csv already up to date")
+        return
+
+    engine.refresh()
+    mismatched = engine.check_consistency()
+    if mismatched:
+        print(f"rollup differs from full recompute in: {', '.join(mismatched)}")
+        sys.exit(1)
+    print(f"rollup consistent ({len(engine.monthly)} months, {len(engine.daily)} days)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+"""RFM scores, segments and tiers for every customer
+
+Recency (days since the last sale), frequency (number of sales) and monetary
+value (total sales) are kept as flat arrays with one slot per customer.
+Scores are quintiles of each metric among customers who have bought
+anything, computed with one `np.quantile` and one `np.searchsorted` per
+metric, and the combined R+F+M score maps to the tiers used in
+customers.csv.
+
+New transactions only touch their customers' slots and are rescored against
+the current bin edges; `rebin()` recomputes the edges for everyone.
+
+    python segmentation.py report   # tier changes against customers.csv
+    python segmentation.py sync     # write the recomputed tiers to customers.csv
+"""
+import argparse
+import os
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import DATA_DIR, DataStore, get_data_store, load_table, read_table_csv, recover_compaction, \
+    table_lock, write_table_csv
+
+RFM_BINS = 5
+
+# Lowest combined R+F+M score of each tier, best first
+TIER_THRESHOLDS = [('Platinum', 13), ('Gold', 10), ('Silver', 7), ('Standard', 0)]
+
+NO_PURCHASES = 'No Purchases'
+
+SCORE_COLUMNS = [
+    'customer_id', 'recency_days', 'frequency', 'monetary', 'r', 'f', 'm', 'rfm_score', 'segment', 'tier',
+]
+
+_NO_SALE = np.iinfo('int64').min
+
+
+def _days(dates):
+    """Days since the epoch for a datetime column"""
+    return pd.DatetimeIndex(dates).to_numpy(dtype='datetime64[D]').astype('int64')
+
+
+def _edges(values, bins):
+    return np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]) if len(values) else np.zeros(bins - 1)
+
+
+def _segments(r, f, m, bought):
+    """Segment name per customer from its 1..5 scores"""
+    return np.select(
+        [~bought, (r >= 4) & (f >= 4) & (m >= 4), (f >= 4) & (m >= 3), (r >= 4) & (f <= 2),
+         (r <= 2) & (f >= 3), r <= 2],
+        [NO_PURCHASES, 'Champions', 'Loyal', 'New', 'At Risk', 'Hibernating'],
+        default='Promising',
+    )
+
+
+def _tiers(score):
+    names = np.array([tier for tier, _ in TIER_THRESHOLDS][::-1], dtype=object)
+    floors = np.array([floor for _, floor in TIER_THRESHOLDS][::-1])
+    return names[np.searchsorted(floors, score, side='right') - 1]
+
+
+class RFMEngine:
+    def __init__(self, customers_df, transactions_df, as_of=None, bins=RFM_BINS):
+        self.bins = bins
+        self._lock = threading.RLock()
+        order = np.argsort(customers_df['id'].to_numpy(dtype='int64'), kind='stable')
+        self.ids = customers_df['id'].to_numpy(dtype='int64')[order]
+        self.current_tiers = customers_df['tier'].astype(str).to_numpy(dtype=object)[order]
+        self.last_sale = np.full(len(self.ids), _NO_SALE, dtype='int64')
+        self.frequency = np.zeros(len(self.ids), dtype='int64')
+        self.monetary = np.zeros(len(self.ids), dtype='int64')
+        self.customers_seen = len(customers_df)
+        self.transactions_seen = 0
+
+        sales = self._sales(transactions_df)
+        positions, found = self._positions(sales['customer_id'])
+        positions = positions[found]
+        self.frequency += np.bincount(positions, minlength=len(self.ids))
+        self.monetary += np.bincount(
+            positions, weights=sales['amount'].to_numpy(dtype='float64')[found], minlength=len(self.ids)
+        ).astype('int64')
+        np.maximum.at(self.last_sale, positions, _days(sales['date'])[found])
+        self.transactions_seen = len(transactions_df)
+
+        # Without an explicit as_of, recency is measured from the latest sale folded in
+        self.follow_latest = as_of is None
+        if as_of is None:
+            bought = self.last_sale[self.last_sale != _NO_SALE]
+            as_of = pd.Timestamp(int(bought.max()), unit='D') if len(bought) else pd.Timestamp.today()
+        self.rebin(as_of)
+
+    @staticmethod
+    def _sales(transactions_df):
+        sales = transactions_df['type'] == 'sale'
+        return transactions_df.loc[sales, ['customer_id', 'date', 'amount']]
+
+    def _positions(self, customer_ids):
+        """Slots of customer ids, and whether each id is known"""
+        customer_ids = np.asarray(customer_ids, dtype='int64')
+        if len(self.ids) and self.ids[-1] - self.ids[0] + 1 == len(self.ids):
+            # Ids 1..n without gaps (the usual case) are their own slots
+            positions = customer_ids - self.ids[0]
+            found = (positions >= 0) & (positions < len(self.ids))
+            return np.where(found, positions, 0), found
+        positions = np.searchsorted(self.ids, customer_ids)
+        clipped = np.minimum(positions, max(len(self.ids) - 1, 0))
+        found = (positions < len(self.ids)) & (self.ids[clipped] == customer_ids) if len(self.ids) else \
+            np.zeros(len(customer_ids), dtype=bool)
+        return clipped, found
+
+    def rebin(self, as_of=None):
+        """Recompute the bin edges from every customer and rescore them all"""
+        with self._lock:
+            if as_of is not None:
+                self.as_of = pd.Timestamp(as_of).normalize()
+            self._today = _days([self.as_of])[0]
+            bought = self.last_sale != _NO_SALE
+            self._edges = {
+                'r': _edges(self.last_sale[bought] - self._today, self.bins),
+                'f': _edges(self.frequency[bought], self.bins),
+                'm': _edges(self.monetary[bought], self.bins),
+            }
+            self._score(slice(None))
+
+    def _score(self, slots):
+        bought = self.last_sale[slots] != _NO_SALE
+        # Recency is binned on -days so more recent scores higher
+        r = np.searchsorted(self._edges['r'], self.last_sale[slots] - self._today, side='right') + 1
+        f = np.searchsorted(self._edges['f'], self.frequency[slots], side='right') + 1
+        m = np.searchsorted(self._edges['m'], self.monetary[slots], side='right') + 1
+        r, f, m = (np.where(bought, score, 0) for score in (r, f, m))
+        if isinstance(slots, slice):
+            self.r, self.f, self.m = r, f, m
+            self.segment = _segments(r, f, m, bought).astype(object)
+            self.tier = _tiers(r + f + m)
+        else:
+            self.r[slots], self.f[slots], self.m[slots] = r, f, m
+            self.segment[slots] = _segments(r, f, m, bought)
+            self.tier[slots] = _tiers(r + f + m)
+
+    def add_transactions(self, rows):
+        """Fold new transactions into their customers and rescore only them
+
+        Returns the tier changes among the touched customers, see tier_changes.
+        An engine following the latest sale rebins everyone when a sale
+        arrives after its as_of, so recency never goes negative.
+        """
+        rows = pd.DataFrame(rows)
+        if rows.empty:
+            return self._changes(np.zeros(0, dtype='int64'))
+        sales = self._sales(rows)
+        positions, found = self._positions(sales['customer_id'])
+        positions = positions[found]
+        with self._lock:
+            np.add.at(self.frequency, positions, 1)
+            np.add.at(self.monetary, positions, sales['amount'].to_numpy(dtype='int64')[found])
+            np.maximum.at(self.last_sale, positions, _days(pd.to_datetime(sales['date']))[found])
+            touched = np.unique(positions)
+            latest = self.last_sale[touched].max() if len(touched) else _NO_SALE
+            if self.follow_latest and latest > self._today:
+                self.rebin(pd.Timestamp(int(latest), unit='D'))
+            else:
+                self._score(touched)
+        return self._changes(touched)
+
+    def add_customers(self, customers_df):
+        """Give newly registered customers a slot (ids must be above the known ones)"""
+        ids = customers_df['id'].to_numpy(dtype='int64')
+        if len(ids) == 0:
+            return
+        if len(self.ids) and ids.min() <= self.ids[-1] or np.any(np.diff(ids) <= 0):
+            raise ValueError("New customer ids must be increasing and above existing ids")
+        empty = np.zeros(len(ids), dtype='int64')
+        with self._lock:
+            self.ids = np.concatenate([self.ids, ids])
+            self.current_tiers = np.concatenate([
+                self.current_tiers, customers_df['tier'].astype(str).to_numpy(dtype=object)
+            ])
+            self.last_sale = np.concatenate([self.last_sale, np.full(len(ids), _NO_SALE, dtype='int64')])
+            self.frequency = np.concatenate([self.frequency, empty])
+            self.monetary = np.concatenate([self.monetary, empty])
+            self.r, self.f, self.m = (np.concatenate([score, empty]) for score in (self.r, self.f, self.m))
+            self.segment = np.concatenate([self.segment, np.full(len(ids), NO_PURCHASES, dtype=object)])
+            self.tier = np.concatenate([self.tier, _tiers(empty)])
+
+    def catch_up(self, customers_df, transactions_df):
+        """Fold rows appended to the tables since the engine last saw them"""
+        # Sessions share the engine: check and advance the watermarks as one step
+        with self._lock:
+            if len(customers_df) > self.customers_seen:
+                self.add_customers(customers_df.iloc[self.customers_seen:])
+                self.customers_seen = len(customers_df)
+            if len(transactions_df) > self.transactions_seen:
+                self.add_transactions(transactions_df.iloc[self.transactions_seen:])
+                self.transactions_seen = len(transactions_df)
+        return self
+
+    def _changes(self, slots):
+        changed = slots[self.tier[slots] != self.current_tiers[slots]]
+        return pd.DataFrame({
+            'customer_id': self.ids[changed],
+            'previous_tier': self.current_tiers[changed],
+            'tier': self.tier[changed],
+            'segment': self.segment[changed],
+        })
+
+    def tier_changes(self):
+        """Customers whose recomputed tier differs from customers.csv"""
+        return self._changes(np.arange(len(self.ids)))
+
+    def tiers(self):
+        """Recomputed tier per customer id"""
+        return pd.Series(self.tier, index=pd.Index(self.ids, name='customer_id'), name='tier')
+
+    def customers_in_tier(self, tier):
+        """Ids of the customers currently in a tier (case-insensitive)"""
+        return self.ids[np.char.lower(self.tier.astype(str)) == str(tier).lower()]
+
+    def scores(self):
+        """One row per customer in the layout of SCORE_COLUMNS"""
+        bought = self.last_sale != _NO_SALE
+        return pd.DataFrame({
+            'customer_id': self.ids,
+            # NaN for customers without purchases, so averages only cover buyers
+            'recency_days': np.where(bought, self._today - self.last_sale, np.nan),
+            'frequency': self.frequency,
+            'monetary': self.monetary,
+            'r': self.r,
+            'f': self.f,
+            'm': self.m,
+            'rfm_score': self.r + self.f + self.m,
+            'segment': self.segment,
+            'tier': self.tier,
+        })[SCORE_COLUMNS]
+
+    def segment_summary(self):
+        scores = self.scores()
+        return scores.groupby('segment').agg(
+            customers=('customer_id', 'size'),
+            avg_recency_days=('recency_days', 'mean'),
+            avg_frequency=('frequency', 'mean'),
+            total_monetary=('monetary', 'sum'),
+        ).round(1).sort_values('total_monetary', ascending=False).reset_index()
+
+
+def write_tiers(data_dir, tiers):
+    """Rewrite the tier column of customers.csv from a Series keyed by customer id
+
+    Rows still in the customers write log keep their tier; compact the log
+    first to include them. A compaction running meanwhile notices the CSV
+    changed under it and merges again later.
+    """
+    path = os.path.join(data_dir, 'customers.csv')
+    with table_lock(data_dir, 'customers'):
+        # Finish an interrupted compaction before its merged CSV is rewritten
+        recover_compaction(data_dir, 'customers', path)
+        customers = read_table_csv(path, 'customers')
+        previous = customers['tier'].astype(str)
+        tier = customers['id'].map(tiers).fillna(previous)
+        changed = int((tier != previous).sum())
+        customers['tier'] = tier
+        tmp = f"{path}.tiers.tmp"
+        write_table_csv(customers, tmp)
+        with open(tmp, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    return changed
+
+
+@st.cache_resource
+def get_rfm_engine(customers_version, transactions_version):
+    """Shared RFMEngine, rebuilt when customers or transactions is reloaded"""
+    return RFMEngine(load_table('customers'), load_table('transactions'))
+
+
+def load_rfm_engine():
+    store = get_data_store()
+    engine = get_rfm_engine(store.base_version('customers'), store.base_version('transactions'))
+    return engine.catch_up(store.get('customers'), store.get('transactions'))
+
+
+def render_segments(engine):
+    """Render customer segments and pending tier changes for the manager"""
+    st.subheader("🎯 Customer Segments")
+
+    summary = engine.segment_summary()
+    changes = engine.tier_changes()
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Customers", len(engine.ids))
+
+    with col2:
+        st.metric("Champions", int(summary.loc[summary['segment'] == 'Champions', 'customers'].sum()))
+
+    with col3:
+        st.metric("Tier Changes", len(changes))
+
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    st.write("**Tier Changes**")
+    st.dataframe(changes.head(200), use_container_width=True, hide_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute customer tiers from RFM scores")
+    parser.add_argument('command', choices=['report', 'sync'])
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--as-of')
+    args = parser.parse_args()
+
+    store = DataStore(args.data_dir)
+    engine = RFMEngine(store.get('customers'), store.get('transactions'), as_of=args.as_of)
+    changes = engine.tier_changes()
+    print(engine.segment_summary().to_string(index=False))
+    print(f"\n{len(changes)} of {len(engine.ids)} customers change tier")
+    if args.command == 'sync' and len(changes):
+        print(f"customers.csv updated ({write_tiers(args.data_dir, engine.tiers())} tiers changed)")
+
+
+if __name__ == '__main__':
+    main()
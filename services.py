@@ -0,0 +1,47 @@
+"""Lazily loaded AI, WhatsApp and charting modules
+
+google.generativeai, plotly and requests together cost well over a second
+to import. Pages reach them through these facades instead, so a script run
+that never shows a chart or talks to an API (e.g. the login page) never
+imports them. Each module is imported once per process on first use.
+"""
+import importlib
+import streamlit as st
+
+
+@st.cache_resource
+def load_module(name):
+    """Import a module on first use, shared by every session"""
+    return importlib.import_module(name)
+
+
+def gemini():
+    """The gemini_service module"""
+    return load_module('gemini_service')
+
+
+def whatsapp():
+    """The whatsapp_service module"""
+    return load_module('whatsapp_service')
+
+
+def campaigns():
+    """The campaign_dispatcher module"""
+    return load_module('campaign_dispatcher')
+
+
+def charts():
+    """The charts module"""
+    return load_module('charts')
+
+
+def get_gemini_response(prompt: str, customer_data: dict = None, context: str = ""):
+    return gemini().get_gemini_response(prompt, customer_data, context)
+
+
+def stream_gemini_response(prompt: str, customer_data: dict = None, context: str = ""):
+    return gemini().stream_gemini_response(prompt, customer_data, context)
+
+
+def send_whatsapp_message(phone: str, message: str):
+    return whatsapp().send_whatsapp_message(phone, message)
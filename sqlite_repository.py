@@ -0,0 +1,241 @@
+"""Indexed SQLite mirror of the shop tables
+
+Selected with ``DATA_BACKEND = "sqlite"`` (env var or Streamlit secret) as an
+alternative to filtering the cached pandas tables: the credential index then
+resolves logins here instead of loading every account, and the write log
+mirrors appended rows into it. Lookups use fixed, parameterized SQL so each
+thread's connection reuses its prepared statements.
+
+    python sqlite_repository.py import   # (re)build shop.db from the CSVs
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import pandas as pd
+import streamlit as st
+
+from data_store import (
+    DATA_DIR, TABLE_SCHEMAS, DataStore, coerce_rows, drop_superseded, get_data_backend, get_data_store,
+)
+
+DB_PATH = os.path.join(DATA_DIR, 'shop.db')
+
+INDEXES = {
+    'idx_users_username': 'users (username)',
+    'idx_customers_mobile': 'customers (mobile)',
+    'idx_customers_username': 'customers (username)',
+    'idx_staff_staff_id': 'staff (staff_id)',
+    'idx_staff_username': 'staff (username)',
+    'idx_staff_mobile': 'staff (mobile)',
+    'idx_transactions_customer_date': 'transactions (customer_id, date)',
+    'idx_chit_members_chit': 'chit_members (chit_id, customer_id)',
+}
+
+# One row per key of the tables declaring a `unique` key, as drop_superseded keeps in the CSVs
+UNIQUE_INDEXES = {
+    f"uq_{table}_{'_'.join(schema['unique'])}": (table, schema['unique'])
+    for table, schema in TABLE_SCHEMAS.items() if schema.get('unique')
+}
+
+SQL_USER_BY_USERNAME = "SELECT * FROM users WHERE username = ?"
+SQL_CUSTOMER_BY_MOBILE = "SELECT * FROM customers WHERE mobile = ?"
+SQL_CUSTOMER_EXISTS = "SELECT 1 FROM customers WHERE mobile = ? LIMIT 1"
+SQL_STAFF_BY_ID = "SELECT * FROM staff WHERE staff_id = ?"
+SQL_STAFF_BY_USERNAME = "SELECT * FROM staff WHERE username = ?"
+SQL_ATTENDANCE_RANGE = (
+    "SELECT * FROM attendance WHERE staff_id = ? AND date >= ? AND date < ? ORDER BY date DESC"
+)
+SQL_ATTENDANCE_SUMMARY = (
+    "SELECT status, COUNT(*) FROM attendance "
+    "WHERE staff_id = ? AND date >= ? AND date < ? GROUP BY status"
+)
+SQL_TRANSACTIONS_RANGE = (
+    "SELECT * FROM transactions WHERE customer_id = ? AND date >= ? AND date < ? ORDER BY date DESC"
+)
+SQL_CHIT_MEMBERS = "SELECT * FROM chit_members WHERE chit_id = ?"
+
+# Login lookups per credential realm: (table, SQL, number of login parameters)
+SQL_LOGIN = {
+    'user': ('users', "SELECT * FROM users WHERE username = ? LIMIT 1", 1),
+    'staff': ('staff', "SELECT * FROM staff WHERE username = ? OR mobile = ? LIMIT 1", 2),
+    'customer': ('customers', "SELECT * FROM customers WHERE username = ? OR mobile = ? LIMIT 1", 2),
+}
+
+
+def _month_bounds(year, month):
+    start = pd.Timestamp(year=int(year), month=int(month), day=1)
+    end = start + pd.offsets.MonthBegin(1)
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+def _to_sql_frame(df, table):
+    """Dates as ISO text so range predicates can use the indexes"""
+    out = df.copy()
+    for col in TABLE_SCHEMAS[table]['dates']:
+        out[col] = out[col].dt.strftime('%Y-%m-%d')
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(str)
+    return out
+
+
+class SQLiteRepository:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._unique_checked = False
+
+    def _connection(self):
+        """Read connection for the calling thread, opened once and reused"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, cached_statements=256
+            )
+            conn.execute("PRAGMA query_only = ON")
+            self._local.conn = conn
+        return conn
+
+    def _write_connection(self):
+        """Connection shared by every write, opened once; callers hold the write lock"""
+        if self._writer is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._writer = conn
+        return self._writer
+
+    def _create_unique_indexes(self, conn):
+        """Add the unique key indexes, dropping rows a later one superseded (older databases)"""
+        for name, (table, key) in UNIQUE_INDEXES.items():
+            columns = ', '.join(key)
+            conn.execute(
+                f"DELETE FROM {table} WHERE rowid NOT IN (SELECT MAX(rowid) FROM {table} GROUP BY {columns})"
+            )
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+    def _frame(self, table, sql, params):
+        cursor = self._connection().execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        rows = cursor.fetchall()
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        return coerce_rows([dict(zip(columns, row)) for row in rows], table)
+
+    def _one(self, sql, params):
+        cursor = self._connection().execute(sql, params)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([c[0] for c in cursor.description], row))
+
+    def import_tables(self, store: DataStore):
+        """Rebuild every table and index from the data store"""
+        with self._write_lock:
+            conn = self._write_connection()
+            for table in TABLE_SCHEMAS:
+                df = drop_superseded(store.get(table), table)
+                _to_sql_frame(df, table).to_sql(table, conn, if_exists='replace', index=False)
+            for name, target in INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+            self._create_unique_indexes(conn)
+            self._unique_checked = True
+            conn.execute("ANALYZE")
+            conn.commit()
+
+    def insert(self, table, rows):
+        """Mirror rows appended through the write log
+
+        A row whose unique key (see TABLE_SCHEMAS) is already stored, such as
+        a re-marked attendance day, replaces it, as compaction does in the CSV.
+        """
+        df = _to_sql_frame(coerce_rows(rows, table), table)
+        columns = ', '.join(df.columns)
+        verb = 'INSERT OR REPLACE' if TABLE_SCHEMAS[table].get('unique') else 'INSERT'
+        sql = f"{verb} INTO {table} ({columns}) VALUES ({', '.join('?' * len(df.columns))})"
+        values = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        with self._write_lock:
+            conn = self._write_connection()
+            if not self._unique_checked:
+                self._create_unique_indexes(conn)
+                self._unique_checked = True
+            conn.executemany(sql, values)
+            conn.commit()
+
+    def get_user(self, username):
+        return self._one(SQL_USER_BY_USERNAME, (username,))
+
+    def get_customer_by_mobile(self, mobile):
+        return self._one(SQL_CUSTOMER_BY_MOBILE, (str(mobile),))
+
+    def customer_exists(self, mobile):
+        return self._connection().execute(SQL_CUSTOMER_EXISTS, (str(mobile),)).fetchone() is not None
+
+    def get_staff(self, staff_id):
+        return self._one(SQL_STAFF_BY_ID, (int(staff_id),))
+
+    def get_staff_by_username(self, username):
+        return self._one(SQL_STAFF_BY_USERNAME, (username,))
+
+    def get_login(self, realm, login):
+        """Account row for a username (or mobile) in a credential realm, None if unknown"""
+        table, sql, params = SQL_LOGIN[realm]
+        df = self._frame(table, sql, (str(login),) * params)
+        return None if df.empty else df.to_dict('records')[0]
+
+    def attendance_summary(self, staff_id, year, month):
+        """Status counts for one staff member and month"""
+        counts = dict.fromkeys(('present', 'absent', 'leave', 'half_day'), 0)
+        rows = self._connection().execute(
+            SQL_ATTENDANCE_SUMMARY, (int(staff_id), *_month_bounds(year, month))
+        ).fetchall()
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def customer_transactions(self, customer_id, start='0000-01-01', end='9999-12-31'):
+        return self._frame('transactions', SQL_TRANSACTIONS_RANGE, (int(customer_id), str(start), str(end)))
+
+    def chit_members(self, chit_id):
+        return self._frame('chit_members', SQL_CHIT_MEMBERS, (int(chit_id),))
+
+    def read_month(self, table, year, month, columns=None, filters=None):
+        """Same contract as ParquetStore.read_month for attendance/transactions"""
+        key_column = {'attendance': 'staff_id', 'transactions': 'customer_id'}.get(table)
+        if key_column is None:
+            raise ValueError(f"{table} has no month index")
+        keys = [value for col, op, value in (filters or []) if col == key_column and op == '=']
+        if len(keys) != 1:
+            raise ValueError(f"read_month on {table} needs a single '{key_column} =' filter")
+
+        sql = SQL_ATTENDANCE_RANGE if table == 'attendance' else SQL_TRANSACTIONS_RANGE
+        df = self._frame(table, sql, (int(keys[0]), *_month_bounds(year, month)))
+        return df[columns] if columns is not None else df
+
+
+@st.cache_resource
+def get_repository():
+    """Shared SQLiteRepository when DATA_BACKEND is 'sqlite', otherwise None"""
+    if get_data_backend() != 'sqlite':
+        return None
+    repository = SQLiteRepository()
+    if not os.path.exists(repository.db_path):
+        repository.import_tables(get_data_store())
+    return repository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the SQLite mirror of the shop tables")
+    parser.add_argument('command', choices=['import'])
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    SQLiteRepository(args.db).import_tables(DataStore(args.data_dir))
+    print(f"imported {len(TABLE_SCHEMAS)} tables into {args.db}")
+
+
+if __name__ == '__main__':
+    main()
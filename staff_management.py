@@ -2,96 +2,215 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 
+from attendance_index import STATUSES, AttendanceIndex
+from data_store import append_typed, coerce_rows
+from festival_roles import FESTIVAL_ROLES, assign_roles, attendance_reliability, festival_for
+from metrics import cache_hit, cache_miss, timed
+from write_log import next_id
+
+DEDUCTION_RATE = 0.08
+BONUS_RATE = 0.05
+
+PAYSLIP_COLUMNS = [
+    'staff_id', 'name', 'role', 'floor', 'month', 'present_days', 'half_days',
+    'total_working_days', 'salary_per_day', 'base_salary', 'deductions', 'bonus', 'net_salary'
+]
+
 class StaffManagementSystem:
-    def __init__(self, staff_df, attendance_df):
+    def __init__(self, staff_df, attendance_df, storage=None, attendance_index=None, write_log=None):
         self.staff_df = staff_df
         self.attendance_df = attendance_df
+        # Optional ParquetStore or SQLiteRepository; month reads then touch
+        # a single partition / index range instead of the whole table
+        self.storage = storage
+        # Optional WriteLog; without it changes only live in this object
+        self.write_log = write_log
+        self.attendance_index = attendance_index or AttendanceIndex(attendance_df)
+        self._staff_by_id = staff_df.set_index('staff_id').to_dict('index')
+        self._payroll_cache = {}
+        self._attendance_scores = None
     
     def add_staff(self, staff_data):
         """Add a new staff member"""
+        missing = [f for f in ('name', 'mobile', 'floor', 'role', 'salary_per_day') if not staff_data.get(f)]
+        if missing:
+            return False, f"Missing fields: {', '.join(missing)}"
+        
+        mobile = str(staff_data['mobile'])
+        row = {
+            'name': staff_data['name'],
+            'mobile': mobile,
+            'email': staff_data.get('email', ''),
+            'floor': staff_data['floor'],
+            'role': staff_data['role'],
+            'hire_date': staff_data.get('hire_date') or datetime.now().date(),
+            'salary_per_day': float(staff_data['salary_per_day']),
+            'username': f"{staff_data['name'].split()[0].upper()}_{mobile[-4:]}",
+            'password_hash': staff_data.get('password_hash', ''),
+            'status': staff_data.get('status', 'active')
+        }
+        
+        if self.write_log is not None:
+            self.write_log.append_new('staff', row)
+            self.staff_df = self.write_log.store.get('staff')
+        else:
+            row['staff_id'] = next_id(self.staff_df, 'staff_id')
+            self.staff_df = append_typed(self.staff_df, coerce_rows([row], 'staff', like=self.staff_df))
+        self._staff_by_id = self.staff_df.set_index('staff_id').to_dict('index')
+        self._payroll_cache.clear()
+        self._attendance_scores = None
         return True, "Staff member added successfully"
     
     def mark_attendance(self, staff_id, date, status, remarks):
         """Mark attendance for staff"""
+        if status not in STATUSES:
+            return False, f"Invalid attendance status: {status}"
+        
+        if self.write_log is not None:
+            self.write_log.append('attendance', {
+                'staff_id': staff_id, 'date': date, 'status': status, 'remarks': remarks
+            })
+        self.attendance_index.record(staff_id, date, status, remarks)
+        day = pd.Timestamp(date)
+        self._payroll_cache.pop((day.year, day.month), None)
+        self._attendance_scores = None
         return True, f"Attendance marked as {status}"
     
+    @timed('staff.monthly_attendance')
     def get_monthly_attendance(self, staff_id, year, month):
         """Get monthly attendance for a staff member"""
-        filtered = self.attendance_df[
-            (self.attendance_df['staff_id'] == staff_id)
-        ].copy()
-        return filtered.head(30)
+        if self.storage is not None:
+            rows = self.storage.read_month(
+                'attendance', year, month,
+                filters=[('staff_id', '=', staff_id)]
+            )
+            return self._with_pending_marks(rows, staff_id, year, month)
+        
+        return self.attendance_index.month_rows(staff_id, year, month)
+    
+    def _with_pending_marks(self, rows, staff_id, year, month):
+        """Storage rows plus marks it does not hold yet (write log, this object), the last mark winning"""
+        start = pd.Timestamp(year=int(year), month=int(month), day=1)
+        end = start + pd.offsets.MonthBegin(1)
+        pending = []
+        if self.write_log is not None:
+            logged = self.write_log.pending_rows('attendance')
+            if not logged.empty:
+                in_month = (logged['staff_id'] == int(staff_id)) & (logged['date'] >= start) & (logged['date'] < end)
+                pending.append(logged[in_month])
+        pending.append(self.attendance_index.marked_rows(staff_id, year, month))
+        pending = [df for df in pending if not df.empty]
+        if not pending:
+            return rows
+        
+        merged = pd.concat([rows.assign(date=pd.to_datetime(rows['date']))] + pending, ignore_index=True)
+        merged = merged.drop_duplicates(['staff_id', 'date'], keep='last')
+        return merged.sort_values('date', ascending=False).reset_index(drop=True)
     
+    @timed('staff.attendance_summary')
     def get_attendance_summary(self, staff_id, month):
-        """Get attendance summary for the month"""
-        filtered = self.attendance_df[self.attendance_df['staff_id'] == staff_id]
-        
-        summary = {
-            'present': len(filtered[filtered['status'] == 'present']),
-            'absent': len(filtered[filtered['status'] == 'absent']),
-            'leave': len(filtered[filtered['status'] == 'leave']),
-            'half_day': len(filtered[filtered['status'] == 'half_day'])
-        }
-        return summary
+        """Get attendance summary for the month ('YYYY-MM')"""
+        return self.attendance_index.summary(staff_id, month)
+    
+    def _payroll_batch(self, year, month):
+        """Salary of every staff member for a month, cached until attendance changes"""
+        key = (int(year), int(month))
+        batch = self._payroll_cache.get(key)
+        if batch is not None:
+            cache_hit('staff.payroll')
+            return batch
+        
+        cache_miss('staff.payroll')
+        counts = self.attendance_index.month_counts(year, month)
+        batch = self.staff_df[['staff_id', 'name', 'role', 'floor', 'salary_per_day', 'status']].merge(
+            counts[['present', 'half_day']], left_on='staff_id', right_index=True, how='left'
+        )
+        batch['month'] = f"{key[0]}-{key[1]:02d}"
+        batch['present_days'] = batch['present'].fillna(0).astype('int64')
+        batch['half_days'] = batch['half_day'].fillna(0).astype('int64')
+        batch['total_working_days'] = batch['present_days'] + batch['half_days'] * 0.5
+        batch['base_salary'] = batch['total_working_days'] * batch['salary_per_day']
+        batch['deductions'] = batch['base_salary'] * DEDUCTION_RATE
+        batch['bonus'] = batch['base_salary'] * BONUS_RATE
+        batch['net_salary'] = batch['base_salary'] - batch['deductions'] + batch['bonus']
+        batch = batch.drop(columns=['present', 'half_day']).set_index('staff_id', drop=False)
+        
+        self._payroll_cache[key] = batch
+        return batch
+    
+    @timed('staff.run_payroll')
+    def run_payroll(self, year, month):
+        """Compute the month's payroll for all active staff in one pass"""
+        batch = self._payroll_batch(year, month)
+        active = batch[batch['status'] == 'active']
+        return active[PAYSLIP_COLUMNS].reset_index(drop=True)
+    
+    def export_payslips(self, year, month, path):
+        """Write the month's payroll to a .csv or .parquet file"""
+        payroll = self.run_payroll(year, month)
+        if str(path).endswith('.parquet'):
+            payroll.to_parquet(path, index=False)
+        else:
+            payroll.to_csv(path, index=False)
+        return len(payroll)
     
+    @timed('staff.calculate_salary')
     def calculate_salary(self, staff_id, year, month):
         """Calculate salary for staff member"""
-        staff = self.staff_df[self.staff_df['staff_id'] == staff_id]
-        
-        if staff.empty:
+        if staff_id not in self._staff_by_id:
             return {'error': 'Staff not found'}
         
-        salary_per_day = staff.iloc[0]['salary_per_day']
-        
-        # Get attendance for the month
-        summary = self.get_attendance_summary(staff_id, f"{year}-{month:02d}")
-        
-        present_days = summary['present']
-        half_days = summary['half_day']
-        total_working_days = present_days + (half_days * 0.5)
-        
-        base_salary = total_working_days * salary_per_day
-        deductions = base_salary * 0.08  # 8% deductions
-        bonus = base_salary * 0.05  # 5% bonus
-        net_salary = base_salary - deductions + bonus
-        
+        row = self._payroll_batch(year, month).loc[staff_id]
         return {
-            'present_days': present_days,
-            'half_days': half_days,
-            'total_working_days': total_working_days,
-            'salary_per_day': salary_per_day,
-            'base_salary': base_salary,
-            'deductions': deductions,
-            'bonus': bonus,
-            'net_salary': net_salary
+            'present_days': int(row['present_days']),
+            'half_days': int(row['half_days']),
+            'total_working_days': float(row['total_working_days']),
+            'salary_per_day': row['salary_per_day'],
+            'base_salary': row['base_salary'],
+            'deductions': row['deductions'],
+            'bonus': row['bonus'],
+            'net_salary': row['net_salary']
         }
     
-    def suggest_festival_roles(self):
-        """Suggest festival roles based on attendance"""
-        # Check if it's festival season
-        month = datetime.now().month
-        
-        festival_map = {
-            10: {'festival': 'diwali', 'roles': ['Sales Lead', 'VIP Manager', 'Premium Counter']},
-            1: {'festival': 'new_year', 'roles': ['Event Manager', 'Counter Manager', 'Sales Lead']},
-            3: {'festival': 'holi', 'roles': ['Promotion Manager', 'Sales Associate', 'Customer Care']}
-        }
+    def attendance_scores(self):
+        """Attendance reliability (0-100) of every staff member, cached until attendance changes"""
+        if self._attendance_scores is not None:
+            cache_hit('staff.attendance_scores')
+        else:
+            cache_miss('staff.attendance_scores')
+            self._attendance_scores = attendance_reliability(
+                self.attendance_index.day_statuses(), self.staff_df['staff_id']
+            )
+        return self._attendance_scores
+    
+    @timed('staff.suggest_festival_roles')
+    def suggest_festival_roles(self, month=None, plan=None, method='auto'):
+        """Assign the festival season's roles to the most reliable eligible staff
         
-        current_festival = festival_map.get(month, {'festival': None, 'roles': []})
+        `plan` overrides the season's FESTIVAL_ROLES entry, see
+        festival_roles.assign_roles for its layout and `method`.
+        """
+        festival = festival_for(month or datetime.now().month)
+        if plan is None:
+            plan = FESTIVAL_ROLES.get(festival, [])
         
-        suggestions = []
-        for idx, staff in self.staff_df.head(5).iterrows():
-            suggestions.append({
-                'name': staff['name'],
-                'current_role': staff['role'],
-                'suggested_roles': current_festival.get('roles', []),
-                'attendance_score': 85,
-                'priority_floor': staff['floor']
-            })
+        assignments, open_slots = assign_roles(self.staff_df, self.attendance_scores(), plan, method)
+        suggestions = [
+            {
+                'staff_id': row['staff_id'],
+                'name': row['name'],
+                'current_role': row['current_role'],
+                'suggested_roles': [row['festival_role']],
+                'attendance_score': row['attendance_score'],
+                'priority_floor': row['festival_floor']
+            }
+            for row in assignments.to_dict('records')
+        ]
         
         return {
-            'festival': current_festival.get('festival'),
-            'suggestions': suggestions
+            'festival': festival,
+            'suggestions': suggestions,
+            'open_slots': open_slots
         }
 
 def render_staff_login():
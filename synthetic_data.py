@@ -0,0 +1,504 @@
+"""Seeded synthetic shop data at production scale
+
+Writes every table in data_store.TABLE_SCHEMAS with the columns and formats
+of the bundled CSVs, for load tests and benchmarks:
+
+    python synthetic_data.py /tmp/shop --scale large
+    python synthetic_data.py /tmp/shop --customers 50000 --transactions 2000000 --seed 3
+
+Customers, attendance and transactions are generated and appended in chunks
+of `chunk_size` rows, so memory stays bounded by one chunk plus a few
+per-customer and per-day arrays, even at 10M transactions. Transactions are
+written in date order, which lets the monthly figures be folded in chunk by
+chunk.
+
+The tables refer to each other like the bundled ones do: transactions and
+chit members point at existing customers and attendance at existing staff.
+Customer totals, tiers and chit amounts are derived from their transactions
+and chit payments. sales.csv holds each day's completed sales by category
+with the number of staff present, and summary.csv is exactly what
+`rollup.monthly_rollup` computes from sales, transactions, customers and
+staff. The same seed,
+sizes and chunk size always produce the same files.
+"""
+import argparse
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+from credentials import hash_password
+from data_store import DATA_DIR, TABLE_SCHEMAS, write_table_csv
+from rollup import SUMMARY_COLUMNS
+
+SCALES = {
+    'small': {'customers': 1_000, 'staff': 50, 'transactions': 20_000, 'days': 365},
+    'medium': {'customers': 50_000, 'staff': 200, 'transactions': 1_000_000, 'days': 730},
+    'large': {'customers': 1_000_000, 'staff': 500, 'transactions': 10_000_000, 'days': 730},
+}
+
+CHUNK_SIZE = 500_000
+
+# Passwords of every generated account, as in the bundled demo data
+CUSTOMER_PASSWORD = 'customer123'
+STAFF_PASSWORD = 'staff123'
+
+CUSTOMER_MOBILE_BASE = 9_000_000_000
+STAFF_MOBILE_BASE = 8_800_000_000
+
+FIRST_NAMES = [
+    'Aarav', 'Abhinav', 'Aditi', 'Amit', 'Anjali', 'Anil', 'Ashok', 'Deepika', 'Divya', 'Geeta',
+    'Karan', 'Kavya', 'Manoj', 'Meera', 'Neetu', 'Neha', 'Nitin', 'Pooja', 'Priya', 'Rahul',
+    'Rajesh', 'Ravi', 'Rekha', 'Ritesh', 'Sakshi', 'Sanjay', 'Sheetal', 'Shruti', 'Simran', 'Suresh',
+    'Vikram', 'Yash',
+]
+LAST_NAMES = [
+    'Banerjee', 'Bhat', 'Das', 'Desai', 'Ghosh', 'Gupta', 'Iyer', 'Joshi', 'Kulkarni', 'Kumar',
+    'Mahajan', 'Nair', 'Patel', 'Rao', 'Reddy', 'Roy', 'Sharma', 'Singh', 'Trivedi', 'Verma',
+]
+
+FLOORS = (['Main Floor', 'First Floor', 'Second Floor'], [0.45, 0.4, 0.15])
+ROLES = (['Cashier', 'Sales', 'Customer Service', 'Delivery'], [0.35, 0.3, 0.2, 0.15])
+SALARIES = [800.0, 1000.0, 1200.0, 1500.0]
+
+ATTENDANCE_STATUSES = ['present', 'absent', 'leave', 'half_day']
+# Chance of each non-present status on a day for a staff member of average reliability
+ABSENCE_RATES = np.array([0.085, 0.06, 0.045])
+ABSENCE_REMARKS = ['Medical', 'Sick', 'Emergency', 'Personal', 'Family', 'Festival']
+
+CATEGORIES = ['gold', 'silver', 'diamond', 'other']
+CATEGORY_SHARES = [0.45, 0.25, 0.1, 0.2]
+# Median and spread (lognormal sigma) of a transaction amount per category
+CATEGORY_AMOUNTS = np.array([[90_000, 0.6], [30_000, 0.6], [150_000, 0.7], [12_000, 0.8]])
+TRANSACTION_TYPES = (['sale', 'payment', 'adjustment'], [0.55, 0.3, 0.15])
+COMPLETED_SHARE = 0.7
+
+# Busier months: Diwali (Oct/Nov), New Year (Jan) and Holi (Mar)
+FESTIVAL_TRAFFIC = {10: 1.6, 11: 1.4, 1: 1.2, 3: 1.2}
+WEEKEND_TRAFFIC = 1.3
+
+# Share of customers per tier, lowest spenders first
+TIER_SHARES = [('Standard', 0.13), ('Silver', 0.26), ('Gold', 0.44), ('Platinum', 0.17)]
+
+# (name, amount, members, draw schedule)
+CHIT_PLANS = [
+    ('Gold Chit 100K', 1_000_000, 20, 'Monthly'),
+    ('Silver Chit 50K', 500_000, 20, 'Monthly'),
+    ('Diamond Chit 200K', 2_000_000, 30, 'Bi-monthly'),
+    ('Premium Chit 150K', 1_500_000, 25, 'Monthly'),
+    ('Platinum Chit 300K', 3_000_000, 30, 'Bi-monthly'),
+]
+CUSTOMERS_PER_CHIT = 500
+
+OFFER_OCCASIONS = ['Diwali', 'New Year', 'Holi', 'Akshaya Tritiya', 'Wedding Season', 'Anniversary', 'Weekend']
+OFFER_TARGETS = ['all', 'gold', 'silver', 'diamond', 'platinum']
+
+# Per-table seed streams, so each table's rows only depend on the seed and sizes
+STREAMS = {table: i for i, table in enumerate(
+    ['calendar', 'staff', 'attendance', 'customers', 'transactions', 'chits', 'chit_members', 'offers']
+)}
+
+
+def _rng(seed, stream, chunk=0):
+    return np.random.default_rng([seed, STREAMS[stream], chunk])
+
+
+def _pick(rng, choices, size):
+    values, weights = choices
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size, p=weights)]
+
+
+def _names(rng, size):
+    first = np.asarray(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), size)]
+    last = np.asarray(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), size)]
+    return first, last
+
+
+def _write_chunk(df, path, first):
+    """Write the header with the first chunk, append the rest"""
+    df.to_csv(path, mode='w' if first else 'a', header=first, index=False, date_format='%Y-%m-%d')
+
+
+def _day_labels(days, fmt='%Y-%m-%d'):
+    return np.asarray(days.strftime(fmt), dtype=object)
+
+
+class SyntheticShop:
+    """Generates one consistent set of tables into a directory
+
+    `generate()` writes the tables in dependency order: staff and attendance,
+    transactions (folding per-day and per-customer totals), chits, customers,
+    then sales and summary from the folded totals.
+    """
+
+    def __init__(self, out_dir, customers=1_000, staff=50, transactions=20_000, days=365,
+                 start='2025-01-01', chits=None, offers=50, seed=7, chunk_size=CHUNK_SIZE):
+        self.out_dir = out_dir
+        self.customers = customers
+        self.staff = staff
+        self.transactions = transactions
+        self.days = pd.date_range(start, periods=days)
+        self.chits = chits if chits is not None else max(len(CHIT_PLANS), customers // CUSTOMERS_PER_CHIT)
+        self.offers = offers
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.rows = {}
+        self.timings = {}
+
+        n_days = len(self.days)
+        self._month_of_day = (self.days.year * 100 + self.days.month).to_numpy(dtype='int64')
+        # Folded while generating, read by the tables written later
+        self._present = np.zeros(n_days, dtype='int64')
+        self._sales = np.zeros((n_days, len(CATEGORIES)))
+        self._purchased = np.zeros(customers + 1)
+        self._pending = np.zeros(customers + 1)
+        self._first_day = np.full(customers + 1, -1, dtype='int64')
+        self._chit_paid = np.zeros(customers + 1, dtype='int64')
+        self._month_transactions = {}
+        self._month_amounts = {}
+        self._joined_day = np.zeros(customers + 1, dtype='int64')
+
+    def path(self, table):
+        return os.path.join(self.out_dir, TABLE_SCHEMAS[table]['file'])
+
+    def generate(self):
+        """Write every table, returning {table: rows written}"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        for table, step in [
+            ('users', self._users),
+            ('staff', self._staff),
+            ('attendance', self._attendance),
+            ('transactions', self._transactions),
+            ('chits', self._chits),
+            ('customers', self._customers),
+            ('sales', self._sales_table),
+            ('summary', self._summary),
+            ('offers', self._offers),
+        ]:
+            start = time.perf_counter()
+            self.rows[table] = step()
+            self.timings[table] = time.perf_counter() - start
+        return self.rows
+
+    def _users(self):
+        """Manager and admin logins are copied from the bundled data"""
+        shutil.copy(os.path.join(DATA_DIR, TABLE_SCHEMAS['users']['file']), self.path('users'))
+        return len(pd.read_csv(self.path('users')))
+
+    def _staff(self):
+        rng = _rng(self.seed, 'staff')
+        n = self.staff
+        ids = np.arange(1, n + 1)
+        first, last = _names(rng, n)
+        # Most staff predate the generated period, some join during it
+        hire_offset = np.where(rng.random(n) < 0.9, -rng.integers(30, 5 * 365, n),
+                               rng.integers(0, len(self.days), n))
+        self._hire_day = np.clip(hire_offset, 0, None)
+        self._reliability = rng.gamma(2.0, 0.5, n)
+        status = np.where(rng.random(n) < 0.95, 'active', 'inactive')
+        self._active_hire_offset = np.sort(hire_offset[status == 'active'])
+
+        frame = pd.DataFrame({
+            'staff_id': ids,
+            'name': first + ' ' + last,
+            'mobile': STAFF_MOBILE_BASE + ids,
+            'email': pd.Series(first).str.lower() + '.' + pd.Series(last).str.lower() + ids.astype(str)
+            + '@jewelry.com',
+            'floor': _pick(rng, FLOORS, n),
+            'role': _pick(rng, ROLES, n),
+            'hire_date': self.days[0] + pd.to_timedelta(hire_offset, unit='D'),
+            'salary_per_day': np.asarray(SALARIES)[rng.integers(0, len(SALARIES), n)],
+            'username': pd.Series(first).str.upper() + '_' + (2000 + ids).astype(str),
+            'password_hash': hash_password(STAFF_PASSWORD),
+            'status': status,
+        })
+        write_table_csv(frame, self.path('staff'))
+        return n
+
+    def _attendance(self):
+        """One row per staff member per day since hiring, in blocks of staff"""
+        n_days = len(self.days)
+        labels = _day_labels(self.days)
+        block = max(1, self.chunk_size // n_days)
+        statuses = np.asarray(ATTENDANCE_STATUSES, dtype=object)
+        remarks = np.asarray(ABSENCE_REMARKS, dtype=object)
+        written = 0
+        for chunk, lo in enumerate(range(0, self.staff, block)):
+            rng = _rng(self.seed, 'attendance', chunk)
+            hi = min(lo + block, self.staff)
+            rates = np.clip(ABSENCE_RATES[None, :] * self._reliability[lo:hi, None], 0, 0.3)
+            thresholds = np.cumsum(rates, axis=1)
+            draws = rng.random((hi - lo, n_days))
+            # 0 present, 1 absent, 2 leave, 3 half day
+            status = (draws[:, :, None] < thresholds[:, None, :]).argmax(axis=2) + 1
+            status[draws >= thresholds[:, -1:]] = 0
+
+            day = np.broadcast_to(np.arange(n_days), status.shape)
+            employed = day >= self._hire_day[lo:hi, None]
+            staff_ids = np.broadcast_to(np.arange(lo + 1, hi + 1)[:, None], status.shape)[employed]
+            day, status = day[employed], status[employed]
+            self._present += np.bincount(day[status == 0], minlength=n_days)
+
+            remark = np.where((status > 0) & (rng.random(len(status)) < 0.6),
+                              remarks[rng.integers(0, len(remarks), len(status))], '')
+            _write_chunk(pd.DataFrame({
+                'staff_id': staff_ids,
+                'date': labels[day],
+                'status': statuses[status],
+                'remarks': remark,
+            }), self.path('attendance'), chunk == 0)
+            written += len(status)
+        return written
+
+    def _transactions(self):
+        """Transactions in date order, busier on weekends and festival months"""
+        rng = _rng(self.seed, 'calendar')
+        n_days = len(self.days)
+        traffic = np.where(self.days.dayofweek >= 5, WEEKEND_TRAFFIC, 1.0) \
+            * pd.Series(self.days.month).map(FESTIVAL_TRAFFIC).fillna(1.0).to_numpy()
+        day_end = np.cumsum(rng.multinomial(self.transactions, traffic / traffic.sum()))
+        # A few regulars account for much of the traffic
+        activity = np.cumsum(rng.lognormal(0.0, 1.0, self.customers))
+        activity /= activity[-1]
+
+        labels = _day_labels(self.days)
+        compact = _day_labels(self.days, '%Y%m%d')
+        types, type_weights = TRANSACTION_TYPES
+        types = np.asarray(types, dtype=object)
+        categories = np.asarray(CATEGORIES, dtype=object)
+
+        for chunk, lo in enumerate(range(0, self.transactions, self.chunk_size)):
+            rng = _rng(self.seed, 'transactions', chunk)
+            hi = min(lo + self.chunk_size, self.transactions)
+            size = hi - lo
+            ids = np.arange(lo + 1, hi + 1)
+            day = np.searchsorted(day_end, np.arange(lo, hi), side='right')
+            customer = np.minimum(np.searchsorted(activity, rng.random(size)), self.customers - 1) + 1
+            category = rng.choice(len(CATEGORIES), size, p=CATEGORY_SHARES)
+            median, sigma = CATEGORY_AMOUNTS[category, 0], CATEGORY_AMOUNTS[category, 1]
+            amount = np.maximum(median * rng.lognormal(0.0, sigma), 500).astype('int64')
+            kind = rng.choice(len(type_weights), size, p=type_weights)
+            completed = rng.random(size) < COMPLETED_SHARE
+
+            sold = (kind == 0) & completed
+            self._sales += np.bincount(
+                day[sold] * len(CATEGORIES) + category[sold], weights=amount[sold],
+                minlength=n_days * len(CATEGORIES)
+            ).reshape(n_days, len(CATEGORIES))
+            self._purchased += np.bincount(customer[sold], weights=amount[sold], minlength=self.customers + 1)
+            self._pending += np.bincount(customer[~completed], weights=amount[~completed],
+                                         minlength=self.customers + 1)
+            # Rows are in date order, so a customer's first row in a chunk is their earliest
+            unique, first = np.unique(customer, return_index=True)
+            new = self._first_day[unique] < 0
+            self._first_day[unique[new]] = day[first[new]]
+
+            months = self._month_of_day[day]
+            month_values, bounds = np.unique(months, return_index=True)
+            for month, rows in zip(month_values.tolist(), np.split(amount, bounds[1:])):
+                self._month_transactions[month] = self._month_transactions.get(month, 0) + len(rows)
+                self._month_amounts[month] = self._month_amounts.get(month, 0) + int(rows.sum())
+
+            _write_chunk(pd.DataFrame({
+                'id': ids,
+                'customer_id': customer,
+                'date': labels[day],
+                'amount': amount,
+                'category': categories[category],
+                'type': types[kind],
+                'status': np.where(completed, 'completed', 'pending'),
+                'invoice_id': 'INV' + pd.Series(compact[day]) + pd.Series(ids.astype(str)).str.zfill(4),
+            }), self.path('transactions'), chunk == 0)
+        return self.transactions
+
+    def _chits(self):
+        """Chits starting through the period, members paid up to its last day"""
+        rng = _rng(self.seed, 'chits')
+        n = self.chits
+        plan = rng.integers(0, len(CHIT_PLANS), n)
+        names, amounts, members, schedules = (np.asarray(column, dtype=object) for column in zip(*CHIT_PLANS))
+        months = pd.date_range(self.days[0], self.days[-1], freq='MS')
+        if len(months) == 0:
+            months = pd.DatetimeIndex([self.days[0].replace(day=1)])
+        start = months[rng.integers(0, len(months), n)]
+        members = np.minimum(members[plan].astype('int64'), self.customers)
+        amount = amounts[plan].astype('int64')
+        interval = np.where(schedules[plan] == 'Monthly', 1, 2)
+        end = pd.DatetimeIndex([
+            s + pd.DateOffset(months=int(m)) - pd.Timedelta(days=1)
+            for s, m in zip(start, members * interval)
+        ])
+        chits = pd.DataFrame({
+            'id': np.arange(1, n + 1),
+            'name': names[plan] + (' #' + pd.Series(np.arange(1, n + 1)).astype(str) if n > len(CHIT_PLANS) else ''),
+            'amount': amount,
+            'monthly_payment': amount // members,
+            'members': members,
+            'start_date': start,
+            'end_date': end,
+            'draw_schedule': schedules[plan],
+        })
+        write_table_csv(chits, self.path('chits'))
+
+        rng = _rng(self.seed, 'chit_members')
+        as_of = self.days[-1]
+        frames = []
+        for chit in chits.itertuples():
+            size = int(chit.members)
+            customer = rng.choice(self.customers, size, replace=False) + 1
+            joined = chit.start_date + pd.to_timedelta(rng.integers(0, 60, size), unit='D')
+            elapsed = (as_of.year - joined.year) * 12 + as_of.month - joined.month + 1
+            # Most members keep up, some fall a few instalments behind
+            instalments = np.clip(elapsed - rng.poisson(0.5, size), 0, size)
+            paid = np.minimum(instalments * chit.monthly_payment, chit.amount).astype('int64')
+            frames.append(pd.DataFrame({
+                'chit_id': chit.id,
+                'customer_id': customer,
+                'joined_date': joined,
+                'amount_paid': paid,
+                'amount_remaining': chit.amount - paid,
+                'draw_number': rng.integers(1, 6, size),
+                'status': np.where(rng.random(size) < 0.8, 'active', 'inactive'),
+            }))
+        chit_members = pd.concat(frames, ignore_index=True)
+        chit_members = chit_members[chit_members['joined_date'] <= as_of]
+        self._chit_paid += np.bincount(chit_members['customer_id'], weights=chit_members['amount_paid'],
+                                       minlength=self.customers + 1).astype('int64')
+        write_table_csv(chit_members, self.path('chit_members'))
+        self.rows['chit_members'] = len(chit_members)
+        return n
+
+    def _customers(self):
+        """Customers with totals and tiers derived from their transactions"""
+        n_days = len(self.days)
+        purchased = self._purchased.astype('int64')
+        bounds = np.quantile(purchased[1:], np.cumsum([share for _, share in TIER_SHARES])[:-1])
+        tiers = np.asarray([tier for tier, _ in TIER_SHARES], dtype=object)
+        password_hash = hash_password(CUSTOMER_PASSWORD)
+
+        for chunk, lo in enumerate(range(1, self.customers + 1, self.chunk_size)):
+            rng = _rng(self.seed, 'customers', chunk)
+            hi = min(lo + self.chunk_size, self.customers + 1)
+            ids = np.arange(lo, hi)
+            first, last = _names(rng, len(ids))
+            # Joined shortly before the first transaction, or any day if there was none
+            first_day = self._first_day[lo:hi]
+            joined = np.where(first_day >= 0, first_day - rng.integers(0, 60, len(ids)),
+                              rng.integers(0, n_days, len(ids)))
+            self._joined_day[lo:hi] = joined
+            lower_first = pd.Series(first).str.lower()
+            _write_chunk(pd.DataFrame({
+                'id': ids,
+                'name': first + ' ' + last,
+                'mobile': CUSTOMER_MOBILE_BASE + ids,
+                'email': lower_first + '.' + pd.Series(last).str.lower() + ids.astype(str) + '@example.com',
+                'username': pd.Series(first).str.upper() + '_' + ids.astype(str),
+                'password_hash': password_hash,
+                'tier': tiers[np.searchsorted(bounds, purchased[lo:hi], side='right')],
+                'joined_date': self.days[0] + pd.to_timedelta(joined, unit='D'),
+                'pending_amount': self._pending[lo:hi].astype('int64'),
+                'total_purchased': purchased[lo:hi],
+                'chit_amount': self._chit_paid[lo:hi],
+            }), self.path('customers'), chunk == 0)
+        return self.customers
+
+    def _sales_table(self):
+        parts = self._sales.astype('int64')
+        self._sales_frame = pd.DataFrame({
+            'date': self.days,
+            'daily_sales': parts.sum(axis=1),
+            'gold_sales': parts[:, 0],
+            'silver_sales': parts[:, 1],
+            'diamond_sales': parts[:, 2],
+            'other_sales': parts[:, 3],
+            'staff_count': self._present,
+        })
+        write_table_csv(self._sales_frame, self.path('sales'))
+        return len(self._sales_frame)
+
+    def _summary(self):
+        """Monthly figures in the layout (and with the rules) of rollup.monthly_rollup"""
+        sales = self._sales_frame.drop(columns='date').groupby(self._month_of_day).agg(
+            total_sales=('daily_sales', 'sum'),
+            gold_sales=('gold_sales', 'sum'),
+            silver_sales=('silver_sales', 'sum'),
+            diamond_sales=('diamond_sales', 'sum'),
+            other_sales=('other_sales', 'sum'),
+        )
+        sales['total_transactions'] = pd.Series(self._month_transactions).reindex(sales.index).fillna(0)
+        sales['transaction_amount'] = pd.Series(self._month_amounts).reindex(sales.index).fillna(0)
+        # Headcounts at the end of each month, as day offsets from the first day
+        month_end = pd.Series(np.arange(len(self.days))).groupby(self._month_of_day).max()
+        sales['total_customers'] = np.searchsorted(np.sort(self._joined_day[1:]), month_end, side='right')
+        sales['active_staff'] = np.searchsorted(self._active_hire_offset, month_end, side='right')
+        summary = sales.astype('int64')
+        count = summary['total_transactions']
+        summary['avg_transaction'] = (summary['transaction_amount'] / count.where(count > 0)).round().fillna(0) \
+            .astype('int64')
+        summary['month'] = [f"{key // 100:04d}-{key % 100:02d}" for key in summary.index]
+        write_table_csv(summary[SUMMARY_COLUMNS], self.path('summary'))
+        return len(summary)
+
+    def _offers(self):
+        rng = _rng(self.seed, 'offers')
+        n = self.offers
+        ids = np.arange(1, n + 1)
+        occasion = np.asarray(OFFER_OCCASIONS, dtype=object)[rng.integers(0, len(OFFER_OCCASIONS), n)]
+        target = np.asarray(OFFER_TARGETS, dtype=object)[rng.integers(0, len(OFFER_TARGETS), n)]
+        discount = pd.Series(rng.choice([5, 8, 10, 12, 15, 20, 25], n))
+        valid_from = self.days[rng.integers(0, len(self.days), n)]
+        audience = pd.Series(target).map(
+            lambda t: 'all items' if t == 'all' else f"{t} members" if t == 'platinum' else f"{t} items"
+        )
+        write_table_csv(pd.DataFrame({
+            'id': ids,
+            'name': occasion + ' ' + pd.Series(target).str.title() + ' Offer ' + ids.astype(str),
+            'discount_percent': discount,
+            'description': 'Get ' + discount.astype(str) + '% discount on ' + audience,
+            'valid_from': valid_from,
+            'valid_to': valid_from + pd.to_timedelta(rng.integers(7, 91, n), unit='D'),
+            'applicable_to': target,
+            'campaign_message': 'Celebrate ' + occasion + ' with us! 🎉',
+        }), self.path('offers'))
+        return n
+
+
+def generate(out_dir, scale=None, **sizes):
+    """Write a synthetic data directory, returning {table: rows written}
+
+    `scale` picks a preset from SCALES; explicit sizes override it.
+    """
+    options = dict(SCALES[scale]) if scale else {}
+    options.update({key: value for key, value in sizes.items() if value is not None})
+    return SyntheticShop(out_dir, **options).generate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic shop data")
+    parser.add_argument('out_dir')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--customers', type=int)
+    parser.add_argument('--staff', type=int)
+    parser.add_argument('--transactions', type=int)
+    parser.add_argument('--days', type=int)
+    parser.add_argument('--start')
+    parser.add_argument('--chits', type=int)
+    parser.add_argument('--offers', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--chunk-size', type=int)
+    args = parser.parse_args()
+
+    options = dict(SCALES[args.scale])
+    for key in ('customers', 'staff', 'transactions', 'days', 'start', 'chits', 'offers', 'seed', 'chunk_size'):
+        if getattr(args, key) is not None:
+            options[key] = getattr(args, key)
+    shop = SyntheticShop(args.out_dir, **options)
+    rows = shop.generate()
+    for table, count in rows.items():
+        timing = f"{shop.timings[table]:8.2f} s" if table in shop.timings else ''
+        print(f"{table:<14}{count:>12,} rows {timing}")
+
+
+if __name__ == '__main__':
+    main()
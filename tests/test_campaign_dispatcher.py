@@ -0,0 +1,152 @@
+"""CampaignDispatcher against a local stub WhatsApp endpoint"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from campaign_dispatcher import CampaignDispatcher, TokenBucket
+from whatsapp_service import WhatsAppService
+
+
+class StubEndpoint:
+    """Answers each recipient from a script of (status, headers) replies, the last one repeating"""
+
+    def __init__(self):
+        self.scripts = {}
+        self.calls = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                status, headers = stub.reply(payload['to'])
+                body = json.dumps({'messages': [{'id': 'stub'}]} if status == 200 else {'error': status}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reply(self, phone):
+        with self._lock:
+            self.calls.append((time.monotonic(), phone))
+            attempt = sum(1 for _, called in self.calls if called == phone) - 1
+        script = self.scripts.get(phone, [(200, {})])
+        return script[min(attempt, len(script) - 1)]
+
+    def attempts(self, phone):
+        return sum(1 for _, called in self.calls if called == phone)
+
+
+@pytest.fixture
+def stub():
+    endpoint = StubEndpoint()
+    yield endpoint
+    endpoint.server.shutdown()
+    endpoint.server.server_close()
+
+
+@pytest.fixture
+def dispatcher_for(stub, tmp_path):
+    def build(**options):
+        service = WhatsAppService('token', 'phone-id', 'account-id', api_url=stub.url)
+        options = {'rate_per_second': 1000, 'workers': 4, 'backoff_base': 0.001, **options}
+        return CampaignDispatcher(service, progress_dir=str(tmp_path), **options)
+    return build
+
+
+def test_retry_after_is_honoured(stub, dispatcher_for):
+    stub.scripts['919800000001'] = [(429, {'Retry-After': '1'}), (200, {})]
+    report = dispatcher_for().send_campaign('retry-after', ['9800000001'], "hello")
+
+    assert report.sent == 1
+    assert report.retries == 1
+    first, second = (at for at, _ in stub.calls)
+    # backoff_base alone would have retried within milliseconds
+    assert second - first >= 0.95
+
+
+def test_server_errors_back_off_then_fail(stub, dispatcher_for):
+    stub.scripts['919800000002'] = [(503, {})]
+    dispatcher = dispatcher_for(max_retries=2)
+
+    status, attempts, error = dispatcher.send_one('9800000002', "hello")
+
+    assert (status, attempts, error) == ('failed', 3, 'HTTP 503')
+    assert stub.attempts('919800000002') == 3
+
+
+def test_token_bucket_paces_sends(stub, dispatcher_for):
+    rate, recipients = 40, 100
+    dispatcher = dispatcher_for(rate_per_second=rate, workers=8)
+    phones = [f"98{i:08d}" for i in range(recipients)]
+
+    start = time.monotonic()
+    report = dispatcher.send_campaign('paced', phones, "hello")
+    elapsed = time.monotonic() - start
+
+    assert report.sent == recipients
+    # The first `rate` go out as a burst, the rest at `rate` per second
+    assert elapsed >= (recipients - rate) / rate * 0.95
+    calls = sorted(at for at, _ in stub.calls)
+    for i, at in enumerate(calls):
+        in_window = sum(1 for other in calls[i:] if other - at < 1.0)
+        assert in_window <= 2 * rate
+
+
+def test_token_bucket_bursts_to_capacity():
+    bucket = TokenBucket(rate=10, capacity=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_per_recipient_results_are_recorded(stub, dispatcher_for):
+    stub.scripts['919800000010'] = [(400, {})]
+    stub.scripts['919800000011'] = [(500, {}), (200, {})]
+    dispatcher = dispatcher_for(max_retries=1)
+    recipients = ['9800000009', '9800000010', '9800000011', '12345', '98000 00009']
+
+    report = dispatcher.send_campaign('results', recipients, "hello")
+
+    assert report.to_dict()['total'] == 4
+    assert (report.sent, report.failed, report.invalid, report.retries) == (2, 1, 1, 1)
+    with open(dispatcher.progress_path('results'), encoding='utf-8') as f:
+        entries = {entry['phone']: entry for entry in map(json.loads, f)}
+    assert entries['919800000009']['status'] == 'sent'
+    assert entries['919800000010'] == dict(entries['919800000010'], status='failed', attempts=1, error='HTTP 400')
+    assert entries['919800000011'] == dict(entries['919800000011'], status='sent', attempts=2, error=None)
+    assert entries['12345']['status'] == 'invalid'
+    # Client errors are not retried
+    assert stub.attempts('919800000010') == 1
+
+
+def test_resume_skips_sent_recipients(stub, dispatcher_for):
+    stub.scripts['919800000021'] = [(400, {}), (200, {})]
+    dispatcher = dispatcher_for()
+    recipients = ['9800000020', '9800000021']
+
+    first = dispatcher.send_campaign('resume', recipients, "hello")
+    second = dispatcher.send_campaign('resume', recipients, "hello")
+
+    assert (first.sent, first.failed) == (1, 1)
+    assert (second.sent, second.skipped) == (1, 1)
+    assert stub.attempts('919800000020') == 1
@@ -0,0 +1,147 @@
+"""ResponseCache and GeminiService caching with a fake model"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from assistant_context import CustomerContextBuilder, is_personal_query
+from customer_aggregates import CustomerAggregateStore
+from data_store import DATA_DIR, DataStore
+from gemini_service import GeminiService
+from response_cache import ResponseCache, make_cache_key
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Counts calls; each one waits on `release` so concurrent callers overlap"""
+
+    def __init__(self, text="Clean gold with mild soap.", delay=0.0, fail=False):
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        return FakeResponse(self.text)
+
+
+def test_concurrent_identical_queries_make_one_upstream_call():
+    model = FakeModel(delay=0.2)
+    service = GeminiService(model=model, cache=ResponseCache())
+    queries = ["How do I clean gold?", "how do i clean gold", "  How do I   clean gold?? "] * 4
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        answers = list(pool.map(service.answer_customer_query, queries))
+
+    assert model.calls == 1
+    assert set(answers) == {model.text}
+    stats = service.cache.stats()
+    assert stats['misses'] == 1
+    assert stats['coalesced'] + stats['hits'] == len(queries) - 1
+
+
+def test_failed_call_reaches_every_waiter_and_is_not_cached():
+    cache = ResponseCache()
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream unavailable")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        owner = pool.submit(cache.get_or_compute, 'key', compute)
+        started.wait()
+        waiter = pool.submit(cache.get_or_compute, 'key', lambda: "never called")
+        for future in (owner, waiter):
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert cache.get('key') is None
+    assert cache.get_or_compute('key', lambda: "recovered") == "recovered"
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttl=0.05)
+    cache.set('key', "answer")
+    assert cache.get('key') == "answer"
+    time.sleep(0.1)
+    assert cache.get('key') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', "A")
+    cache.set('b', "B")
+    assert cache.get('a') == "A"
+    cache.set('c', "C")
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ("A", "C")
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disk_tier_is_shared_and_respects_ttl(tmp_path):
+    path = str(tmp_path / 'responses.db')
+    ResponseCache(disk_path=path).set('key', "answer")
+
+    other = ResponseCache(disk_path=path)
+    assert other.get('key') == "answer"
+    assert other.stats()['disk_hits'] == 1
+
+    short = ResponseCache(ttl=0.05, disk_path=path)
+    short.set('stale', "old")
+    time.sleep(0.1)
+    assert ResponseCache(disk_path=path).get('stale') is None
+
+
+def test_service_reads_answers_cached_by_another_process(tmp_path):
+    path = str(tmp_path / 'responses.db')
+    first = GeminiService(model=FakeModel(), cache=ResponseCache(disk_path=path))
+    first.answer_customer_query("Is your gold hallmarked?", {'tier': 'Gold'})
+
+    model = FakeModel(text="different")
+    second = GeminiService(model=model, cache=ResponseCache(disk_path=path))
+    assert second.answer_customer_query("is your gold hallmarked", {'tier': 'Gold'}) == first.model.text
+    assert model.calls == 0
+
+
+def test_cache_key_separates_tier_and_context():
+    base = make_cache_key("Is your gold hallmarked?", 'Gold', {}, "FAQ: hallmark")
+    assert make_cache_key("is your gold hallmarked", 'gold', {}, "FAQ: hallmark") == base
+    assert make_cache_key("Is your gold hallmarked?", 'Silver', {}, "FAQ: hallmark") != base
+    assert make_cache_key("Is your gold hallmarked?", 'Gold', {}, "Offer: diwali") != base
+
+
+@pytest.fixture(scope='module')
+def context_builder():
+    store = DataStore(DATA_DIR)
+    aggregates = CustomerAggregateStore(
+        store.get('customers'), store.get('transactions'), store.get('chits'),
+        store.get('chit_members'), store.get('offers'),
+    )
+    return CustomerContextBuilder(aggregates, store.get('offers')), store.get('customers')
+
+
+def test_general_questions_share_context_across_customers(context_builder):
+    builder, customers = context_builder
+    tier = customers['tier'].astype(str).mode()[0]
+    first, second = customers.loc[customers['tier'].astype(str) == tier, 'id'].head(2).tolist()
+
+    general = "How should diamond jewellery be cared for?"
+    assert not is_personal_query(general)
+    assert builder.build(first, general) == builder.build(second, general)
+
+    personal = "What is my pending amount?"
+    assert is_personal_query(personal)
+    assert builder.build(first, personal) != builder.build(second, personal)
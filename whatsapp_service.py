@@ -1,52 +1,131 @@
-import requests
 import re
+import threading
+import pandas as pd
 import streamlit as st
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from metrics import timer
+
+# Optional +91 / 91 / 0 prefix followed by a 10 digit Indian mobile number
+PHONE_PATTERN = re.compile(r'^(?:\+91|91|0)?([6-9]\d{9})$')
+SEPARATOR_PATTERN = re.compile(r'[\s\-]')
+
+# Keep-alive connections per service, override with the WHATSAPP_POOL_SIZE secret
+HTTP_POOL_SIZE = 16
+
+
+def normalize_phone_number(phone) -> Optional[str]:
+    """One phone number as 91XXXXXXXXXX, or None if invalid (same rules as the bulk path)"""
+    if phone is None:
+        return None
+    match = PHONE_PATTERN.fullmatch(SEPARATOR_PATTERN.sub('', str(phone)))
+    return None if match is None else '91' + match.group(1)
+
+
+def normalize_phone_numbers(phones) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Validate, normalize and dedupe a Series of phone numbers in one pass
+
+    For bulk lists; single numbers go through normalize_phone_number.
+    
+    Returns (valid, invalid). `valid` has the original `input` and the
+    normalized `phone` (91XXXXXXXXXX), first occurrence per number only.
+    `invalid` has `input` and a `reason`. Both keep the caller's index.
+    """
+    # Arrow-backed strings run the .str ops below in native code
+    raw = pd.Series(phones).astype('string[pyarrow]')
+    cleaned = raw.str.replace(SEPARATOR_PATTERN.pattern, '', regex=True)
+    is_valid = cleaned.str.fullmatch(PHONE_PATTERN.pattern).fillna(False).astype(bool)
+    # A match always ends in the 10 digit national number
+    normalized = ('91' + cleaned.str.slice(-10)).where(is_valid)
+    
+    duplicate = is_valid & normalized.duplicated()
+    
+    digits = cleaned.str.lstrip('+')
+    length = digits.str.len()
+    length_ok = (
+        (length == 10)
+        | ((length == 12) & digits.str.startswith('91'))
+        | ((length == 11) & digits.str.startswith('0'))
+    )
+    reason = pd.Series('invalid prefix', index=raw.index, dtype='string[pyarrow]')
+    reason = reason.mask(~length_ok.fillna(False).astype(bool), 'wrong length')
+    reason = reason.mask(~digits.fillna('').str.fullmatch(r'\d+'), 'non-numeric characters')
+    reason = reason.mask(cleaned.fillna('') == '', 'empty')
+    reason = reason.mask(duplicate, 'duplicate')
+    
+    valid = pd.DataFrame({'input': raw, 'phone': normalized})[is_valid & ~duplicate]
+    invalid = pd.DataFrame({'input': raw, 'reason': reason})[~is_valid | duplicate]
+    return valid, invalid
+
 
 class WhatsAppService:
-    def __init__(self, api_token: str, phone_id: str, business_account_id: str):
+    def __init__(self, api_token: str, phone_id: str, business_account_id: str,
+                 api_url: str = "https://graph.instagram.com/v18.0", pool_size: int = HTTP_POOL_SIZE):
         self.api_token = api_token
         self.phone_id = phone_id
         self.business_account_id = business_account_id
-        self.api_url = f"https://graph.instagram.com/v18.0"
+        self.api_url = api_url
         self.headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Keep-alive session shared by every thread using this service"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    # Deferred so validation-only callers never import requests
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
     
     def validate_phone_number(self, phone: str) -> bool:
-        pattern = r'^(\+91|91|0)?[6-9]\d{9}$'
-        phone_clean = phone.replace("-", "").replace(" ", "")
-        return bool(re.match(pattern, phone_clean))
+        return normalize_phone_number(phone) is not None
     
     def format_phone_number(self, phone: str) -> str:
-        phone_clean = phone.replace("+", "").replace("-", "").replace(" ", "")
-        if not phone_clean.startswith("91") and len(phone_clean) == 10:
-            phone_clean = "91" + phone_clean
-        elif phone_clean.startswith("0"):
-            phone_clean = "91" + phone_clean[1:]
-        return phone_clean
+        normalized = normalize_phone_number(phone)
+        if normalized is None:
+            return SEPARATOR_PATTERN.sub("", phone).lstrip("+")
+        return normalized
     
-    def send_text_message(self, to_phone: str, message: str) -> Dict:
-        if not self.validate_phone_number(to_phone):
-            return {"success": False, "error": f"Invalid phone: {to_phone}"}
-        
-        phone_number = self.format_phone_number(to_phone)
-        payload = {
+    @property
+    def messages_url(self) -> str:
+        return f"{self.api_url}/{self.phone_id}/messages"
+    
+    def build_text_payload(self, to_phone: str, message: str, normalized: bool = False) -> Dict:
+        return {
             "messaging_product": "whatsapp",
-            "to": phone_number,
+            "to": to_phone if normalized else self.format_phone_number(to_phone),
             "type": "text",
             "text": {"body": message}
         }
+    
+    def send_text_message(self, to_phone: str, message: str) -> Dict:
+        phone_number = normalize_phone_number(to_phone)
+        if phone_number is None:
+            return {"success": False, "error": f"Invalid phone: {to_phone}"}
+        
+        payload = self.build_text_payload(phone_number, message, normalized=True)
         
         try:
-            response = requests.post(
-                f"{self.api_url}/{self.phone_id}/messages",
-                json=payload,
-                headers=self.headers,
-                timeout=10
-            )
+            with timer('whatsapp.post'):
+                response = self.session.post(
+                    self.messages_url,
+                    json=payload,
+                    timeout=10
+                )
             if response.status_code == 200:
                 return {"success": True, "phone": phone_number}
             else:
@@ -54,19 +133,23 @@ class WhatsAppService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+@st.cache_resource(max_entries=1)
+def get_whatsapp_service(api_token: str, phone_id: str, business_account_id: str, pool_size: int = HTTP_POOL_SIZE):
+    """Process-wide WhatsAppService, rebuilt only when its secrets change"""
+    return WhatsAppService(api_token, phone_id, business_account_id, pool_size=pool_size)
+
+
 def init_whatsapp_service():
-    if "whatsapp_service" not in st.session_state:
-        try:
-            api_token = st.secrets.get("WHATSAPP_API_TOKEN")
-            phone_id = st.secrets.get("WHATSAPP_PHONE_ID")
-            business_account_id = st.secrets.get("WHATSAPP_BUSINESS_ACCOUNT_ID")
-            if not all([api_token, phone_id, business_account_id]):
-                return None
-            st.session_state.whatsapp_service = WhatsAppService(api_token, phone_id, business_account_id)
-            return st.session_state.whatsapp_service
-        except:
+    try:
+        api_token = st.secrets.get("WHATSAPP_API_TOKEN")
+        phone_id = st.secrets.get("WHATSAPP_PHONE_ID")
+        business_account_id = st.secrets.get("WHATSAPP_BUSINESS_ACCOUNT_ID")
+        if not all([api_token, phone_id, business_account_id]):
             return None
-    return st.session_state.whatsapp_service
+        pool_size = int(st.secrets.get("WHATSAPP_POOL_SIZE", HTTP_POOL_SIZE))
+        return get_whatsapp_service(api_token, phone_id, business_account_id, pool_size)
+    except:
+        return None
 
 def send_whatsapp_message(phone: str, message: str) -> Dict:
     service = init_whatsapp_service()
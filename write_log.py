@@ -0,0 +1,215 @@
+"""Durable append-only write path for the shop tables
+
+Each write is one JSON line appended to ``wal/<table>.log`` and fsync'd.
+Readers (DataStore) fold new lines into their cached frames; a background
+compactor periodically merges the log into the CSV with an atomic rename.
+"""
+import os
+import json
+import threading
+import pandas as pd
+import streamlit as st
+
+from data_store import (
+    TABLE_SCHEMAS, DataStore, _file_digest, append_typed, coerce_rows, compaction_marker, drop_superseded,
+    get_data_store, log_path, read_log, read_table_csv, recover_compaction, table_lock, write_table_csv,
+)
+from sqlite_repository import get_repository
+
+WRITABLE_TABLES = ('sales', 'attendance', 'staff', 'customers', 'transactions')
+
+
+def _encode(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class WriteLog:
+    def __init__(self, store: DataStore, mirrors=(), partitions=None):
+        self.store = store
+        self.data_dir = store.data_dir
+        # Secondary stores (e.g. SQLiteRepository) that receive every append
+        self.mirrors = list(mirrors)
+        # Optional ParquetStore whose month partitions compaction keeps current
+        self.partitions = partitions
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._compactor = None
+        self._stop = threading.Event()
+
+    def append(self, table, rows):
+        """Durably append one or more row dicts to a table"""
+        if table not in WRITABLE_TABLES:
+            raise ValueError(f"{table} is not writable")
+        if isinstance(rows, dict):
+            rows = [rows]
+
+        payload = ''.join(
+            json.dumps(row, default=_encode, ensure_ascii=False) + '\n' for row in rows
+        ).encode('utf-8')
+        path = log_path(self.data_dir, table)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # O_APPEND keeps concurrent writers from interleaving within a line;
+        # the shared lock only excludes the compactor's short swap window
+        with table_lock(self.data_dir, table, shared=True):
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        for mirror in self.mirrors:
+            mirror.insert(table, rows)
+        return len(rows)
+
+    def append_new(self, table, row):
+        """Append a row under a newly allocated id, returning the row as written
+
+        The id comes from the store's current frame (the CSV plus every logged
+        row) while the table's id lock is held across the append, so writers
+        in other processes, or holding a stale frame, never reuse one.
+        """
+        column = TABLE_SCHEMAS[table]['id']
+        with table_lock(self.data_dir, f"{table}.id"):
+            row = dict(row, **{column: next_id(self.store.get(table), column)})
+            self.append(table, row)
+        return row
+
+    def pending_rows(self, table):
+        """Typed rows of a table still in its log, not yet compacted into the CSV
+
+        Parsed rows are kept with the log's inode and offset, so a call only
+        reads lines appended since the last one; compaction swaps in a new
+        log file, which starts over. The frame is shared and read-only.
+        """
+        path = log_path(self.data_dir, table)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return coerce_rows([], table)
+        with self._pending_lock:
+            inode, offset, df = self._pending.get(table, (None, 0, None))
+            if inode != stat.st_ino or stat.st_size < offset:
+                offset, df = 0, None
+            if stat.st_size > offset:
+                rows, offset = read_log(path, offset)
+                if rows:
+                    rows = coerce_rows(rows, table)
+                    df = rows if df is None else pd.concat([df, rows], ignore_index=True)
+            self._pending[table] = (stat.st_ino, offset, df)
+        return df if df is not None else coerce_rows([], table)
+
+    def pending_bytes(self, table):
+        """Size of the uncompacted log of a table"""
+        try:
+            return os.stat(log_path(self.data_dir, table)).st_size
+        except FileNotFoundError:
+            return 0
+
+    def compact(self, table):
+        """Merge the logged rows of a table into its CSV, returning rows merged
+
+        The CSV and the trimmed log are swapped with two renames. A marker
+        written before them records the merged CSV and the log bytes it holds,
+        so a crash between the renames is finished by `recover_compaction`
+        instead of applying those rows twice.
+        """
+        path = log_path(self.data_dir, table)
+        csv_path = self.store.path(table)
+
+        with table_lock(self.data_dir, f"{table}.compact"):
+            with table_lock(self.data_dir, table):
+                recover_compaction(self.data_dir, table, csv_path)
+                size = self.pending_bytes(table)
+            if size == 0:
+                return 0
+
+            # Slow part runs without the exclusive lock; appends made meanwhile land past `consumed`
+            rows, consumed = read_log(path, 0, size)
+            if not rows:
+                return 0
+            with table_lock(self.data_dir, table, shared=True):
+                read_stat = os.stat(csv_path)
+                base = read_table_csv(csv_path, table)
+            merged = drop_superseded(append_typed(base, coerce_rows(rows, table, like=base)), table)
+            column = TABLE_SCHEMAS[table].get('id')
+            if column and merged[column].duplicated().any():
+                # Left in the log for repair rather than baked into the CSV
+                duplicates = sorted(merged.loc[merged[column].duplicated(), column].unique().tolist())
+                raise ValueError(f"{table} has duplicate {column} values {duplicates[:10]}, not compacting")
+            tmp_csv = f"{csv_path}.compact.tmp"
+            write_table_csv(merged, tmp_csv)
+            with open(tmp_csv, 'rb+') as f:
+                os.fsync(f.fileno())
+
+            with table_lock(self.data_dir, table):
+                stat = os.stat(csv_path)
+                if (stat.st_mtime_ns, stat.st_size) != (read_stat.st_mtime_ns, read_stat.st_size):
+                    # Rewritten meanwhile (e.g. segmentation.write_tiers), merge again next time
+                    os.remove(tmp_csv)
+                    return 0
+                if self.partitions is not None:
+                    # Before the log is trimmed: a month read may see a row twice, never miss it
+                    self.partitions.write_months(table, merged, coerce_rows(rows, table, like=base))
+                with open(path, 'rb') as f:
+                    f.seek(consumed)
+                    rest = f.read()
+                tmp_log = f"{path}.tmp"
+                with open(tmp_log, 'wb') as f:
+                    f.write(rest)
+                    f.flush()
+                    os.fsync(f.fileno())
+                marker = compaction_marker(self.data_dir, table)
+                with open(marker, 'w', encoding='utf-8') as f:
+                    json.dump({'csv_digest': _file_digest(tmp_csv), 'consumed': consumed}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_csv, csv_path)
+                os.replace(tmp_log, path)
+                os.remove(marker)
+                self.store.adopt_compaction(table, consumed, superseded=len(merged) < len(base) + len(rows))
+            return len(rows)
+
+    def compact_all(self):
+        return {table: self.compact(table) for table in WRITABLE_TABLES}
+
+    def start_compactor(self, interval=60.0, min_bytes=64 * 1024):
+        """Compact tables in a daemon thread once their log passes `min_bytes`"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                for table in WRITABLE_TABLES:
+                    if self.pending_bytes(table) >= min_bytes:
+                        try:
+                            self.compact(table)
+                        except Exception:
+                            # A failed compaction leaves the log intact, retry next tick
+                            pass
+
+        self._stop.clear()
+        self._compactor = threading.Thread(target=run, name="write-log-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self):
+        self._stop.set()
+
+
+@st.cache_resource
+def get_write_log():
+    """Shared WriteLog with its background compactor running"""
+    repository = get_repository()
+    write_log = WriteLog(get_data_store(), mirrors=[repository] if repository else [])
+    write_log.start_compactor()
+    return write_log
+
+
+def next_id(df, column):
+    """Next integer id for a table"""
+    return int(df[column].max()) + 1 if not df.empty else 1